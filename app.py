@@ -7,10 +7,9 @@ This module initializes the Flask application with necessary extensions.
 import os
 import re
 from flask import Flask, g, request, session
-from flask_login import LoginManager
+from flask_login import LoginManager, current_user
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
-from markupsafe import Markup, escape
 
 import config
 
@@ -36,6 +35,10 @@ def create_app():
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['MAX_CONTENT_LENGTH'] = config.MAX_CONTENT_LENGTH
     app.config['UPLOAD_FOLDER'] = config.UPLOAD_FOLDER
+    app.config['DOWNLOAD_OFFLOAD'] = config.DOWNLOAD_OFFLOAD
+    app.config['DOWNLOAD_ACCEL_PREFIX'] = config.DOWNLOAD_ACCEL_PREFIX
+    app.config['DOWNLOAD_IMMUTABLE_MAX_AGE'] = config.DOWNLOAD_IMMUTABLE_MAX_AGE
+    app.config['TRACKING_MODE'] = config.TRACKING_MODE
     # Enhanced database connection handling for better reliability in deployment
     app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
         "pool_recycle": 300,  # Recycle connections every 5 minutes
@@ -48,15 +51,15 @@ def create_app():
         }
     }
     
+    # Rendered Markdown, kept per worker by a digest of the text
+    from services.rendered_content import RenderCache, render_nl2br
+    app.extensions['render_cache'] = RenderCache(config.RENDER_CACHE_SIZE)
+    
     # Add custom filter for converting newlines to <br>
     @app.template_filter('nl2br')
     def nl2br_filter(s):
-        if s is None:
-            return ""
-        # First escape any HTML to prevent XSS attacks
-        s = escape(s)
-        # Then convert newlines to <br>
-        return Markup(re.sub(r'\r\n|\r|\n', '<br>', s))
+        # Escapes any HTML to prevent XSS attacks, then converts newlines to <br>
+        return render_nl2br(s)
     
     # Legacy color filter removed - no longer needed with simplified theme system
     
@@ -66,7 +69,6 @@ def create_app():
         """Perform a regex replacement on a string."""
         if s is None:
             return ""
-        import re
         return re.sub(pattern, replacement, s)
     
     # Add markdown filter for rendering markdown text
@@ -75,16 +77,17 @@ def create_app():
         """Convert Markdown text to HTML."""
         if s is None:
             return ""
-        import markdown
-        # Convert markdown to HTML and mark as safe
-        return Markup(markdown.markdown(s))
+        # Rendered once per distinct text and marked as safe
+        return app.extensions['render_cache'].markdown(s)
     
     # Add custom context processor for templates
     @app.context_processor
     def utility_processor():
         return {
             'now': config.now,
-            'DEMO_MODE': config.DEMO_MODE
+            'DEMO_MODE': config.DEMO_MODE,
+            # Site-wide settings, prepared once per settings version
+            'site': g.get('site') or app.extensions['settings_cache'].site
         }
     
     # Initialize extensions
@@ -124,108 +127,122 @@ def create_app():
             db.session.rollback()
             return None
     
-    # Cache for system settings (10 minute expiry)
-    _system_settings_cache = {}
-    _system_settings_cache_time = None
-    _CACHE_DURATION = 600  # 10 minutes in seconds
+    # Per-worker system settings cache, validated against the shared settings version
+    from services.settings_cache import SettingsCache
+    app.extensions['settings_cache'] = SettingsCache(config.SETTINGS_VERSION_CHECK_INTERVAL)
+    
+    # Admin dashboard counts, validated against a version row that session events
+    # bump in the same transaction as any change to the counted rows
+    from services.dashboard_stats import DashboardStats, install_listeners
+    app.extensions['dashboard_stats'] = DashboardStats(max_age=config.DASHBOARD_STATS_MAX_AGE)
+    install_listeners()
+    
+    # Submission review and view counters, maintained by Review and ArticleView listeners
+    from services import submission_counters
+    submission_counters.install_listeners()
+    
+    # Full-text search over the published articles, kept in sync by Submission and Publication listeners
+    from services import search
+    search.install_listeners()
+    search_index = search.SearchIndex()
+    app.extensions['search_index'] = search_index
+    
+    # Listing totals for the keyset-paginated pages, recounted every PAGINATION_COUNT_TTL seconds
+    from services.pagination import CountCache
+    app.extensions['pagination_counts'] = CountCache(ttl=config.PAGINATION_COUNT_TTL)
+    
+    # Rendered public pages for anonymous visitors, invalidated through the
+    # page_cache_version row when submissions, publications or issues change,
+    # and by the settings version
+    from services import page_cache
+    page_cache.install_listeners()
+    app.extensions['page_cache'] = page_cache.PageCache(
+        max_entries=config.PAGE_CACHE_SIZE,
+        ttl=config.PAGE_CACHE_TTL,
+        check_interval=config.PAGE_CACHE_VERSION_CHECK_INTERVAL
+    )
+    
+    # Manuscripts and revisions are stored once per content, under their SHA-256 digest
+    from services.upload_store import UploadStore
+    app.extensions['upload_store'] = UploadStore(chunk_size=config.UPLOAD_CHUNK_SIZE)
+    
+    # Visits are queued and written in batches by a background thread
+    from services.tracking import TrackingBuffer
+    tracking_buffer = TrackingBuffer(
+        app,
+        max_queue_size=config.TRACKING_QUEUE_SIZE,
+        batch_size=config.TRACKING_BATCH_SIZE,
+        flush_interval=config.TRACKING_FLUSH_INTERVAL_MS / 1000.0
+    )
+    
+    # The writer thread also keeps the analytics rollups up to date
+    if config.ANALYTICS_ROLLUP_INTERVAL > 0:
+        from services.analytics_rollups import run_rollups
+        tracking_buffer.add_periodic_task(
+            lambda: run_rollups(lag=config.ANALYTICS_ROLLUP_LAG),
+            config.ANALYTICS_ROLLUP_INTERVAL
+        )
+    
+    # Most viewed articles (all time, 30 and 7 days), updated from the article views the writer commits
+    from services.popular_articles import PopularArticles
+    popular_articles = PopularArticles(
+        size=config.POPULAR_ARTICLES_SIZE,
+        refresh_interval=config.POPULAR_ARTICLES_REFRESH_INTERVAL
+    )
+    app.extensions['popular_articles'] = popular_articles
+    tracking_buffer.add_view_listener(popular_articles.add)
+    if config.POPULAR_ARTICLES_REFRESH_INTERVAL > 0:
+        tracking_buffer.add_periodic_task(popular_articles.refresh, config.POPULAR_ARTICLES_REFRESH_INTERVAL)
+    
+    # Raw visitor logs are stored by month; old months are compacted into the
+    # rollups, then dropped once they fall out of the retention window
+    from services.log_retention import LogRetention
+    log_retention = LogRetention(
+        retention_days=config.LOG_RETENTION_DAYS,
+        months_ahead=config.LOG_PARTITION_MONTHS_AHEAD,
+        rollup_lag=config.ANALYTICS_ROLLUP_LAG
+    )
+    app.extensions['log_retention'] = log_retention
+    if config.LOG_MAINTENANCE_INTERVAL > 0:
+        tracking_buffer.add_periodic_task(log_retention.run, config.LOG_MAINTENANCE_INTERVAL)
+    
+    # Repeat visits are filtered server-side before they reach the buffer
+    from services.visit_dedup import VisitDeduplicator, visitor_key
+    visit_dedup = VisitDeduplicator(
+        window=config.TRACKING_DEDUP_WINDOW,
+        memory_kb=config.TRACKING_DEDUP_MEMORY_KB,
+        capacity=config.TRACKING_DEDUP_CAPACITY,
+        path=config.TRACKING_DEDUP_FILE or None
+    )
+    app.extensions['visit_dedup'] = visit_dedup
+    
+    # Article views are counted by article_detail, once per visitor and article per window
+    from services.article_views import ArticleViewCounter
+    app.extensions['article_views'] = ArticleViewCounter(
+        tracking_buffer,
+        VisitDeduplicator(
+            window=config.ARTICLE_VIEW_DEDUP_WINDOW,
+            memory_kb=config.TRACKING_DEDUP_MEMORY_KB,
+            capacity=config.TRACKING_DEDUP_CAPACITY,
+            path=f'{config.TRACKING_DEDUP_FILE}.articles' if config.TRACKING_DEDUP_FILE else None
+        )
+    )
+    
+    # Resolved once here instead of being re-imported inside every request
+    from services.request_classifier import (
+        RequestClassifier, STAGE_SETTINGS, STAGE_GDPR, STAGE_TRACKING
+    )
+    request_classifier = RequestClassifier()
+    app.extensions['request_classifier'] = request_classifier
     
-    # Register a before_request handler to load system settings
-    @app.before_request
     def load_system_settings():
         """Load system settings before handling any request."""
-        from models import SystemSetting
-        import time
-        
-        # Skip for static files and certain paths - expanded for improved performance
-        if (request.path.startswith('/static') or 
-            request.path.startswith('/css') or 
-            request.path.startswith('/uploads') or
-            request.path.startswith('/favicon') or
-            request.path == '/favicon.ico'):
-            return
-            
-        # Check if we need to refresh the cache
-        # Move the expensive operations inside the refresh_cache condition
-        if not hasattr(app, '_system_settings_cache_time') or not hasattr(app, '_system_settings_cache'):
-            app._system_settings_cache_time = None
-            app._system_settings_cache = {}
-            
-        current_time = time.time()
-        refresh_cache = (app._system_settings_cache_time is None or 
-                         current_time - app._system_settings_cache_time > _CACHE_DURATION)
-        
-        if refresh_cache:
-            try:
-                # Get all system settings in a single query - add optimization
-                all_settings = SystemSetting.query.with_entities(
-                    SystemSetting.setting_key, SystemSetting.setting_value
-                ).all()
-                # Update the cache - simplified
-                app._system_settings_cache = dict(all_settings)
-                app._system_settings_cache_time = current_time
-            except Exception as e:
-                app.logger.error(f"Error loading system settings: {str(e)}")
-                db.session.rollback()
-                # Create an empty cache if there's an error
-                app._system_settings_cache = {}
-                app._system_settings_cache_time = current_time
-        
-        # Helper function to get settings with default values
-        def get_setting(key, default=None):
-            return app._system_settings_cache.get(key, default)
-        
-        # Set default system theme
-        g.system_theme = get_setting('theme', 'dark')
-        
-        # Load branding settings
-        g.site_name = get_setting('site_name', 'EasyJournal')
-        g.site_description = get_setting('site_description', 'A peer-reviewed academic journal')
-        g.logo_url = get_setting('logo_url')
-        g.use_logo_text = get_setting('use_logo_text')
-        g.logo_text = get_setting('logo_text')
-        # Fix banner URL path by ensuring it starts with a slash
-        banner_url = get_setting('banner_url')
-        if banner_url and not banner_url.startswith('/'):
-            banner_url = '/' + banner_url
-        g.banner_url = banner_url
-        g.banner_title = get_setting('banner_title')
-        g.banner_subtitle = get_setting('banner_subtitle')
-        
-        # Load content settings
-        g.about_content = get_setting('about_content')
-        g.submission_guidelines = get_setting('submission_guidelines')
-        g.review_policy = get_setting('review_policy')
-        g.ethics_policy = get_setting('ethics_policy')
-        g.author_guidelines = get_setting('author_guidelines')
-        g.contact_email = get_setting('contact_email')
-        g.contact_phone = get_setting('contact_phone')
-        g.contact_address = get_setting('contact_address')
-        g.twitter_url = get_setting('twitter_url')
-        g.facebook_url = get_setting('facebook_url')
-        g.linkedin_url = get_setting('linkedin_url')
-        
-        # Load support hours
-        g.support_hours_weekday = get_setting('support_hours_weekday', '9:00 AM - 6:00 PM (EST)')
-        g.support_hours_saturday = get_setting('support_hours_saturday', '10:00 AM - 2:00 PM (EST)')
-        g.support_hours_sunday = get_setting('support_hours_sunday', 'Closed')
-        g.urgent_email = get_setting('urgent_email', 'urgent@easyjournal.org')
+        # One cheap version check; the full table is only reloaded (and the
+        # SiteContext rebuilt) when a setting has changed in any worker
+        g.site = app.extensions['settings_cache'].current_site()
     
-    @app.before_request
     def check_gdpr_consent():
         """Check if the user has given GDPR consent."""
-        from flask_login import current_user
-        from flask import render_template, make_response, redirect, url_for
-        
-        # Skip for static files, auth routes, and certain paths
-        if (request.path.startswith('/static') or 
-            request.path.startswith('/css') or 
-            request.path.startswith('/uploads') or
-            request.path.startswith('/favicon') or
-            request.path == '/favicon.ico' or
-            request.path.startswith('/auth') or  # Allow all auth routes
-            request.endpoint == 'main.index'):  # Allow access to home page
-            return
-        
         # Only check authenticated users - early return if not authenticated
         if not current_user.is_authenticated:
             return
@@ -235,142 +252,156 @@ def create_app():
         if hasattr(current_user, 'has_given_consent') and current_user.has_given_consent():
             return
             
-        # Helper function to get settings with default values - reusing the one from load_system_settings
-        def get_setting(key, default=None):
-            return app._system_settings_cache.get(key, default) if hasattr(app, '_system_settings_cache') else default
-            
-        # Get GDPR settings
-        require_consent = get_setting('gdpr_require_existing_consent', 'true') == 'true'
+        # GDPR settings come precomputed from the SiteContext
+        site = g.get('site') or app.extensions['settings_cache'].current_site()
         
         # Early return if consent is not required
-        if not require_consent:
-            return
-            
-        # Skip for the consent endpoint itself
-        if request.endpoint == 'auth.provide_consent':
+        if not site.require_consent:
             return
         
-        # Get consent text and privacy policy from settings
-        # Use the default values from config.py (moved there to improve this function's performance)
-        consent_text = get_setting('gdpr_consent_text', config.DEFAULT_CONSENT_TEXT)
-        privacy_policy = get_setting('gdpr_privacy_policy', config.DEFAULT_PRIVACY_POLICY)
-        
         # If it's an AJAX request, return a 403 status with a message
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return {'error': 'GDPR consent required'}, 403
         
-        # Render consent template and show
+        # Render consent template and show (consent text and policy are read from the SiteContext)
         g.show_consent_modal = True
-        g.consent_text = Markup(consent_text.replace('\n', '<br>'))
-        g.privacy_policy = privacy_policy
     
-    @app.before_request
     def track_visitor():
         """Track visitor information for analytics."""
         # Skip visitor tracking in deployment if there are issues with it
         # This makes sure login still works even if tracking doesn't
         try:
-            # Skip tracking for static files and certain paths - expanded list for better performance
-            if (request.path.startswith('/static') or 
-                request.path.startswith('/css') or 
-                request.path.startswith('/uploads') or
-                request.path.startswith('/favicon') or
-                request.path == '/favicon.ico' or
-                # Don't track admin routes to reduce database load
-                request.path.startswith('/admin') or
-                # Don't track health check or ping endpoints
-                request.path == '/ping' or
-                request.path == '/health'):
-                return
-                
-            # Import only if needed (after path exclusion check)
-            from models import VisitorLog, ArticleView
-            from flask_login import current_user
-            from flask import session
-            import re
-            import time
-            
-            # Limit tracking frequency to reduce database load
-            # Only track once per session, or once every 10 minutes for the same path
-            session_key = f'tracked_{request.path}'
+            # Drop the per-path keys left in cookies by the old session-based dedup
+            if 'last_tracked_time' in session:
+                for key in [key for key in session if key.startswith('tracked_')]:
+                    session.pop(key)
+                session.pop('last_tracked_time')
             
-            # Initialize tracking session data if not present
-            if 'last_tracked_time' not in session:
-                session['last_tracked_time'] = {}
-
-            current_time = time.time()
-            
-            # Check if this path was tracked in this session - avoid tracking duplicates
-            if session_key in session and current_time - session.get('last_tracked_time', {}).get(request.path, 0) <= 600:
+            # Limit tracking frequency to reduce database load: each visitor is
+            # tracked once per path per window. The state is kept server-side,
+            # so the session cookie no longer grows with every path visited
+            if visit_dedup.seen(f'{visitor_key(current_user, request)}|{request.path}'):
                 return  # Skip tracking for this request
-                
-            # Update session tracking info
-            session[session_key] = True
-            if 'last_tracked_time' not in session:
-                session['last_tracked_time'] = {}
-            session['last_tracked_time'][request.path] = current_time
-            session.modified = True
-            
-            # Use a separate thread or deferred task for tracking to avoid slowing down the response
-            # For now, we'll optimize the DB operations
-            
-            # Check if this is an article view - only do this check once
-            is_article_view = bool(re.match(r'/articles/(\d+)', request.path))
-            submission_id = None
-            if is_article_view:
-                submission_id = int(re.match(r'/articles/(\d+)', request.path).group(1))
             
-            # Create visitor log entry - only store essential data
-            visitor_log = VisitorLog(
+            # Hand the visit to the tracking buffer; the row is inserted off the
+            # request path. Article views are counted separately by article_detail
+            tracking_buffer.record_visit(
                 user_id=current_user.id if current_user.is_authenticated else None,
                 ip_address=request.remote_addr,
-                user_agent=None,  # Omit user agent to reduce data storage
-                path=request.path,
-                referer=None  # Omit referer to reduce data storage
+                path=request.path
             )
-            
-            # If it's an article view, create that record too
-            if is_article_view and submission_id:
-                article_view = ArticleView(
-                    submission_id=submission_id,
-                    user_id=current_user.id if current_user.is_authenticated else None,
-                    ip_address=request.remote_addr
-                )
-                db.session.add(article_view)
-            
-            db.session.add(visitor_log)
-            
-            # Commit but don't let errors block the request
-            try:
-                db.session.commit()
-            except Exception as tracking_error:
-                # Log the error but don't let it affect user experience
-                app.logger.error(f"Visitor tracking error: {str(tracking_error)}")
-                db.session.rollback()
                 
         except Exception as e:
             # If any error occurs in the whole visitor tracking process, 
             # log it but don't interrupt the request
             app.logger.error(f"Failed to initialize visitor tracking: {str(e)}")
-            # We don't need to rollback as we're catching at function level
+    
+    @app.before_request
+    def run_request_pipeline():
+        """Classify the request once and run only the stages that apply to it."""
+        stages = request_classifier.classify(request)
+        g.request_stages = stages
+        # Static files and uploads skip the whole pipeline
+        if not stages:
+            return
+        
+        if stages & STAGE_SETTINGS:
+            load_system_settings()
+        if stages & STAGE_GDPR:
+            response = check_gdpr_consent()
+            if response is not None:
+                return response
+        if stages & STAGE_TRACKING:
+            track_visitor()
     
     # Create database tables if they don't exist
     with app.app_context():
         db.create_all()
         
+        # Add the submission counters to databases created before them, then fill them in
+        try:
+            if submission_counters.ensure_counter_columns():
+                submission_counters.reconcile_counters()
+        except Exception as e:
+            app.logger.error(f"Error preparing submission counters: {str(e)}")
+            
+        # Add the rendered setting columns to databases created before them, then render the stored settings
+        from services import rendered_content
+        try:
+            rendered_content.ensure_rendered_columns()
+            rendered_content.prerender_settings()
+        except Exception as e:
+            app.logger.error(f"Error prerendering system settings: {str(e)}")
+            
         # Seed test accounts if in demo mode
         if config.DEMO_MODE:
             seed_test_accounts(app)
             
         # Initialize system settings if needed
-        from models import SystemSetting
+        from models import SystemSetting, SettingsVersion, DashboardStatsVersion, PageCacheVersion
+        SettingsVersion.ensure_row()
+        DashboardStatsVersion.ensure_row()
+        PageCacheVersion.ensure_row()
         if not SystemSetting.query.filter_by(setting_key='theme').first():
             SystemSetting.set_value('theme', 'dark')
             
+        # Backfill the daily article view counters from views recorded before they existed
+        from models import ArticleView, ArticleViewDaily
+        if (db.session.query(ArticleViewDaily.id).first() is None
+                and db.session.query(ArticleView.id).first() is not None):
+            from services.article_views import rebuild_daily_counters
+            try:
+                rebuild_daily_counters()
+            except Exception:
+                # Another worker is rebuilding them
+                pass
+            
+        # Backfill the unique visitor sketches from visits recorded before they existed
+        from models import VisitorLog, VisitorSketch
+        if (db.session.query(VisitorSketch.id).first() is None
+                and db.session.query(VisitorLog.id).first() is not None):
+            from services.visitor_sketches import rebuild_sketches
+            try:
+                rebuild_sketches()
+            except Exception:
+                # Another worker is rebuilding them
+                pass
+            
+        # Create the log indexes and, on PostgreSQL, the monthly partitions before any rows arrive
+        try:
+            log_retention.ensure_storage()
+        except Exception as e:
+            app.logger.error(f"Error preparing visitor log storage: {str(e)}")
+            db.session.rollback()
+            
+        # Index the published articles for search if the index is new or out of step
+        try:
+            if search_index.ensure_storage() and search_index.needs_rebuild():
+                search_index.rebuild()
+        except Exception as e:
+            app.logger.error(f"Error preparing the search index: {str(e)}")
+            db.session.rollback()
+            
+        # Create indexes declared after the database was created (PostgreSQL: setup/add_indexes.py)
+        from services.indexes import missing_indexes, create_missing_indexes
+        try:
+            if db.engine.dialect.name == 'postgresql':
+                missing = missing_indexes()
+                if missing:
+                    app.logger.warning(f"Missing indexes {', '.join(index.name for index in missing)}; "
+                                       f"run setup/add_indexes.py to create them")
+            else:
+                create_missing_indexes()
+        except Exception as e:
+            app.logger.error(f"Error creating indexes: {str(e)}")
+            
         # Initialize and load plugins
         from plugin_system import init_plugin_system
         loaded_plugins = init_plugin_system()
         app.logger.info(f"Loaded plugins: {', '.join(loaded_plugins) if loaded_plugins else 'None'}")
+        
+        # Precompute pipeline stages for every route registered so far
+        request_classifier.prime(app.url_map)
     
     return app
 
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the settings part of the before_request pipeline.
+
+Compares the old approach (about 30 dict lookups, the banner URL fixup and a
+flask.g assignment per setting on every request) against storing the
+precomputed SiteContext on flask.g.
+
+Usage: python benchmarks/bench_before_request.py [--iterations N]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import g
+
+from app import app
+
+
+def legacy_load_settings(settings):
+    """Reproduction of the per-request work load_system_settings used to do."""
+    def get_setting(key, default=None):
+        return settings.get(key, default)
+
+    g.system_theme = get_setting('theme', 'dark')
+    g.site_name = get_setting('site_name', 'EasyJournal')
+    g.site_description = get_setting('site_description', 'A peer-reviewed academic journal')
+    g.logo_url = get_setting('logo_url')
+    g.use_logo_text = get_setting('use_logo_text')
+    g.logo_text = get_setting('logo_text')
+    banner_url = get_setting('banner_url')
+    if banner_url and not banner_url.startswith('/'):
+        banner_url = '/' + banner_url
+    g.banner_url = banner_url
+    g.banner_title = get_setting('banner_title')
+    g.banner_subtitle = get_setting('banner_subtitle')
+    g.about_content = get_setting('about_content')
+    g.submission_guidelines = get_setting('submission_guidelines')
+    g.review_policy = get_setting('review_policy')
+    g.ethics_policy = get_setting('ethics_policy')
+    g.author_guidelines = get_setting('author_guidelines')
+    g.contact_email = get_setting('contact_email')
+    g.contact_phone = get_setting('contact_phone')
+    g.contact_address = get_setting('contact_address')
+    g.twitter_url = get_setting('twitter_url')
+    g.facebook_url = get_setting('facebook_url')
+    g.linkedin_url = get_setting('linkedin_url')
+    g.support_hours_weekday = get_setting('support_hours_weekday', '9:00 AM - 6:00 PM (EST)')
+    g.support_hours_saturday = get_setting('support_hours_saturday', '10:00 AM - 2:00 PM (EST)')
+    g.support_hours_sunday = get_setting('support_hours_sunday', 'Closed')
+    g.urgent_email = get_setting('urgent_email', 'urgent@easyjournal.org')
+
+
+def run(iterations):
+    """Run both variants and print the per-call cost."""
+    settings_cache = app.extensions['settings_cache']
+    # Never hit the database during the timed loop; we only measure CPU work
+    settings_cache.check_interval = float('inf')
+
+    with app.test_request_context('/about'):
+        settings_cache.invalidate()
+        settings = settings_cache.refresh_if_stale()
+
+        def site_context():
+            g.site = settings_cache.current_site()
+
+        results = {
+            'legacy g.* assignments': timeit.timeit(lambda: legacy_load_settings(settings), number=iterations),
+            'SiteContext pointer': timeit.timeit(site_context, number=iterations),
+        }
+
+    print(f"{'variant':<28}{'usec/request':>14}")
+    for name, seconds in results.items():
+        print(f"{name:<28}{seconds / iterations * 1e6:>14.3f}")
+    legacy, new = results['legacy g.* assignments'], results['SiteContext pointer']
+    print(f"\nspeedup: {legacy / new:.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--iterations', type=int, default=200000)
+    run(parser.parse_args().iterations)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the full-page cache for anonymous visitors.
+
+Generates published articles in a scratch SQLite database, then times
+anonymous requests to the public pages through the test client, first with
+the page cache disabled and then served from it. The median of each is
+printed, along with the time spent inside the cached view itself (the cache
+lookup) for a hit.
+
+Usage: python benchmarks/bench_page_cache.py [--articles N] [--requests N] [--database PATH]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+NOW = datetime(2026, 1, 1)
+
+
+def populate(db, articles):
+    """Insert published articles spread over 20 issues."""
+    from models import User, Submission, Issue, Publication
+
+    author = User('Benchmark Author', 'bench-author@example.com', 'password', 'author')
+    db.session.add(author)
+    db.session.add_all(Issue(volume=volume, issue_number=1, title=f'Volume {volume}', description='Issue',
+                             status='published', publication_date=NOW - timedelta(days=volume))
+                       for volume in range(1, 21))
+    db.session.commit()
+    db.session.execute(Submission.__table__.insert(), [
+        {'title': f'Article {i}', 'authors': f'Author {i % 500}', 'keywords': 'physics, benchmark',
+         'abstract': 'An abstract of moderate length. ' * 20, 'category': 'physics', 'file_path': 'paper.pdf',
+         'status': 'accepted', 'author_id': author.id, 'submitted_at': NOW - timedelta(hours=i)}
+        for i in range(articles)])
+    db.session.execute(Publication.__table__.insert(), [
+        {'submission_id': i + 1, 'issue_id': i % 20 + 1, 'status': 'published',
+         'published_at': NOW - timedelta(hours=i)}
+        for i in range(articles)])
+    db.session.commit()
+
+
+def median_ms(client, url, requests):
+    """Median milliseconds of a GET over a number of requests."""
+    timings = []
+    for _ in range(requests):
+        began = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - began) * 1000)
+        assert response.status_code == 200, (url, response.status_code)
+    return statistics.median(timings)
+
+
+def run(articles, requests):
+    """Populate the database and print the timings."""
+    from app import app, db
+    from services import page_cache as page_cache_module
+
+    # serve_css and serve_uploads are registered by main.py; the pages only need their URLs
+    app.add_url_rule('/css/<path:filename>', 'serve_css', lambda filename: '')
+    app.add_url_rule('/uploads/<path:filename>', 'serve_uploads', lambda filename: '')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        populate(db, articles)
+        page_cache = app.extensions['page_cache']
+        client = app.test_client()
+        urls = ['/', '/browse', '/browse?sort=title_asc', '/issues', '/articles/1', '/about']
+
+        print(f"{'page':<26}{'uncached ms':>14}{'cached ms':>12}")
+        for url in urls:
+            page_cache.max_entries = 0
+            uncached = median_ms(client, url, requests)
+            page_cache.max_entries = 1000
+            client.get(url)
+            cached = median_ms(client, url, requests)
+            print(f"{url:<26}{uncached:>14.2f}{cached:>12.2f}")
+
+        # Time spent in the cache lookup of a hit, without the test client and WSGI layers
+        with app.test_request_context('/browse'):
+            app.preprocess_request()
+            lookups = []
+            for _ in range(requests):
+                began = time.perf_counter()
+                page_cache.get(page_cache_module.request_key())
+                lookups.append((time.perf_counter() - began) * 1000)
+        print(f"\ncache lookup (key + get) on a hit: {statistics.median(lookups):.4f} ms median; "
+              f"the cached timings above also include the test client and the request pipeline")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--articles', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--database', default=os.path.join(tempfile.gettempdir(), 'bench_page_cache.db'))
+    arguments = parser.parse_args()
+    # The app reads its database from the environment when it is imported
+    os.environ['DATABASE_URL'] = f'sqlite:///{arguments.database}'
+    run(arguments.articles, arguments.requests)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark of unique visitor counting: HyperLogLog sketches against exact DISTINCT.
+
+Generates a year of synthetic visitor_logs rows in a scratch SQLite database,
+builds the hourly, daily and monthly sketches and the rollups, then compares
+COUNT(DISTINCT ip_address) on the raw table with merging the sketches, for the
+whole site and per page, over the analytics periods.
+
+Usage: python benchmarks/bench_unique_visitors.py [--rows N] [--visitors N] [--database PATH]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+NOW = datetime(2026, 1, 1)
+PATHS = [f'/articles/{number}' for number in range(1, 41)] + ['/', '/browse', '/issues', '/about']
+
+
+def populate(db, rows, visitors):
+    """Insert synthetic visits with a skewed visitor and page distribution."""
+    from models import VisitorLog
+
+    rng = random.Random(42)
+    start = NOW - timedelta(days=365)
+    chunk = []
+    for _ in range(rows):
+        # A few heavy visitors and a long tail of occasional ones
+        visitor = int(visitors * rng.random() ** 2)
+        chunk.append({
+            'user_id': None,
+            'ip_address': f'10.{visitor >> 16 & 255}.{visitor >> 8 & 255}.{visitor & 255}',
+            'path': rng.choice(PATHS),
+            'timestamp': start + timedelta(seconds=rng.uniform(0, 365 * 86400)),
+        })
+        if len(chunk) == 50000:
+            db.session.execute(VisitorLog.__table__.insert(), chunk)
+            chunk = []
+    if chunk:
+        db.session.execute(VisitorLog.__table__.insert(), chunk)
+    db.session.commit()
+
+
+def timed(function):
+    """Run a function and return (result, milliseconds)."""
+    began = time.perf_counter()
+    result = function()
+    return result, (time.perf_counter() - began) * 1000
+
+
+def run(rows, visitors):
+    """Populate the database and print exact against estimated counts."""
+    from app import app, db
+    from models import VisitorLog
+    from services.analytics_rollups import run_rollups
+    from services.hyperloglog import STANDARD_ERROR
+    from services.visitor_sketches import rebuild_sketches, unique_visitors
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        _, elapsed = timed(lambda: populate(db, rows, visitors))
+        print(f"inserted {rows} rows in {elapsed / 1000:.1f}s")
+        _, elapsed = timed(rebuild_sketches)
+        print(f"built hourly sketches in {elapsed / 1000:.1f}s")
+        _, elapsed = timed(lambda: run_rollups(now=NOW, lag=0))
+        print(f"rolled up days and months in {elapsed / 1000:.1f}s")
+        print(f"standard error: {STANDARD_ERROR * 100:.2f}%\n")
+
+        print(f"{'range':<10}{'exact':>10}{'ms':>10}{'estimate':>10}{'ms':>10}{'error':>9}")
+        for name, days in [('day', 1), ('week', 7), ('month', 30), ('year', 365)]:
+            start = NOW - timedelta(days=days)
+            exact, exact_ms = timed(lambda: db.session.query(
+                db.func.count(db.distinct(VisitorLog.ip_address))
+            ).filter(VisitorLog.timestamp >= start, VisitorLog.timestamp < NOW).scalar())
+            estimate, sketch_ms = timed(lambda: unique_visitors('site', start, NOW).get('', 0))
+            error = (estimate - exact) / exact * 100 if exact else 0.0
+            print(f"{name:<10}{exact:>10}{exact_ms:>10.1f}{estimate:>10}{sketch_ms:>10.1f}{error:>8.2f}%")
+
+        start = NOW - timedelta(days=30)
+        exact, exact_ms = timed(lambda: dict(db.session.query(
+            VisitorLog.path, db.func.count(db.distinct(VisitorLog.ip_address))
+        ).filter(VisitorLog.timestamp >= start, VisitorLog.timestamp < NOW).group_by(VisitorLog.path).all()))
+        estimates, sketch_ms = timed(lambda: unique_visitors('path', start, NOW))
+        errors = [abs(estimates.get(path, 0) - count) / count for path, count in exact.items() if count]
+        print(f"\nper page, last 30 days ({len(exact)} pages): exact {exact_ms:.1f} ms, "
+              f"sketches {sketch_ms:.1f} ms, mean error {sum(errors) / len(errors) * 100:.2f}%, "
+              f"max error {max(errors) * 100:.2f}%")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=2000000)
+    parser.add_argument('--visitors', type=int, default=300000)
+    parser.add_argument('--database', default=os.path.join(tempfile.gettempdir(), 'bench_unique_visitors.db'))
+    arguments = parser.parse_args()
+    # The app reads its database from the environment when it is imported
+    os.environ['DATABASE_URL'] = f'sqlite:///{arguments.database}'
+    run(arguments.rows, arguments.visitors)
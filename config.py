@@ -26,6 +26,62 @@ DEBUG = os.environ.get('FLASK_DEBUG', '0') == '1'
 # Database settings
 DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///instance/journal.db")
 
+# System settings cache: how often (in seconds) each worker checks the shared
+# settings version before reusing its cached copy. 0 checks on every request.
+SETTINGS_VERSION_CHECK_INTERVAL = float(os.environ.get("SETTINGS_VERSION_CHECK_INTERVAL", "1.0"))
+
+# Visitor tracking: 'async' writes visits from a background thread in batches,
+# 'sync' writes them inside the request (always used when TESTING is enabled)
+TRACKING_MODE = os.environ.get("TRACKING_MODE", "async").lower()
+TRACKING_QUEUE_SIZE = int(os.environ.get("TRACKING_QUEUE_SIZE", "10000"))
+TRACKING_BATCH_SIZE = int(os.environ.get("TRACKING_BATCH_SIZE", "500"))
+TRACKING_FLUSH_INTERVAL_MS = int(os.environ.get("TRACKING_FLUSH_INTERVAL_MS", "500"))
+# Repeat visits to the same path are tracked once per window (seconds). The
+# server-side dedup filter uses TRACKING_DEDUP_MEMORY_KB in each worker, or is
+# shared by all workers on the host when TRACKING_DEDUP_FILE names a file
+TRACKING_DEDUP_WINDOW = int(os.environ.get("TRACKING_DEDUP_WINDOW", "600"))
+TRACKING_DEDUP_MEMORY_KB = int(os.environ.get("TRACKING_DEDUP_MEMORY_KB", "256"))
+TRACKING_DEDUP_CAPACITY = int(os.environ.get("TRACKING_DEDUP_CAPACITY", "50000"))
+TRACKING_DEDUP_FILE = os.environ.get("TRACKING_DEDUP_FILE", "")
+# A visitor's views of the same article are counted once per window (seconds)
+ARTICLE_VIEW_DEDUP_WINDOW = int(os.environ.get("ARTICLE_VIEW_DEDUP_WINDOW", "600"))
+# Popular articles leaderboards: articles listed, and how often (seconds) each
+# worker reloads them to pick up views written by the other workers
+POPULAR_ARTICLES_SIZE = int(os.environ.get("POPULAR_ARTICLES_SIZE", "5"))
+POPULAR_ARTICLES_REFRESH_INTERVAL = int(os.environ.get("POPULAR_ARTICLES_REFRESH_INTERVAL", "300"))
+
+# Analytics rollups: how often the tracking writer rolls up completed hours
+# (seconds, 0 disables it) and how long after an hour ends it is rolled up
+ANALYTICS_ROLLUP_INTERVAL = int(os.environ.get("ANALYTICS_ROLLUP_INTERVAL", "300"))
+ANALYTICS_ROLLUP_LAG = int(os.environ.get("ANALYTICS_ROLLUP_LAG", "120"))
+
+# Admin dashboard counts are cached until users, submissions, reviews or issues
+# change; DASHBOARD_STATS_MAX_AGE (seconds, 0 = no limit) covers changes made outside the app
+DASHBOARD_STATS_MAX_AGE = int(os.environ.get("DASHBOARD_STATS_MAX_AGE", "300"))
+
+# Listing totals ("page 3 of 12") are counted at most once per this many
+# seconds per listing and filter in each worker
+PAGINATION_COUNT_TTL = int(os.environ.get("PAGINATION_COUNT_TTL", "60"))
+
+# Rendered public pages kept per worker for anonymous visitors (0 disables the
+# cache) and for how long (seconds), and how often (seconds) each worker checks
+# the shared page cache version for changes committed by other workers
+PAGE_CACHE_SIZE = int(os.environ.get("PAGE_CACHE_SIZE", "1000"))
+PAGE_CACHE_TTL = int(os.environ.get("PAGE_CACHE_TTL", "300"))
+PAGE_CACHE_VERSION_CHECK_INTERVAL = float(os.environ.get("PAGE_CACHE_VERSION_CHECK_INTERVAL", "1.0"))
+
+# Markdown renderings kept per worker by a digest of the source text (0
+# disables the cache); settings are rendered when they are saved instead
+RENDER_CACHE_SIZE = int(os.environ.get("RENDER_CACHE_SIZE", "256"))
+
+# Visitor log retention: raw visitor_logs/article_views rows are kept for
+# LOG_RETENTION_DAYS (0 keeps them forever) and stored by month; the rollups
+# are kept forever. Maintenance runs every LOG_MAINTENANCE_INTERVAL seconds
+# (0 disables it) and creates PostgreSQL partitions this many months ahead
+LOG_RETENTION_DAYS = int(os.environ.get("LOG_RETENTION_DAYS", "90"))
+LOG_PARTITION_MONTHS_AHEAD = int(os.environ.get("LOG_PARTITION_MONTHS_AHEAD", "2"))
+LOG_MAINTENANCE_INTERVAL = int(os.environ.get("LOG_MAINTENANCE_INTERVAL", "3600"))
+
 # Security settings
 SECRET_KEY = os.environ.get("SESSION_SECRET", "dev-key-for-journal-application")
 
@@ -71,6 +127,14 @@ PASSWORD_MIN_LENGTH = 8
 UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
 ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx', 'txt', 'rtf'}
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB max upload size
+# Uploads are streamed into the content-addressed store this many bytes at a time
+UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+# Hand downloads to the front-end server: "x-accel" (nginx), "x-sendfile" (Apache) or "" to send them from Flask
+DOWNLOAD_OFFLOAD = os.environ.get("DOWNLOAD_OFFLOAD", "").lower()
+# nginx internal location aliased to UPLOAD_FOLDER, used with X-Accel-Redirect
+DOWNLOAD_ACCEL_PREFIX = os.environ.get("DOWNLOAD_ACCEL_PREFIX", "/protected-uploads/")
+# Browser cache lifetime in seconds of uploads that never change under their name
+DOWNLOAD_IMMUTABLE_MAX_AGE = int(os.environ.get("DOWNLOAD_IMMUTABLE_MAX_AGE", str(365 * 24 * 3600)))
 
 # Demo mode configuration
 DEMO_MODE = os.environ.get("DEMO_MODE", "True").lower() == "true"
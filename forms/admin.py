@@ -5,7 +5,7 @@ This module defines the forms used for administrative functions.
 """
 
 from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, TextAreaField, SelectField, IntegerField, DateField
+from wtforms import StringField, PasswordField, TextAreaField, SelectField, IntegerField, DateField, SubmitField
 from wtforms.validators import DataRequired, Email, Length, Optional, ValidationError, NumberRange
 
 
@@ -96,4 +96,9 @@ class PluginSettingForm(FlaskForm):
     """Form for editing plugin settings."""
     setting_value = TextAreaField('Value', validators=[
         DataRequired()
-    ])
\ No newline at end of file
+    ])
+
+
+class LogMaintenanceForm(FlaskForm):
+    """Form for running visitor log maintenance on demand."""
+    submit = SubmitField('Run Maintenance Now')
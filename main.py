@@ -9,16 +9,14 @@ from app import app
 import os
 import config
 from flask import send_from_directory
+from services.downloads import serve_upload
 
 # Configure app to serve uploaded files
 @app.route('/uploads/<path:filename>')
 def serve_uploads(filename):
-    """Serve uploaded files."""
-    # If the path starts with 'branding', use the uploads directory directly
-    if filename.startswith('branding/'):
-        return send_from_directory('uploads', filename)
-    # Otherwise use the config.UPLOAD_FOLDER
-    return send_from_directory(config.UPLOAD_FOLDER, filename)
+    """Serve uploaded files to the users allowed to download them."""
+    # Branding images are public; manuscripts are checked against their submission
+    return serve_upload(filename)
 
 # Configure app to serve CSS files
 @app.route('/css/<path:filename>')
@@ -136,6 +136,21 @@ class Submission(db.Model):
     submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_submissions_status_submitted_at', 'status', 'submitted_at'),
+        db.Index('ix_submissions_status_updated_at', 'status', 'updated_at'),
+        db.Index('ix_submissions_author_submitted_at', 'author_id', 'submitted_at'),
+        db.Index('ix_submissions_view_count', 'view_count'),
+        db.Index('ix_submissions_file_path', 'file_path'),
+    )
+    
+    # Denormalized counters (maintained by services/submission_counters.py)
+    total_reviews = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    completed_reviews = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    pending_reviews = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    oldest_pending_due = db.Column(db.DateTime)
+    view_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    
     # Relationships
     reviews = db.relationship('Review', backref='submission', lazy='dynamic')
     decisions = db.relationship('EditorDecision', backref='submission', lazy='dynamic')
@@ -150,6 +165,13 @@ class Submission(db.Model):
         """Check if the submission has been published."""
         return self.publication is not None and self.publication.is_published()
     
+    def has_overdue_review(self):
+        """Check if the oldest pending review is past its due date."""
+        if self.pending_reviews and self.oldest_pending_due:
+            from config import now
+            return now() > self.oldest_pending_due
+        return False
+    
     def __repr__(self):
         return f'<Submission {self.id} "{self.title}" ({self.status})>'
 
@@ -160,7 +182,11 @@ class Review(db.Model):
     __tablename__ = 'reviews'
     
     id = db.Column(db.Integer, primary_key=True)
-    submission_id = db.Column(db.Integer, db.ForeignKey('submissions.id'), nullable=False)
+    # active_history loads the old value when a review is moved, so the review
+    # counters of the submission it left can be recomputed
+    submission_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey('submissions.id'), nullable=False), active_history=True
+    )
     reviewer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     editor_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     content = db.Column(db.Text)
@@ -170,6 +196,11 @@ class Review(db.Model):
     due_date = db.Column(db.DateTime, nullable=False)
     completed_at = db.Column(db.DateTime)
     
+    __table_args__ = (
+        db.Index('ix_reviews_reviewer_status_due_date', 'reviewer_id', 'status', 'due_date'),
+        db.Index('ix_reviews_submission_status', 'submission_id', 'status'),
+    )
+    
     def is_completed(self):
         """Check if the review is completed."""
         return self.completed_at is not None
@@ -197,6 +228,10 @@ class EditorDecision(db.Model):
     comments = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_editor_decisions_submission_id', 'submission_id'),
+    )
+    
     def __repr__(self):
         return f'<EditorDecision {self.id} for Submission {self.submission_id} ({self.decision})>'
 
@@ -212,6 +247,10 @@ class Revision(db.Model):
     cover_letter = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_revisions_file_path', 'file_path'),
+    )
+    
     def __repr__(self):
         return f'<Revision {self.id} for Submission {self.submission_id}>'
 
@@ -235,6 +274,7 @@ class Issue(db.Model):
     
     __table_args__ = (
         db.UniqueConstraint('volume', 'issue_number', name='uix_volume_issue'),
+        db.Index('ix_issues_status_publication_date', 'status', 'publication_date'),
     )
     
     def __repr__(self):
@@ -257,6 +297,8 @@ class Publication(db.Model):
     
     __table_args__ = (
         db.UniqueConstraint('submission_id', 'issue_id', name='uix_submission_issue'),
+        db.Index('ix_publications_status_published_at', 'status', 'published_at'),
+        db.Index('ix_publications_issue_status', 'issue_id', 'status'),
     )
     
     def is_published(self):
@@ -322,6 +364,9 @@ class SystemSetting(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     setting_key = db.Column(db.String(100), nullable=False, unique=True)
     setting_value = db.Column(db.Text, nullable=False)
+    # HTML renderings of the value, produced by set_value (services/rendered_content.py)
+    nl2br_html = db.Column(db.Text, nullable=True)
+    markdown_html = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -330,16 +375,15 @@ class SystemSetting(db.Model):
         
     @classmethod
     def get_value(cls, key, default=None):
-        """Get a system setting value by key."""
-        setting = cls.query.filter_by(setting_key=key).first()
-        if setting:
-            return setting.setting_value
-        return default
+        """Get a system setting value by key (from the settings cache when there is one)."""
+        from services import settings_repository
+        return settings_repository.get(key, default)
     
     @classmethod
     def set_value(cls, key, value):
         """Set a system setting value."""
         from flask import current_app
+        from services.rendered_content import render_variants
         
         setting = cls.query.filter_by(setting_key=key).first()
         if setting:
@@ -347,15 +391,228 @@ class SystemSetting(db.Model):
         else:
             setting = cls(setting_key=key, setting_value=value)
             db.session.add(setting)
+        # Render the HTML the pages show now, instead of on every request
+        setting.nl2br_html, setting.markdown_html = render_variants(key, value)
+        # Bump the shared version in the same transaction so every worker
+        # reloads its settings cache on its next version check
+        SettingsVersion.bump()
         db.session.commit()
         
-        # Invalidate the system settings cache by setting its time to None
-        if hasattr(current_app, '_system_settings_cache_time'):
-            current_app._system_settings_cache_time = None
-            print(f"Cache invalidated after setting {key} = {value}")
+        # Force this worker to re-check the version on the next request
+        settings_cache = current_app.extensions.get('settings_cache')
+        if settings_cache is not None:
+            settings_cache.invalidate()
         
         return value
 
+    @classmethod
+    def set_many(cls, values):
+        """
+        Set several system settings in one transaction.
+
+        Loads the stored values in one query, writes the changed ones with a
+        single INSERT ... ON CONFLICT DO UPDATE (SQLite and PostgreSQL; other
+        databases update or insert each row), and bumps the settings version
+        once for the whole batch.
+
+        Args:
+            values: Mapping of setting keys to values
+
+        Returns:
+            int: Number of settings that changed (0 writes nothing)
+        """
+        from flask import current_app
+        from services.rendered_content import render_variants
+
+        existing = dict(
+            db.session.query(cls.setting_key, cls.setting_value).filter(cls.setting_key.in_(list(values))).all()
+        )
+        changed = {key: value for key, value in values.items() if key not in existing or existing[key] != value}
+        if not changed:
+            return 0
+
+        now = datetime.utcnow()
+        rows = []
+        for key, value in changed.items():
+            nl2br_html, markdown_html = render_variants(key, value)
+            rows.append({'setting_key': key, 'setting_value': value, 'nl2br_html': nl2br_html,
+                         'markdown_html': markdown_html, 'created_at': now, 'updated_at': now})
+
+        table = cls.__table__
+        dialect_name = db.session.get_bind().dialect.name
+        if dialect_name in ('sqlite', 'postgresql'):
+            if dialect_name == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            statement = insert(table)
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.setting_key],
+                set_={name: statement.excluded[name]
+                      for name in ('setting_value', 'nl2br_html', 'markdown_html', 'updated_at')}
+            )
+            db.session.execute(statement, rows)
+        else:
+            for row in rows:
+                if row['setting_key'] in existing:
+                    db.session.execute(
+                        db.update(table).where(table.c.setting_key == row['setting_key'])
+                        .values({name: row[name] for name in row if name != 'created_at'})
+                    )
+                else:
+                    db.session.execute(table.insert(), [row])
+
+        # One version bump and one commit for the whole batch
+        SettingsVersion.bump()
+        db.session.commit()
+
+        settings_cache = current_app.extensions.get('settings_cache')
+        if settings_cache is not None:
+            settings_cache.invalidate()
+
+        return len(changed)
+
+
+class SettingsVersion(db.Model):
+    """Single-row counter bumped whenever a system setting changes."""
+    
+    __tablename__ = 'settings_version'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    ROW_ID = 1
+    
+    def __repr__(self):
+        return f'<SettingsVersion {self.version}>'
+    
+    @classmethod
+    def current(cls):
+        """Get the current settings version (0 if nothing has been recorded yet)."""
+        version = db.session.query(cls.version).filter(cls.id == cls.ROW_ID).scalar()
+        return version or 0
+    
+    @classmethod
+    def bump(cls):
+        """Atomically increment the settings version in the current transaction."""
+        result = db.session.execute(
+            db.update(cls)
+            .where(cls.id == cls.ROW_ID)
+            .values(version=cls.version + 1, updated_at=datetime.utcnow())
+        )
+        if result.rowcount == 0:
+            db.session.add(cls(id=cls.ROW_ID, version=1))
+    
+    @classmethod
+    def ensure_row(cls):
+        """Create the version row if it does not exist yet."""
+        if db.session.get(cls, cls.ROW_ID) is None:
+            try:
+                db.session.add(cls(id=cls.ROW_ID, version=0))
+                db.session.commit()
+            except Exception:
+                # Another worker created it first
+                db.session.rollback()
+
+
+class DashboardStatsVersion(db.Model):
+    """Single-row counter bumped whenever a change to the admin dashboard counts is committed."""
+    
+    __tablename__ = 'dashboard_stats_version'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    ROW_ID = 1
+    
+    def __repr__(self):
+        return f'<DashboardStatsVersion {self.version}>'
+    
+    @classmethod
+    def current(cls):
+        """Get the current version (0 if nothing has been recorded yet)."""
+        version = db.session.query(cls.version).filter(cls.id == cls.ROW_ID).scalar()
+        return version or 0
+    
+    @classmethod
+    def bump(cls, connection):
+        """
+        Atomically increment the version on a connection in the current transaction.
+        
+        Takes the session's connection rather than using the session, so that it
+        can be called from flush and execute events.
+        """
+        table = cls.__table__
+        result = connection.execute(
+            db.update(table)
+            .where(table.c.id == cls.ROW_ID)
+            .values(version=table.c.version + 1, updated_at=datetime.utcnow())
+        )
+        if result.rowcount == 0:
+            connection.execute(db.insert(table).values(id=cls.ROW_ID, version=1, updated_at=datetime.utcnow()))
+    
+    @classmethod
+    def ensure_row(cls):
+        """Create the version row if it does not exist yet."""
+        if db.session.get(cls, cls.ROW_ID) is None:
+            try:
+                db.session.add(cls(id=cls.ROW_ID, version=0))
+                db.session.commit()
+            except Exception:
+                # Another worker created it first
+                db.session.rollback()
+
+
+class PageCacheVersion(db.Model):
+    """Single-row counter bumped whenever a change to the cached public pages is committed."""
+    
+    __tablename__ = 'page_cache_version'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    ROW_ID = 1
+    
+    def __repr__(self):
+        return f'<PageCacheVersion {self.version}>'
+    
+    @classmethod
+    def current(cls):
+        """Get the current version (0 if nothing has been recorded yet)."""
+        version = db.session.query(cls.version).filter(cls.id == cls.ROW_ID).scalar()
+        return version or 0
+    
+    @classmethod
+    def bump(cls, connection):
+        """
+        Atomically increment the version on a connection in the current transaction.
+    
+        Takes the session's connection rather than using the session, so that it
+        can be called from flush and execute events.
+        """
+        table = cls.__table__
+        result = connection.execute(
+            db.update(table)
+            .where(table.c.id == cls.ROW_ID)
+            .values(version=table.c.version + 1, updated_at=datetime.utcnow())
+        )
+        if result.rowcount == 0:
+            connection.execute(db.insert(table).values(id=cls.ROW_ID, version=1, updated_at=datetime.utcnow()))
+    
+    @classmethod
+    def ensure_row(cls):
+        """Create the version row if it does not exist yet."""
+        if db.session.get(cls, cls.ROW_ID) is None:
+            try:
+                db.session.add(cls(id=cls.ROW_ID, version=0))
+                db.session.commit()
+            except Exception:
+                # Another worker created it first
+                db.session.rollback()
+
 
 class UserSetting(db.Model):
     """Model for user-specific settings."""
@@ -389,9 +646,9 @@ class VisitorLog(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)  # NULL for anonymous
     ip_address = db.Column(db.String(45), nullable=True)  # IPv6 can be long
     user_agent = db.Column(db.String(255), nullable=True)
-    path = db.Column(db.String(255), nullable=False)
+    path = db.Column(db.String(255), nullable=False, index=True)
     referer = db.Column(db.String(255), nullable=True)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     # Relationship to user (optional)
     user = db.relationship('User', backref=db.backref('visits', lazy='dynamic'))
@@ -409,7 +666,11 @@ class ArticleView(db.Model):
     submission_id = db.Column(db.Integer, db.ForeignKey('submissions.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)  # NULL for anonymous
     ip_address = db.Column(db.String(45), nullable=True)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    __table_args__ = (
+        db.Index('ix_article_views_submission_timestamp', 'submission_id', 'timestamp'),
+    )
     
     # Relationships
     submission = db.relationship('Submission', backref=db.backref('views', lazy='dynamic'))
@@ -419,6 +680,49 @@ class ArticleView(db.Model):
         return f'<ArticleView {self.id} Submission {self.submission_id}>'
 
 
+class ArticleViewDaily(db.Model):
+    """Per-article, per-day view counters kept next to the raw article_views log."""
+
+    __tablename__ = 'article_view_daily'
+    __table_args__ = (
+        db.UniqueConstraint('submission_id', 'day', name='uq_article_view_daily_submission_day'),
+        db.Index('ix_article_view_daily_day', 'day'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    submission_id = db.Column(db.Integer, db.ForeignKey('submissions.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    views = db.Column(db.Integer, nullable=False, default=0)
+    anonymous_views = db.Column(db.Integer, nullable=False, default=0)
+
+    # Relationships
+    submission = db.relationship('Submission', backref=db.backref('daily_views', lazy='dynamic'))
+
+    def __repr__(self):
+        return f'<ArticleViewDaily Submission {self.submission_id} {self.day}: {self.views}>'
+
+    @classmethod
+    def totals(cls, submission_ids=None, since=None):
+        """
+        Get view counts per article without scanning article_views.
+
+        Args:
+            submission_ids: Articles to count (all articles if None)
+            since: Only count days on or after this date
+
+        Returns:
+            dict: submission_id -> number of views
+        """
+        if submission_ids is not None and not submission_ids:
+            return {}
+        query = db.session.query(cls.submission_id, db.func.sum(cls.views))
+        if submission_ids is not None:
+            query = query.filter(cls.submission_id.in_(submission_ids))
+        if since is not None:
+            query = query.filter(cls.day >= since)
+        return {submission_id: int(views) for submission_id, views in query.group_by(cls.submission_id)}
+
+
 class UserActivity(db.Model):
     """Model for tracking user activity for admin analysis."""
     
@@ -430,6 +734,10 @@ class UserActivity(db.Model):
     details = db.Column(db.Text, nullable=True)  # JSON field for additional details
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_user_activities_type_timestamp', 'activity_type', 'timestamp'),
+    )
+    
     # Relationship to user
     user = db.relationship('User', backref=db.backref('activities', lazy='dynamic'))
     
@@ -450,4 +758,113 @@ class UserActivity(db.Model):
             self.details = json.dumps(details_dict)
     
     def __repr__(self):
-        return f'<UserActivity {self.id} User {self.user_id} {self.activity_type}>'
\ No newline at end of file
+        return f'<UserActivity {self.id} User {self.user_id} {self.activity_type}>'
+
+class VisitRollup(db.Model):
+    """Visits per path, aggregated by hour or day from visitor_logs."""
+    
+    __tablename__ = 'visit_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket', 'path', name='uq_visit_rollups_bucket_path'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(10), nullable=False)  # hour, day
+    bucket = db.Column(db.DateTime, nullable=False)
+    path = db.Column(db.String(255), nullable=False)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    anonymous = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<VisitRollup {self.granularity} {self.bucket} {self.path}: {self.total}>'
+
+
+class ArticleViewRollup(db.Model):
+    """Views per article, aggregated by hour or day from article_views."""
+    
+    __tablename__ = 'article_view_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket', 'submission_id', name='uq_article_view_rollups_bucket_submission'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(10), nullable=False)  # hour, day
+    bucket = db.Column(db.DateTime, nullable=False)
+    submission_id = db.Column(db.Integer, db.ForeignKey('submissions.id'), nullable=False)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    anonymous = db.Column(db.Integer, nullable=False, default=0)
+    last_viewed = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<ArticleViewRollup {self.granularity} {self.bucket} Submission {self.submission_id}: {self.total}>'
+
+
+class ActivityRollup(db.Model):
+    """User activities per type, aggregated by hour or day from user_activities."""
+    
+    __tablename__ = 'activity_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket', 'activity_type', name='uq_activity_rollups_bucket_type'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(10), nullable=False)  # hour, day
+    bucket = db.Column(db.DateTime, nullable=False)
+    activity_type = db.Column(db.String(50), nullable=False)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    anonymous = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<ActivityRollup {self.granularity} {self.bucket} {self.activity_type}: {self.total}>'
+
+
+class VisitorSketch(db.Model):
+    """HyperLogLog sketch of the distinct visitors of the site, a path or an article in one bucket."""
+    
+    __tablename__ = 'visitor_sketches'
+    __table_args__ = (
+        db.UniqueConstraint('dimension', 'key', 'granularity', 'bucket', name='uq_visitor_sketches_bucket_key'),
+        db.Index('ix_visitor_sketches_dimension_bucket', 'dimension', 'granularity', 'bucket'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    dimension = db.Column(db.String(10), nullable=False)  # site, path, article
+    key = db.Column(db.String(255), nullable=False, default='')  # path or submission id; '' for site
+    granularity = db.Column(db.String(10), nullable=False)  # hour, day, month
+    bucket = db.Column(db.DateTime, nullable=False)
+    sketch = db.Column(db.LargeBinary, nullable=False)
+    
+    def __repr__(self):
+        return f'<VisitorSketch {self.dimension} {self.key} {self.granularity} {self.bucket}>'
+
+
+class RollupWatermark(db.Model):
+    """How far (exclusive) each rollup granularity has been computed."""
+    
+    __tablename__ = 'rollup_watermarks'
+    
+    granularity = db.Column(db.String(10), primary_key=True)
+    rolled_until = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<RollupWatermark {self.granularity} {self.rolled_until}>'
+
+
+class StoredFile(db.Model):
+    """An uploaded file in the content-addressed upload store (services/upload_store.py)."""
+    
+    __tablename__ = 'stored_files'
+    __table_args__ = (
+        db.Index('ix_stored_files_sha256', 'sha256'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    path = db.Column(db.String(255), nullable=False, unique=True)  # Relative to UPLOAD_FOLDER
+    sha256 = db.Column(db.String(64), nullable=False)
+    size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=1)  # Submissions, revisions and copyedits using it
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<StoredFile {self.path} ({self.size} bytes, {self.ref_count} refs)>'
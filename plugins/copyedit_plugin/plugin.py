@@ -20,13 +20,13 @@ import os
 import re
 import logging
 import datetime
-from werkzeug.utils import secure_filename
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, send_from_directory
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from flask_login import login_required, current_user
 
 from plugin_system import PluginSystem
 from app import db
 from models import Submission, User
+from services.downloads import send_upload
 # Use absolute imports to avoid package issues
 from plugins.copyedit_plugin.models import CopyEdit, CopyEditComment
 
@@ -50,13 +50,6 @@ def allowed_file(filename):
     """Check if a file has an allowed extension."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def get_copy_edit_upload_folder():
-    """Get the upload folder for copy edited files."""
-    upload_folder = os.path.join(current_app.config['UPLOAD_FOLDER'], 'copyedits')
-    if not os.path.exists(upload_folder):
-        os.makedirs(upload_folder, exist_ok=True)
-    return upload_folder
-
 @copyedit_bp.route('/')
 @login_required
 def index():
@@ -105,6 +98,8 @@ def assign_copyeditor(submission_id):
             status='assigned',
             original_file_path=submission.file_path
         )
+        # The copyedit shares the manuscript's stored file
+        current_app.extensions['upload_store'].add_reference(submission.file_path)
         
         db.session.add(copyedit)
         db.session.commit()
@@ -168,11 +163,11 @@ def download_document(copyedit_id, file_type):
         flash(f'No {file_type} document available.', 'warning')
         return redirect(url_for('copyedit.view_copyedit', copyedit_id=copyedit_id))
     
-    # Extract just the filename from the path
-    filename = os.path.basename(file_path)
-    directory = os.path.dirname(file_path)
+    # Stored paths are relative to the upload folder (older edited files have absolute paths)
+    if os.path.isabs(file_path):
+        file_path = os.path.relpath(file_path, current_app.config['UPLOAD_FOLDER'])
     
-    return send_from_directory(directory, filename, as_attachment=True)
+    return send_upload(file_path, as_attachment=True)
 
 @copyedit_bp.route('/upload/<int:copyedit_id>', methods=['POST'])
 @login_required
@@ -199,21 +194,14 @@ def upload_document(copyedit_id):
     
     # Check if file is allowed
     if file and allowed_file(file.filename):
-        # Create secure filename and save path
-        filename = secure_filename(file.filename)
-        # Add timestamp to filename to prevent conflicts
-        timestamp = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
-        filename = f"{timestamp}_{filename}"
-        
-        # Ensure the copyedit upload folder exists
-        upload_folder = get_copy_edit_upload_folder()
-        
-        # Save the file
-        file_path = os.path.join(upload_folder, filename)
-        file.save(file_path)
+        # Save the file in the upload store (one copy per content, shared with
+        # the manuscripts); the previous edited version loses a reference
+        upload_store = current_app.extensions['upload_store']
+        stored = upload_store.save(file)
+        upload_store.release(copyedit.edited_file_path)
         
         # Update copy edit record
-        copyedit.edited_file_path = file_path
+        copyedit.edited_file_path = stored.path
         copyedit.status = 'in_progress'
         copyedit.updated_at = datetime.datetime.utcnow()
         db.session.commit()
@@ -14,17 +14,51 @@ from werkzeug.utils import secure_filename
 from flask import Blueprint, render_template, redirect, url_for, flash, request, g, current_app
 from flask_login import login_required, current_user
 
+import config
 from app import db
-from models import User, Submission, Review, Issue, Publication, PluginSetting, SystemSetting, VisitorLog, ArticleView, UserActivity
-from forms.admin import UserForm, IssueForm, PublicationForm, PluginSettingForm
+from models import User, Submission, Issue, Publication, PluginSetting, SystemSetting, VisitorLog, UserActivity
+from forms.admin import UserForm, IssueForm, PublicationForm, PluginSettingForm, LogMaintenanceForm
 from forms.doi import DOIHealthCheckForm
 from forms.branding import BrandingForm, ContentSettingsForm
 from forms.gdpr import ConsentSettingsForm, DataExportRequestForm, DataDeletionRequestForm
+from services import settings_repository
 from services.doi_service import DOIService
+from services.analytics_rollups import summarize, bucket_series, get_watermarks
+from services.hyperloglog import STANDARD_ERROR
+from services.issue_listing import issue_page
 
 # Create a blueprint for admin routes
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
+# Content settings edited on the content management page (setting keys match
+# the ContentSettingsForm fields) and the values shown when they are not set
+CONTENT_SETTING_DEFAULTS = {
+    'about_content': 'About our journal...',
+    'submission_guidelines': 'Guidelines for submission...',
+    'review_policy': 'Our review policy...',
+    'ethics_policy': 'Our ethics policy...',
+    'author_guidelines': 'Guidelines for authors...',
+    'contact_email': 'contact@example.com',
+    'contact_phone': None,
+    'contact_address': None,
+    'twitter_url': None,
+    'facebook_url': None,
+    'linkedin_url': None,
+    # Journal Information fields
+    'journal_established': '2023',
+    'journal_frequency': 'Quarterly',
+    'journal_open_access': 'Yes',
+    'journal_indexing': 'Google Scholar, CrossRef, DOAJ',
+    'journal_issn': '2023-XXXX',
+    # Editorial Board
+    'editorial_board': None,
+    # Support Hours
+    'support_hours_weekday': '9:00 AM - 6:00 PM (EST)',
+    'support_hours_saturday': '10:00 AM - 2:00 PM (EST)',
+    'support_hours_sunday': 'Closed',
+    'urgent_email': 'urgent@easyjournal.org',
+}
+
 
 # Admin access decorator
 def admin_required(func):
@@ -47,39 +81,27 @@ def admin_required(func):
 @admin_required
 def dashboard():
     """Render the admin dashboard."""
-    # Get counts for dashboard statistics
-    user_count = User.query.count()
-    submission_count = Submission.query.count()
-    review_count = Review.query.count()
-    issue_count = Issue.query.count()
-    
-    # Get user counts by role
-    admin_count = User.query.filter_by(role='admin').count()
-    editor_count = User.query.filter_by(role='editor').count()
-    reviewer_count = User.query.filter_by(role='reviewer').count()
-    author_count = User.query.filter_by(role='author').count()
-    
-    # Get submission counts by status
-    submitted_count = Submission.query.filter_by(status='submitted').count()
-    in_review_count = Submission.query.filter_by(status='in_review').count()
-    accepted_count = Submission.query.filter_by(status='accepted').count()
-    rejected_count = Submission.query.filter_by(status='rejected').count()
+    # Counts come from a snapshot that is only recomputed (two grouped queries)
+    # after users, submissions, reviews or issues change
+    stats = current_app.extensions['dashboard_stats'].get()
+    roles = stats['roles']
+    statuses = stats['statuses']
     
     return render_template(
         'admin/dashboard.html',
         title='Admin Dashboard',
-        user_count=user_count,
-        submission_count=submission_count,
-        review_count=review_count,
-        issue_count=issue_count,
-        admin_count=admin_count,
-        editor_count=editor_count,
-        reviewer_count=reviewer_count,
-        author_count=author_count,
-        submitted_count=submitted_count,
-        in_review_count=in_review_count,
-        accepted_count=accepted_count,
-        rejected_count=rejected_count
+        user_count=stats['users'],
+        submission_count=stats['submissions'],
+        review_count=stats['reviews'],
+        issue_count=stats['issues'],
+        admin_count=roles.get('admin', 0),
+        editor_count=roles.get('editor', 0),
+        reviewer_count=roles.get('reviewer', 0),
+        author_count=roles.get('author', 0),
+        submitted_count=statuses.get('submitted', 0),
+        in_review_count=statuses.get('in_review', 0),
+        accepted_count=statuses.get('accepted', 0),
+        rejected_count=statuses.get('rejected', 0)
     )
 
 
@@ -181,7 +203,8 @@ def delete_user(user_id):
 @admin_required
 def issues():
     """Render the issue management page."""
-    issues = Issue.query.order_by(Issue.volume.desc(), Issue.issue_number.desc()).all()
+    per_page = 50
+    issues = issue_page(request.args.get('after'), request.args.get('before'), per_page)
     return render_template('admin/issues.html', title='Issue Management', issues=issues)
 
 
@@ -430,6 +453,33 @@ def doi_health_check():
     )
 
 
+@admin_bp.route('/log-storage', methods=['GET', 'POST'])
+@admin_required
+def log_storage():
+    """Show visitor log table sizes and run partition maintenance."""
+    retention = current_app.extensions['log_retention']
+    form = LogMaintenanceForm()
+    
+    if form.validate_on_submit():
+        try:
+            report = retention.run()
+            flash(f"Maintenance completed: {report['moved']} rows moved, "
+                  f"{len(report['dropped'])} expired partitions dropped.", 'success')
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error running log maintenance: {str(e)}', 'danger')
+        return redirect(url_for('admin.log_storage'))
+    
+    return render_template(
+        'admin/log_storage.html',
+        title='Log Storage',
+        form=form,
+        tables=retention.table_sizes(),
+        retention_days=retention.retention_days,
+        watermarks=get_watermarks()
+    )
+
+
 @admin_bp.route('/branding', methods=['GET', 'POST'])
 @admin_required
 def branding_settings():
@@ -437,39 +487,52 @@ def branding_settings():
     # Initialize branding form with current settings
     branding_form = BrandingForm()
     
+    # Current settings, from the settings cache
+    settings = settings_repository.get_many({
+        'logo_url': None,
+        'banner_url': None,
+        'site_name': 'Academic Journal',
+        'site_description': 'A peer-reviewed academic journal',
+        'logo_text': None,
+        'banner_title': None,
+        'banner_subtitle': None,
+        'theme': 'dark',
+    })
+    
     # Get current logo and banner URLs if they exist
-    logo_url = SystemSetting.get_value('logo_url')
-    banner_url = SystemSetting.get_value('banner_url')
+    logo_url = settings['logo_url']
+    banner_url = settings['banner_url']
     print(f"Current banner_url from database: {banner_url}")
     
     # Fill form with existing values
     if request.method == 'GET':
         # Populate branding form
-        branding_form.site_name.data = SystemSetting.get_value('site_name', 'Academic Journal')
-        branding_form.site_description.data = SystemSetting.get_value('site_description', 'A peer-reviewed academic journal')
-        branding_form.use_logo_text.data = SystemSetting.get_value('use_logo_text') == 'true'
-        branding_form.logo_text.data = SystemSetting.get_value('logo_text')
-        branding_form.banner_title.data = SystemSetting.get_value('banner_title')
-        branding_form.banner_subtitle.data = SystemSetting.get_value('banner_subtitle')
+        branding_form.site_name.data = settings['site_name']
+        branding_form.site_description.data = settings['site_description']
+        branding_form.use_logo_text.data = settings_repository.get_bool('use_logo_text')
+        branding_form.logo_text.data = settings['logo_text']
+        branding_form.banner_title.data = settings['banner_title']
+        branding_form.banner_subtitle.data = settings['banner_subtitle']
         
         # Get current theme
-        current_theme = SystemSetting.get_value('theme', 'dark')
+        current_theme = settings['theme']
         if current_theme in [theme[0] for theme in branding_form.theme.choices]:
             branding_form.theme.data = current_theme
     
     # Process branding form submission
     if request.method == 'POST' and branding_form.validate_on_submit():
         try:
-            # Update text-based settings
-            SystemSetting.set_value('site_name', branding_form.site_name.data)
-            SystemSetting.set_value('site_description', branding_form.site_description.data)
-            SystemSetting.set_value('use_logo_text', 'true' if branding_form.use_logo_text.data else 'false')
-            SystemSetting.set_value('logo_text', branding_form.logo_text.data)
-            SystemSetting.set_value('banner_title', branding_form.banner_title.data)
-            SystemSetting.set_value('banner_subtitle', branding_form.banner_subtitle.data)
-            
-            # Update theme
-            SystemSetting.set_value('theme', branding_form.theme.data)
+            # Text-based settings, saved together with the uploaded image URLs below
+            updated_settings = {
+                'site_name': branding_form.site_name.data,
+                'site_description': branding_form.site_description.data,
+                'use_logo_text': 'true' if branding_form.use_logo_text.data else 'false',
+                'logo_text': branding_form.logo_text.data,
+                'banner_title': branding_form.banner_title.data,
+                'banner_subtitle': branding_form.banner_subtitle.data,
+                # Update theme
+                'theme': branding_form.theme.data,
+            }
             
             # Handle logo upload if provided
             logo_file = branding_form.custom_logo.data
@@ -499,7 +562,7 @@ def branding_settings():
                     print(f"Logo file saved to: {save_path}")
                     
                     # Update database with URL path (not file system path)
-                    SystemSetting.set_value('logo_url', url_path)
+                    updated_settings['logo_url'] = url_path
                     # Update logo_url for template rendering
                     logo_url = url_path
                     print(f"Logo URL set to: {url_path}")
@@ -535,7 +598,7 @@ def branding_settings():
                     print(f"Banner file saved to: {save_path}")
                     
                     # Update database with URL path (not file system path)
-                    SystemSetting.set_value('banner_url', url_path)
+                    updated_settings['banner_url'] = url_path
                     # Update banner_url for template rendering
                     banner_url = url_path
                     print(f"Banner URL set to: {url_path}")
@@ -543,6 +606,9 @@ def branding_settings():
                     print(f"Error saving banner file: {str(e)}")
                     flash(f"Error saving banner image: {str(e)}", "danger")
             
+            # One transaction and one settings version bump for the whole form
+            SystemSetting.set_many(updated_settings)
+            
             flash('Branding settings updated successfully.', 'success')
             return redirect(url_for('admin.branding_settings'))
             
@@ -567,64 +633,13 @@ def content_management():
     
     # Fill form with existing values
     if request.method == 'GET':
-        form.about_content.data = SystemSetting.get_value('about_content', 'About our journal...')
-        form.submission_guidelines.data = SystemSetting.get_value('submission_guidelines', 'Guidelines for submission...')
-        form.review_policy.data = SystemSetting.get_value('review_policy', 'Our review policy...')
-        form.ethics_policy.data = SystemSetting.get_value('ethics_policy', 'Our ethics policy...')
-        form.author_guidelines.data = SystemSetting.get_value('author_guidelines', 'Guidelines for authors...')
-        form.contact_email.data = SystemSetting.get_value('contact_email', 'contact@example.com')
-        form.contact_phone.data = SystemSetting.get_value('contact_phone')
-        form.contact_address.data = SystemSetting.get_value('contact_address')
-        form.twitter_url.data = SystemSetting.get_value('twitter_url')
-        form.facebook_url.data = SystemSetting.get_value('facebook_url')
-        form.linkedin_url.data = SystemSetting.get_value('linkedin_url')
-        
-        # Journal Information fields
-        form.journal_established.data = SystemSetting.get_value('journal_established', '2023')
-        form.journal_frequency.data = SystemSetting.get_value('journal_frequency', 'Quarterly')
-        form.journal_open_access.data = SystemSetting.get_value('journal_open_access', 'Yes')
-        form.journal_indexing.data = SystemSetting.get_value('journal_indexing', 'Google Scholar, CrossRef, DOAJ')
-        form.journal_issn.data = SystemSetting.get_value('journal_issn', '2023-XXXX')
-        
-        # Editorial Board
-        form.editorial_board.data = SystemSetting.get_value('editorial_board')
-        
-        # Support Hours
-        form.support_hours_weekday.data = SystemSetting.get_value('support_hours_weekday', '9:00 AM - 6:00 PM (EST)')
-        form.support_hours_saturday.data = SystemSetting.get_value('support_hours_saturday', '10:00 AM - 2:00 PM (EST)')
-        form.support_hours_sunday.data = SystemSetting.get_value('support_hours_sunday', 'Closed')
-        form.urgent_email.data = SystemSetting.get_value('urgent_email', 'urgent@easyjournal.org')
+        for key, value in settings_repository.get_many(CONTENT_SETTING_DEFAULTS).items():
+            getattr(form, key).data = value
     
     if form.validate_on_submit():
         try:
-            # Update content settings
-            SystemSetting.set_value('about_content', form.about_content.data)
-            SystemSetting.set_value('submission_guidelines', form.submission_guidelines.data)
-            SystemSetting.set_value('review_policy', form.review_policy.data)
-            SystemSetting.set_value('ethics_policy', form.ethics_policy.data)
-            SystemSetting.set_value('author_guidelines', form.author_guidelines.data)
-            SystemSetting.set_value('contact_email', form.contact_email.data)
-            SystemSetting.set_value('contact_phone', form.contact_phone.data)
-            SystemSetting.set_value('contact_address', form.contact_address.data)
-            SystemSetting.set_value('twitter_url', form.twitter_url.data)
-            SystemSetting.set_value('facebook_url', form.facebook_url.data)
-            SystemSetting.set_value('linkedin_url', form.linkedin_url.data)
-            
-            # Save Journal Information fields
-            SystemSetting.set_value('journal_established', form.journal_established.data)
-            SystemSetting.set_value('journal_frequency', form.journal_frequency.data)
-            SystemSetting.set_value('journal_open_access', form.journal_open_access.data)
-            SystemSetting.set_value('journal_indexing', form.journal_indexing.data)
-            SystemSetting.set_value('journal_issn', form.journal_issn.data)
-            
-            # Save Editorial Board
-            SystemSetting.set_value('editorial_board', form.editorial_board.data)
-            
-            # Save Support Hours
-            SystemSetting.set_value('support_hours_weekday', form.support_hours_weekday.data)
-            SystemSetting.set_value('support_hours_saturday', form.support_hours_saturday.data)
-            SystemSetting.set_value('support_hours_sunday', form.support_hours_sunday.data)
-            SystemSetting.set_value('urgent_email', form.urgent_email.data)
+            # Update content settings in one transaction
+            SystemSetting.set_many({key: getattr(form, key).data for key in CONTENT_SETTING_DEFAULTS})
             
             flash('Content settings updated successfully.', 'success')
             return redirect(url_for('admin.content_management'))
@@ -654,56 +669,25 @@ def gdpr_settings():
     # Initialize the consent settings form
     form = ConsentSettingsForm()
     
-    # Get current consent message
-    default_consent_text = """We value your privacy.
-EasyJournal collects and processes your personal data (name, email, affiliation) to manage your submissions, peer review process, and publish your articles. By continuing, you consent to our storage and use of your data as described in our Privacy Policy. You can withdraw consent or request data removal at any time."""
-    
-    default_privacy_policy = """# Privacy Policy
-
-## What data we collect
-EasyJournal collects and stores the following information:
-- Name, email address, and institutional affiliation
-- Submission content and metadata
-- Review comments and decisions
-- User activity for system functionality
-
-## How we use your data
-Your data is used exclusively for:
-- Managing the journal submission and review process
-- Publishing accepted articles
-- Providing personalized user experience
-- Improving our services
-
-## Your rights
-Under GDPR, you have the right to:
-- Access your personal data
-- Request correction of inaccurate data
-- Request deletion of your data
-- Object to processing of your data
-- Request restriction of processing
-- Data portability
-- Lodge complaints with supervisory authorities
-
-## Data retention
-We keep your data for as long as necessary to provide our services and comply with legal obligations.
-
-## Contact
-For any privacy-related inquiries, please contact the journal administration."""
-    
     # Fill form with existing values on GET
     if request.method == 'GET':
-        form.consent_text.data = SystemSetting.get_value('gdpr_consent_text', default_consent_text)
-        form.privacy_policy.data = SystemSetting.get_value('gdpr_privacy_policy', default_privacy_policy)
-        form.require_existing_users_consent.data = SystemSetting.get_value('gdpr_require_existing_consent', 'true') == 'true'
+        settings = settings_repository.get_many({
+            'gdpr_consent_text': config.DEFAULT_CONSENT_TEXT,
+            'gdpr_privacy_policy': config.DEFAULT_PRIVACY_POLICY,
+        })
+        form.consent_text.data = settings['gdpr_consent_text']
+        form.privacy_policy.data = settings['gdpr_privacy_policy']
+        form.require_existing_users_consent.data = settings_repository.get_bool('gdpr_require_existing_consent', True)
     
     # Handle form submission
     if form.validate_on_submit():
         try:
             # Save settings
-            SystemSetting.set_value('gdpr_consent_text', form.consent_text.data)
-            SystemSetting.set_value('gdpr_privacy_policy', form.privacy_policy.data)
-            SystemSetting.set_value('gdpr_require_existing_consent', 
-                                   'true' if form.require_existing_users_consent.data else 'false')
+            SystemSetting.set_many({
+                'gdpr_consent_text': form.consent_text.data,
+                'gdpr_privacy_policy': form.privacy_policy.data,
+                'gdpr_require_existing_consent': 'true' if form.require_existing_users_consent.data else 'false',
+            })
             
             flash('GDPR settings updated successfully.', 'success')
             return redirect(url_for('admin.gdpr_settings'))
@@ -876,6 +860,41 @@ def delete_user_data():
     return redirect(url_for('admin.gdpr_settings'))
 
 
+def chart_buckets(period, today):
+    """
+    Get the chart labels, range and bucket granularity for an analytics period.
+    
+    Args:
+        period: 'today', 'week', 'month', 'year' or 'all'
+        today: Midnight (UTC) of the current day
+        
+    Returns:
+        tuple: (labels, start, end, granularity)
+    """
+    if period == 'today':
+        # Hourly data for today
+        labels = [f'{hour}:00' for hour in range(24)]
+        return labels, today, today + timedelta(days=1), 'hour'
+    elif period == 'week':
+        # Daily data for the past week
+        labels = [(today - timedelta(days=i)).strftime('%a') for i in range(7, 0, -1)]
+        return labels, today - timedelta(days=7), today, 'day'
+    elif period == 'month':
+        # Weekly data for the past month (four 7-day windows from 30 days ago)
+        labels = [f'Week {i+1}' for i in range(4)]
+        start = today - timedelta(days=30)
+        return labels, start, start + timedelta(days=28), 'week'
+    elif period == 'year':
+        # Monthly data for the current year
+        labels = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+        return labels, datetime(today.year, 1, 1), datetime(today.year + 1, 1, 1), 'month'
+    else:  # 'all'
+        # Yearly data
+        current_year = today.year
+        labels = [str(year) for year in range(current_year - 4, current_year + 1)]
+        return labels, datetime(current_year - 4, 1, 1), datetime(current_year + 1, 1, 1), 'year'
+
+
 @admin_bp.route('/analytics/<period>')
 @admin_required
 def analytics(period='week'):
@@ -898,150 +917,65 @@ def analytics(period='week'):
     else:  # 'all'
         start_date = datetime(2000, 1, 1)  # Far in the past
     
-    # Get visitor statistics
-    visitor_query = VisitorLog.query
-    if period != 'all':
-        visitor_query = visitor_query.filter(VisitorLog.timestamp >= start_date)
+    # Read the rollups, kept up to date by the tracking writer, plus the few raw
+    # rows after the rollup watermark instead of aggregating the raw log tables
+    summary = summarize(start_date if period != 'all' else None)
     
-    total_visitors = visitor_query.count()
-    anonymous_visitors = visitor_query.filter(VisitorLog.user_id == None).count()
+    # Get visitor statistics
+    total_visitors = summary['visits']['total']
+    anonymous_visitors = summary['visits']['anonymous']
     logged_in_visitors = total_visitors - anonymous_visitors
-    unique_ips = visitor_query.with_entities(VisitorLog.ip_address).distinct().count()
+    unique_ips = summary['visits']['unique_ips']
     
     # Get article view statistics
-    article_query = ArticleView.query
-    if period != 'all':
-        article_query = article_query.filter(ArticleView.timestamp >= start_date)
-    
-    total_article_views = article_query.count()
-    anonymous_article_views = article_query.filter(ArticleView.user_id == None).count()
+    total_article_views = summary['article_views']['total']
+    anonymous_article_views = summary['article_views']['anonymous']
     logged_in_article_views = total_article_views - anonymous_article_views
     
-    # Most viewed article
-    most_viewed_submission = None
-    if total_article_views > 0:
-        most_viewed_id = db.session.query(
-            ArticleView.submission_id, 
-            func.count(ArticleView.id).label('view_count')
-        ).group_by(ArticleView.submission_id).order_by(desc('view_count')).first()
-        
-        if most_viewed_id:
-            most_viewed_submission = Submission.query.get(most_viewed_id[0])
-    
     # User activity statistics
-    activity_query = UserActivity.query
-    if period != 'all':
-        activity_query = activity_query.filter(UserActivity.timestamp >= start_date)
-    
-    total_activities = activity_query.count()
-    login_activities = activity_query.filter(UserActivity.activity_type == 'login').count()
-    submission_activities = activity_query.filter(UserActivity.activity_type == 'submission').count()
-    review_activities = activity_query.filter(UserActivity.activity_type == 'review').count()
-    
-    # Get popular pages
-    popular_pages = db.session.query(
-        VisitorLog.path, 
-        func.count(VisitorLog.id).label('count')
-    ).filter(
-        VisitorLog.timestamp >= start_date if period != 'all' else True
-    ).group_by(VisitorLog.path).order_by(desc('count')).limit(10).all()
+    activity_counts = summary['activities']
+    total_activities = sum(activity_counts.values())
+    login_activities = activity_counts.get('login', 0)
+    submission_activities = activity_counts.get('submission', 0)
+    review_activities = activity_counts.get('review', 0)
     
-    # Get popular articles with view counts
-    popular_articles_query = db.session.query(
-        Submission,
-        func.count(ArticleView.id).label('view_count'),
-        func.max(ArticleView.timestamp).label('last_viewed')
-    ).join(
-        ArticleView, ArticleView.submission_id == Submission.id
-    ).filter(
-        ArticleView.timestamp >= start_date if period != 'all' else True
-    ).group_by(Submission.id).order_by(desc('view_count')).limit(10)
+    # Get popular pages, with their estimated unique visitors
+    popular_pages = summary['popular_pages']
+    page_visitors = summary['page_visitors']
     
+    # Get popular articles with view counts
+    submissions = {
+        submission.id: submission
+        for submission in Submission.query.filter(
+            Submission.id.in_([submission_id for submission_id, _, _ in summary['popular_articles']])
+        )
+    }
     popular_articles = []
-    for article, view_count, last_viewed in popular_articles_query:
-        article.view_count = view_count
+    for submission_id, period_views, last_viewed in summary['popular_articles']:
+        article = submissions.get(submission_id)
+        if article is None:
+            continue
+        article.period_views = period_views
         article.last_viewed = last_viewed
+        article.unique_visitors = summary['article_visitors'].get(submission_id, 0)
         popular_articles.append(article)
     
+    # Most viewed article of all time, from the view counter kept on each submission
+    most_viewed_submission = None
+    if total_article_views > 0:
+        most_viewed_submission = Submission.query.filter(Submission.view_count > 0).order_by(
+            desc(Submission.view_count)).first()
+    
     # Get recent visitor logs
     recent_logs = VisitorLog.query.order_by(desc(VisitorLog.timestamp)).limit(50).all()
     
-    # Prepare chart data
-    if period == 'today':
-        # Hourly data for today
-        labels = [f'{hour}:00' for hour in range(24)]
-        date_format = '%H'
-        delta = timedelta(hours=1)
-        iterations = 24
-    elif period == 'week':
-        # Daily data for the past week
-        labels = [(today - timedelta(days=i)).strftime('%a') for i in range(7, 0, -1)]
-        date_format = '%a'
-        delta = timedelta(days=1)
-        iterations = 7
-    elif period == 'month':
-        # Weekly data for the past month
-        labels = [f'Week {i+1}' for i in range(4)]
-        date_format = '%W'
-        delta = timedelta(days=7)
-        iterations = 4
-    elif period == 'year':
-        # Monthly data for the past year
-        labels = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-        date_format = '%b'
-        delta = timedelta(days=30)
-        iterations = 12
-    else:  # 'all'
-        # Yearly data
-        current_year = today.year
-        labels = [str(year) for year in range(current_year - 4, current_year + 1)]
-        date_format = '%Y'
-        delta = timedelta(days=365)
-        iterations = 5
+    # Prepare chart data: the range and bucket size shown for each period
+    labels, chart_start, chart_end, granularity = chart_buckets(period, today)
     
-    # Initialize empty data arrays
-    visitor_data = [0] * len(labels)
-    article_data = [0] * len(labels)
-    
-    # This is a simplified approach; in a real app, you'd want more precise SQL aggregations
-    # For demonstration purposes, we'll just populate with some basic counts
-    if period == 'today':
-        # Group by hour
-        for i, hour in enumerate(range(24)):
-            start = today.replace(hour=hour, minute=0, second=0)
-            end = start + timedelta(hours=1)
-            visitor_data[i] = VisitorLog.query.filter(VisitorLog.timestamp >= start, VisitorLog.timestamp < end).count()
-            article_data[i] = ArticleView.query.filter(ArticleView.timestamp >= start, ArticleView.timestamp < end).count()
-    elif period == 'week':
-        # Group by day
-        for i in range(7):
-            day = today - timedelta(days=7-i)
-            next_day = day + timedelta(days=1)
-            visitor_data[i] = VisitorLog.query.filter(VisitorLog.timestamp >= day, VisitorLog.timestamp < next_day).count()
-            article_data[i] = ArticleView.query.filter(ArticleView.timestamp >= day, ArticleView.timestamp < next_day).count()
-    elif period == 'month':
-        # Group by week
-        for i in range(4):
-            week_start = today - timedelta(days=30-i*7)
-            week_end = week_start + timedelta(days=7)
-            visitor_data[i] = VisitorLog.query.filter(VisitorLog.timestamp >= week_start, VisitorLog.timestamp < week_end).count()
-            article_data[i] = ArticleView.query.filter(ArticleView.timestamp >= week_start, ArticleView.timestamp < week_end).count()
-    elif period == 'year':
-        # Group by month
-        for i in range(12):
-            month = today.replace(month=i+1 if i+1 <= 12 else 1, day=1)
-            next_month = month.replace(month=month.month+1 if month.month < 12 else 1, 
-                                      year=month.year if month.month < 12 else month.year+1)
-            visitor_data[i] = VisitorLog.query.filter(VisitorLog.timestamp >= month, VisitorLog.timestamp < next_month).count()
-            article_data[i] = ArticleView.query.filter(ArticleView.timestamp >= month, ArticleView.timestamp < next_month).count()
-    else:  # 'all'
-        # Group by year
-        current_year = today.year
-        for i, year in enumerate(range(current_year - 4, current_year + 1)):
-            year_start = datetime(year, 1, 1)
-            year_end = datetime(year+1, 1, 1)
-            visitor_data[i] = VisitorLog.query.filter(VisitorLog.timestamp >= year_start, VisitorLog.timestamp < year_end).count()
-            article_data[i] = ArticleView.query.filter(ArticleView.timestamp >= year_start, ArticleView.timestamp < year_end).count()
+    # Grouped rollups plus the raw tail, so rotated and expired log months still count;
+    # empty buckets are filled with zeros
+    visitor_data = bucket_series('visits', chart_start, chart_end, granularity)
+    article_data = bucket_series('article_views', chart_start, chart_end, granularity)
     
     # Prepare statistics dictionaries
     visitor_stats = {
@@ -1073,8 +1007,12 @@ def analytics(period='week'):
         article_stats=article_stats,
         activity_stats=activity_stats,
         popular_pages=popular_pages,
+        page_visitors=page_visitors,
+        unique_error=STANDARD_ERROR,
         popular_articles=popular_articles,
         recent_logs=recent_logs,
+        dedup_stats=current_app.extensions['visit_dedup'].stats(),
+        tracking_stats=current_app.extensions['tracking_buffer'].stats(),
         date_labels=json.dumps(labels),
         visitor_data=json.dumps(visitor_data),
         article_data=json.dumps(article_data)
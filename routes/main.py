@@ -9,17 +9,24 @@ import json
 
 from flask import Blueprint, render_template, request, current_app, flash, redirect, url_for, jsonify, Response
 from flask_login import login_required, current_user
-from sqlalchemy.exc import ProgrammingError, SQLAlchemyError
+from sqlalchemy.exc import ProgrammingError
 from werkzeug.security import check_password_hash, generate_password_hash
 
+import config
 from app import db
-from models import Submission, Issue, Publication, User, ArticleView, Review, Revision
+from models import Submission, Issue, Publication, User, Review, Revision
+from services import settings_repository
+from services.conditional import conditional, article_validators, issue_validators
+from services.page_cache import cached_page
+from services.pagination import keyset_page, link_args
+from services.visit_dedup import visitor_key
 
 # Create a blueprint for main routes
 main_bp = Blueprint('main', __name__)
 
 
 @main_bp.route('/')
+@cached_page()
 def index():
     """Render the home page."""
     # Get the featured articles (only published submissions)
@@ -49,11 +56,19 @@ def index():
         current_app.logger.error(f"Error loading latest issues: {str(e)}")
         latest_issues = []
     
+    # Get the most viewed articles of the week
+    try:
+        popular_articles = current_app.extensions['popular_articles'].articles('week')['week']
+    except Exception as e:
+        current_app.logger.error(f"Error loading popular articles: {str(e)}")
+        popular_articles = []
+    
     try:
         return render_template(
             'main/index.html',
             featured_articles=featured_articles,
-            latest_issues=latest_issues
+            latest_issues=latest_issues,
+            popular_articles=popular_articles
         )
     except Exception as e:
         current_app.logger.error(f"Error rendering index template: {str(e)}")
@@ -62,26 +77,23 @@ def index():
 
 
 @main_bp.route('/about')
+@cached_page()
 def about():
     """Render the about page."""
-    # Get content from system settings
-    from models import SystemSetting
+    # Basic page content, rendered to HTML when it was saved
+    settings_cache = current_app.extensions['settings_cache']
+    about_content = settings_cache.nl2br('about_content')
+    submission_guidelines = settings_cache.nl2br('submission_guidelines')
+    review_policy = settings_cache.nl2br('review_policy')
+    ethics_policy = settings_cache.nl2br('ethics_policy')
     
-    # Basic page content
-    about_content = SystemSetting.get_value('about_content')
-    submission_guidelines = SystemSetting.get_value('submission_guidelines')
-    review_policy = SystemSetting.get_value('review_policy')
-    ethics_policy = SystemSetting.get_value('ethics_policy')
-    
-    # Journal information
-    journal_established = SystemSetting.get_value('journal_established')
-    journal_frequency = SystemSetting.get_value('journal_frequency')
-    journal_open_access = SystemSetting.get_value('journal_open_access')
-    journal_indexing = SystemSetting.get_value('journal_indexing')
-    journal_issn = SystemSetting.get_value('journal_issn')
+    # Journal information, from the settings cache
+    journal_information = settings_repository.get_many([
+        'journal_established', 'journal_frequency', 'journal_open_access', 'journal_indexing', 'journal_issn'
+    ])
     
     # Editorial board
-    editorial_board = SystemSetting.get_value('editorial_board')
+    editorial_board = settings_cache.nl2br('editorial_board')
     
     return render_template(
         'main/about.html',
@@ -89,86 +101,46 @@ def about():
         submission_guidelines=submission_guidelines,
         review_policy=review_policy,
         ethics_policy=ethics_policy,
-        journal_established=journal_established,
-        journal_frequency=journal_frequency,
-        journal_open_access=journal_open_access,
-        journal_indexing=journal_indexing,
-        journal_issn=journal_issn,
-        editorial_board=editorial_board
+        editorial_board=editorial_board,
+        **journal_information
     )
 
 
 @main_bp.route('/contact')
+@cached_page()
 def contact():
     """Render the contact page."""
-    # Get content from system settings
-    from models import SystemSetting
-    
-    # Retrieve contact information from settings
-    contact_email = SystemSetting.get_value('contact_email')
-    contact_phone = SystemSetting.get_value('contact_phone')
-    contact_address = SystemSetting.get_value('contact_address')
+    # Retrieve contact information from settings, rendered to HTML when it was saved
+    settings_cache = current_app.extensions['settings_cache']
+    contact_email = settings_cache.nl2br('contact_email')
+    contact_phone = settings_cache.nl2br('contact_phone')
+    contact_address = settings_cache.nl2br('contact_address')
     
-    # Social media links
-    twitter_url = SystemSetting.get_value('twitter_url')
-    facebook_url = SystemSetting.get_value('facebook_url')
-    linkedin_url = SystemSetting.get_value('linkedin_url')
+    # Social media links, from the settings cache
+    social_links = settings_repository.get_many(['twitter_url', 'facebook_url', 'linkedin_url'])
     
     return render_template(
         'main/contact.html',
         contact_email=contact_email,
         contact_phone=contact_phone,
         contact_address=contact_address,
-        twitter_url=twitter_url,
-        facebook_url=facebook_url,
-        linkedin_url=linkedin_url
+        **social_links
     )
 
 
 @main_bp.route('/privacy')
 def privacy_policy():
     """Render the privacy policy page."""
-    # Get the privacy policy from system settings
-    from models import SystemSetting
-    
-    default_privacy_policy = """# Privacy Policy
-
-## What data we collect
-EasyJournal collects and stores the following information:
-- Name, email address, and institutional affiliation
-- Submission content and metadata
-- Review comments and decisions
-- User activity for system functionality
-
-## How we use your data
-Your data is used exclusively for:
-- Managing the journal submission and review process
-- Publishing accepted articles
-- Providing personalized user experience
-- Improving our services
-
-## Your rights
-Under GDPR, you have the right to:
-- Access your personal data
-- Request correction of inaccurate data
-- Request deletion of your data
-- Object to processing of your data
-- Request restriction of processing
-- Data portability
-- Lodge complaints with supervisory authorities
-
-## Data retention
-We keep your data for as long as necessary to provide our services and comply with legal obligations.
-
-## Contact
-For any privacy-related inquiries, please contact the journal administration."""
-    
-    privacy_policy = SystemSetting.get_value('gdpr_privacy_policy', default_privacy_policy)
+    # The privacy policy from system settings, rendered to HTML when it was saved
+    privacy_policy = current_app.extensions['settings_cache'].markdown('gdpr_privacy_policy')
+    if privacy_policy is None:
+        privacy_policy = current_app.extensions['render_cache'].markdown(config.DEFAULT_PRIVACY_POLICY)
     
     return render_template('main/privacy_policy.html', privacy_policy=privacy_policy)
 
 
 @main_bp.route('/browse')
+@cached_page()
 def browse():
     """Render the list of published articles."""
     page = request.args.get('page', 1, type=int)
@@ -184,7 +156,11 @@ def browse():
             query = query.filter(Submission.category == category)
         
         search = request.args.get('search')
-        if search:
+        matches = current_app.extensions['search_index'].matches(search) if search else None
+        if matches is not None:
+            query = query.join(matches, matches.c.submission_id == Submission.id)
+        elif search:
+            # No full-text index (or no words to look up): match substrings
             search_term = f"%{search}%"
             query = query.filter(
                 (Submission.title.ilike(search_term)) | 
@@ -193,57 +169,76 @@ def browse():
                 (Submission.abstract.ilike(search_term))
             )
         
-        # Apply sorting
-        sort = request.args.get('sort', 'date_desc')
-        if sort == 'date_desc':
-            query = query.order_by(Publication.published_at.desc())
+        # Apply sorting (searches default to the best matches first); the
+        # article ID breaks ties so that every article has its own position
+        sort = request.args.get('sort') or ('relevance' if matches is not None else 'date_desc')
+        if sort == 'relevance' and matches is not None:
+            order_by = [matches.c.rank, Publication.published_at.desc(), Submission.id.desc()]
         elif sort == 'date_asc':
-            query = query.order_by(Publication.published_at.asc())
+            order_by = [Publication.published_at.asc(), Submission.id.asc()]
         elif sort == 'title_asc':
-            query = query.order_by(Submission.title.asc())
+            order_by = [Submission.title.asc(), Submission.id.asc()]
         elif sort == 'title_desc':
-            query = query.order_by(Submission.title.desc())
+            order_by = [Submission.title.desc(), Submission.id.desc()]
+        else:
+            order_by = [Publication.published_at.desc(), Submission.id.desc()]
         
-        # Get paginated results
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        # Get a page of results starting at the cursor (or legacy page number)
+        pagination = keyset_page(
+            query, order_by,
+            after=request.args.get('after'),
+            before=request.args.get('before'),
+            page=page,
+            per_page=per_page,
+            count='cached'
+        )
         articles = pagination.items
+        
+        # Highlighted abstract snippets for the articles on this page
+        snippets = {}
+        if matches is not None:
+            snippets = current_app.extensions['search_index'].snippets(search, [article.id for article in articles])
     except (ProgrammingError, Exception):
         # If there's an error (e.g., table doesn't exist yet), return empty results
         articles = []
         pagination = None
+        snippets = {}
     
-    # Get popular articles based on view count
+    # Most viewed articles from the in-memory leaderboards
     try:
-        popular_articles = (
-            Submission.query
-            .join(Publication)
-            .filter(Publication.status == 'published')
-            .join(ArticleView, Submission.id == ArticleView.submission_id)
-            .group_by(Submission.id)
-            .order_by(db.func.count(ArticleView.id).desc())
-            .limit(5)
-            .all()
-        )
+        popular_articles = current_app.extensions['popular_articles'].articles()
     except (ProgrammingError, Exception):
-        popular_articles = []
+        popular_articles = {}
     
     return render_template(
         'main/browse.html',
         articles=articles,
         pagination=pagination,
+        page_args=link_args(request.args),
+        snippets=snippets,
         popular_articles=popular_articles
     )
 
 
 @main_bp.route('/issues')
+@cached_page()
 def issues():
     """Render the list of published issues."""
     page = request.args.get('page', 1, type=int)
     per_page = 10
     
     try:
-        query = Issue.query.filter_by(status='published').order_by(Issue.publication_date.desc())
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        # Forthcoming issues (no publication date yet) are placed by creation date
+        query = Issue.query.filter_by(status='published')
+        published_on = db.func.coalesce(Issue.publication_date, Issue.created_at)
+        pagination = keyset_page(
+            query, [published_on.desc(), Issue.id.desc()],
+            after=request.args.get('after'),
+            before=request.args.get('before'),
+            page=page,
+            per_page=per_page,
+            count='cached'
+        )
         issues_list = pagination.items
     except (ProgrammingError, Exception):
         issues_list = []
@@ -252,11 +247,14 @@ def issues():
     return render_template(
         'main/issues.html',
         issues=issues_list,
-        pagination=pagination
+        pagination=pagination,
+        page_args=link_args(request.args)
     )
 
 
 @main_bp.route('/issues/<int:issue_id>')
+@cached_page()
+@conditional(issue_validators)
 def issue_detail(issue_id):
     """Render a specific issue with its articles."""
     try:
@@ -280,7 +278,24 @@ def issue_detail(issue_id):
     )
 
 
+def record_article_view(submission_id):
+    """Count an article view for analytics, also when the page comes from the page cache."""
+    # Deduplicated per visitor and article, written off the request path with the daily counter
+    try:
+        current_app.extensions['article_views'].record(
+            submission_id,
+            visitor=visitor_key(current_user, request),
+            user_id=current_user.id if current_user.is_authenticated else None,
+            ip_address=request.remote_addr
+        )
+    except Exception as e:
+        current_app.logger.error(f"Error recording article view: {str(e)}")
+        # Continue serving the page even if we couldn't record the view
+
+
 @main_bp.route('/articles/<int:submission_id>')
+@cached_page(on_hit=record_article_view)
+@conditional(article_validators, on_not_modified=record_article_view)
 def article_detail(submission_id):
     """Render a specific article."""
     try:
@@ -302,19 +317,8 @@ def article_detail(submission_id):
         if not has_permission:
             return render_template('errors/403.html'), 403
             
-        # Track this article view for analytics
-        try:
-            article_view = ArticleView(
-                submission_id=submission_id,
-                user_id=current_user.id if current_user.is_authenticated else None,
-                ip_address=request.remote_addr
-            )
-            db.session.add(article_view)
-            db.session.commit()
-        except SQLAlchemyError as e:
-            db.session.rollback()
-            current_app.logger.error(f"Error recording article view: {str(e)}")
-            # Continue serving the page even if we couldn't record the view
+        # Count this article view for analytics
+        record_article_view(submission_id)
             
     except (ProgrammingError, Exception):
         return render_template('errors/404.html'), 404
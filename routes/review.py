@@ -14,6 +14,7 @@ from models import Submission, Review, EditorDecision, User, Publication, Issue
 from forms.review import ReviewForm, AssignReviewerForm, EditorDecisionForm
 from forms.admin import IssueForm
 from plugin_system import PluginSystem
+from services.prefetch import prefetch_submissions, prefetch_publications, prefetch_reviews
 
 # Create a blueprint for review routes
 review_bp = Blueprint('review', __name__, url_prefix='/review')
@@ -35,6 +36,10 @@ def editor_dashboard():
     recently_revised = Submission.query.filter_by(status='revision_submitted').order_by(Submission.updated_at).all()
     accepted_submissions = Submission.query.filter_by(status='accepted').order_by(Submission.updated_at.desc()).limit(5).all()
     
+    # Load authors for every list at once instead of per row
+    prefetch_submissions(new_submissions + in_review_submissions + ready_for_decision
+                         + recently_revised + accepted_submissions)
+    
     # Count published articles
     total_published = db.session.query(Publication).filter_by(status='published').count()
     
@@ -62,6 +67,7 @@ def reviewer_dashboard():
     # Get review assignments for this reviewer
     pending_reviews = Review.query.filter_by(reviewer_id=current_user.id, status='assigned').order_by(Review.due_date).all()
     completed_reviews = Review.query.filter_by(reviewer_id=current_user.id, status='completed').order_by(Review.completed_at.desc()).all()
+    prefetch_reviews(pending_reviews + completed_reviews)
     
     return render_template(
         'review/reviewer_dashboard.html',
@@ -360,6 +366,10 @@ def publishing_dashboard():
     available_issues = Issue.query.filter(Issue.status != 'archived')\
         .order_by(Issue.volume.desc(), Issue.issue_number.desc()).all()
     
+    # Load submissions, authors and issues for every list at once instead of per row
+    prefetch_submissions(accepted_submissions)
+    prefetch_publications(scheduled_publications + published_submissions + unpublished_submissions)
+    
     return render_template(
         'review/publishing_dashboard.html',
         title='Publishing Dashboard',
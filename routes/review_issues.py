@@ -12,6 +12,7 @@ from flask_login import login_required, current_user
 from app import db
 from models import Issue, Publication
 from forms.admin import IssueForm
+from services.issue_listing import issue_page, issue_summary
 
 # Create a blueprint for issue management routes
 issue_bp = Blueprint('issues', __name__, url_prefix='/editor/issues')
@@ -26,8 +27,9 @@ def editor_issues():
         flash('You do not have permission to access issue management.', 'danger')
         return redirect(url_for('main.dashboard'))
     
-    # Get all issues
-    issues = Issue.query.order_by(Issue.volume.desc(), Issue.issue_number.desc()).all()
+    # Get a page of issues with their publication counts
+    per_page = 50
+    issues = issue_page(request.args.get('after'), request.args.get('before'), per_page)
     
     return render_template(
         'review/editor_issues.html',
@@ -111,7 +113,8 @@ def edit_issue(issue_id):
             flash('Issue updated successfully.', 'success')
             return redirect(url_for('issues.editor_issues'))
     
-    return render_template('review/issue_form.html', title='Edit Issue', form=form, issue=issue)
+    return render_template('review/issue_form.html', title='Edit Issue', form=form, issue=issue,
+                           summary=issue_summary(issue_id))
 
 
 @issue_bp.route('/delete/<int:issue_id>', methods=['POST'])
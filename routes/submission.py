@@ -4,9 +4,7 @@ Submission routes for the Academic Journal Submission System.
 This module handles article submissions and management.
 """
 
-import os
 from datetime import datetime
-from werkzeug.utils import secure_filename
 
 from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
 from flask_login import login_required, current_user
@@ -15,6 +13,7 @@ import config
 from app import db
 from models import Submission, Revision, EditorDecision, ROLE_AUTHOR
 from forms.submission import SubmissionForm, RevisionForm
+from services.pagination import keyset_page, link_args
 
 # Create a blueprint for submission routes
 submission_bp = Blueprint('submission', __name__, url_prefix='/submissions')
@@ -40,11 +39,8 @@ def new_submission():
         # Save uploaded file
         file = form.file.data
         if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-            unique_filename = f"{timestamp}_{current_user.id}_{filename}"
-            file_path = os.path.join(config.UPLOAD_FOLDER, unique_filename)
-            file.save(file_path)
+            # Streamed into the upload store, which keeps one copy per content
+            stored = current_app.extensions['upload_store'].save(file)
             
             # Create new submission
             submission = Submission(
@@ -53,7 +49,7 @@ def new_submission():
                 abstract=form.abstract.data,
                 keywords=form.keywords.data,
                 category=form.category.data,
-                file_path=unique_filename,
+                file_path=stored.path,
                 cover_letter=form.cover_letter.data,
                 author_id=current_user.id
             )
@@ -93,24 +89,32 @@ def author_dashboard():
     if category:
         query = query.filter(Submission.category == category)
     
-    # Apply sorting
+    # Apply sorting (the submission ID breaks ties between equal keys)
     sort = request.args.get('sort', 'submitted_desc')
-    if sort == 'submitted_desc':
-        query = query.order_by(Submission.submitted_at.desc())
-    elif sort == 'submitted_asc':
-        query = query.order_by(Submission.submitted_at.asc())
+    if sort == 'submitted_asc':
+        order_by = [Submission.submitted_at.asc(), Submission.id.asc()]
     elif sort == 'title_asc':
-        query = query.order_by(Submission.title.asc())
+        order_by = [Submission.title.asc(), Submission.id.asc()]
     elif sort == 'title_desc':
-        query = query.order_by(Submission.title.desc())
-    
-    # Get paginated results
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        order_by = [Submission.title.desc(), Submission.id.desc()]
+    else:
+        order_by = [Submission.submitted_at.desc(), Submission.id.desc()]
+    
+    # Get a page of results starting at the cursor (or legacy page number)
+    pagination = keyset_page(
+        query, order_by,
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+        page=page,
+        per_page=per_page
+    )
     submissions = pagination.items
     
     return render_template('submission/dashboard.html', 
                           title='My Submissions', 
                           submissions=submissions,
+                          pagination=pagination,
+                          page_args=link_args(request.args),
                           Revision=Revision)
 
 
@@ -168,18 +172,13 @@ def revise_submission(submission_id):
         # Save uploaded file
         file = form.file.data
         if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-            
-            # Add the revision round to the filename
-            unique_filename = f"{timestamp}_{current_user.id}_r{current_round}_{filename}"
-            file_path = os.path.join(config.UPLOAD_FOLDER, unique_filename)
-            file.save(file_path)
+            # Streamed into the upload store, which keeps one copy per content
+            stored = current_app.extensions['upload_store'].save(file)
             
             # Create new revision
             revision = Revision(
                 submission_id=submission_id,
-                file_path=unique_filename,
+                file_path=stored.path,
                 cover_letter=form.cover_letter.data,
                 round=current_round,
                 decision_id=latest_decision.id if latest_decision else None
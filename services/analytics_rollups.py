@@ -0,0 +1,352 @@
+"""
+Analytics rollups for the Academic Journal Submission System.
+
+The admin analytics page used to aggregate the raw visitor_logs,
+article_views and user_activities tables on every load. Those tables grow
+with every page view. This module keeps pre-aggregated rollups instead:
+
+- Hourly and daily rollups of visits per path, views per article and
+  activities per type. Unique visitors come from HyperLogLog sketches
+  (services/visitor_sketches.py), whose daily and monthly sketches are
+  merged here as days complete.
+- A rollup job that only processes whole hours older than
+  ANALYTICS_ROLLUP_LAG, so late writes from the tracking buffer are not
+  missed. It advances a watermark per granularity, and daily rollups are
+  built from the hourly ones once a day is complete.
+- summarize(), which answers a period query from daily rollups, then
+  hourly rollups, then only the raw rows newer than the hourly watermark.
+  For every bucket behind the watermark the totals equal the raw-table
+  computation exactly; unique visitors are estimates. bucket_series() does
+  the same for chart buckets, so neither depends on raw rows that log
+  retention has moved or dropped.
+
+The job runs periodically on the tracking writer thread; the analytics page
+only reads, taking whatever the job has not reached yet from the raw tail.
+Watermarks are advanced with a
+compare-and-set, so concurrent workers never roll up the same hours twice.
+"""
+
+import logging
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from app import db
+from services.time_buckets import truncate, floor, is_aligned, bucket_starts, fill_buckets
+from services.visitor_sketches import roll_up_sketches, unique_visitors
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# A raw table and the rollup table aggregating it by one dimension
+Fact = namedtuple('Fact', ['name', 'raw', 'raw_dimension', 'has_user', 'rollup', 'dimension', 'has_last'])
+
+
+def _facts() -> List[Fact]:
+    from models import (
+        VisitorLog, ArticleView, UserActivity, VisitRollup, ArticleViewRollup, ActivityRollup
+    )
+    return [
+        Fact('visits', VisitorLog, VisitorLog.path, True, VisitRollup, 'path', False),
+        Fact('article_views', ArticleView, ArticleView.submission_id, True, ArticleViewRollup,
+             'submission_id', True),
+        Fact('activities', UserActivity, UserActivity.activity_type, False, ActivityRollup,
+             'activity_type', False),
+    ]
+
+
+def _dialect_name() -> str:
+    return db.session.get_bind().dialect.name
+
+
+def get_watermarks() -> Dict[str, Optional[datetime]]:
+    """Get the exclusive end of the rolled-up range for 'hour' and 'day' (None if never run)."""
+    from models import RollupWatermark
+    marks = dict(db.session.query(RollupWatermark.granularity, RollupWatermark.rolled_until))
+    return {'hour': marks.get('hour'), 'day': marks.get('day')}
+
+
+def run_rollups(now: Optional[datetime] = None, lag: float = 120) -> Dict[str, int]:
+    """
+    Roll up every complete hour (and day) not yet covered by the watermarks.
+
+    Args:
+        now: Current UTC time (defaults to datetime.utcnow())
+        lag: Seconds an hour must have been over before it is rolled up
+
+    Returns:
+        dict: Number of hours and days rolled up by this call
+    """
+    now = now or datetime.utcnow()
+    target = floor(now - timedelta(seconds=lag), 'hour')
+    rolled = {'hours': 0, 'days': 0}
+
+    try:
+        marks = get_watermarks()
+        if marks['hour'] is None:
+            marks = _initialize_watermarks(target)
+            if marks is None:
+                return rolled
+
+        hour_mark = marks['hour']
+        if hour_mark < target and _advance('hour', hour_mark, target):
+            _roll_up_hours(hour_mark, target)
+            db.session.commit()
+            rolled['hours'] = int((target - hour_mark).total_seconds() // 3600)
+            hour_mark = target
+
+        day_mark = marks['day']
+        day_target = floor(hour_mark, 'day')
+        if day_mark < day_target and _advance('day', day_mark, day_target):
+            _roll_up_days(day_mark, day_target)
+            db.session.commit()
+            rolled['days'] = (day_target - day_mark).days
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Analytics rollup failed: {str(e)}")
+        return rolled
+
+    if rolled['hours'] or rolled['days']:
+        logger.info(f"Rolled up {rolled['hours']} hours and {rolled['days']} days of analytics")
+    return rolled
+
+
+def _initialize_watermarks(target: datetime) -> Optional[Dict[str, datetime]]:
+    """Start both watermarks at the day of the oldest raw row (or at target if there is none)."""
+    from models import RollupWatermark
+
+    earliest = [
+        db.session.query(db.func.min(fact.raw.timestamp)).scalar() for fact in _facts()
+    ]
+    earliest = [value for value in earliest if value is not None]
+    start = floor(min(earliest), 'day') if earliest else floor(target, 'day')
+    try:
+        db.session.add(RollupWatermark(granularity='hour', rolled_until=start))
+        db.session.add(RollupWatermark(granularity='day', rolled_until=start))
+        db.session.commit()
+    except Exception:
+        # Another worker initialized them first
+        db.session.rollback()
+        return None
+    return {'hour': start, 'day': start}
+
+
+def _advance(granularity: str, old: datetime, new: datetime) -> bool:
+    """Move a watermark from old to new in the current transaction, unless another worker did."""
+    from models import RollupWatermark
+
+    result = db.session.execute(
+        db.update(RollupWatermark)
+        .where(RollupWatermark.granularity == granularity, RollupWatermark.rolled_until == old)
+        .values(rolled_until=new, updated_at=datetime.utcnow())
+    )
+    if result.rowcount != 1:
+        db.session.rollback()
+        return False
+    return True
+
+
+def _roll_up_hours(start: datetime, end: datetime) -> None:
+    """Aggregate raw rows in [start, end) into hourly rollups with one INSERT ... SELECT per table."""
+    dialect = _dialect_name()
+    for fact in _facts():
+        raw = fact.raw
+        bucket = truncate(raw.timestamp, 'hour', dialect)
+        columns = [
+            db.literal('hour'),
+            bucket,
+            fact.raw_dimension,
+            db.func.count(raw.id),
+            db.func.sum(db.case((raw.user_id.is_(None), 1), else_=0)) if fact.has_user else db.literal(0),
+        ]
+        names = ['granularity', 'bucket', fact.dimension, 'total', 'anonymous']
+        if fact.has_last:
+            columns.append(db.func.max(raw.timestamp))
+            names.append('last_viewed')
+        select = (
+            db.select(*columns)
+            .where(raw.timestamp >= start, raw.timestamp < end)
+            .group_by(bucket, fact.raw_dimension)
+        )
+        db.session.execute(db.insert(fact.rollup).from_select(names, select))
+
+
+def _roll_up_days(start: datetime, end: datetime) -> None:
+    """Aggregate hourly rollups in [start, end) into daily rollups, and merge the days' visitor sketches."""
+    dialect = _dialect_name()
+    for fact in _facts():
+        rollup = fact.rollup
+        dimension = getattr(rollup, fact.dimension)
+        day = truncate(rollup.bucket, 'day', dialect)
+        columns = [
+            db.literal('day'), day, dimension, db.func.sum(rollup.total), db.func.sum(rollup.anonymous)
+        ]
+        names = ['granularity', 'bucket', fact.dimension, 'total', 'anonymous']
+        if fact.has_last:
+            columns.append(db.func.max(rollup.last_viewed))
+            names.append('last_viewed')
+        select = (
+            db.select(*columns)
+            .where(rollup.granularity == 'hour', rollup.bucket >= start, rollup.bucket < end)
+            .group_by(day, dimension)
+        )
+        db.session.execute(db.insert(rollup).from_select(names, select))
+
+    roll_up_sketches(start, end)
+
+
+def _segments(start: Optional[datetime]) -> Tuple[List[Tuple[str, Optional[datetime], datetime]], Optional[datetime]]:
+    """
+    Split [start, now) into rollup segments and the raw tail.
+
+    Returns:
+        tuple: ([(granularity, segment_start, segment_end), ...], start of the raw tail)
+    """
+    marks = get_watermarks()
+    segments = []
+    tail = start
+    for granularity in ('day', 'hour'):
+        mark = marks[granularity]
+        if mark is not None and is_aligned(tail, granularity) and (tail is None or tail < mark):
+            segments.append((granularity, tail, mark))
+            tail = mark
+    return segments, tail
+
+
+def _fact_totals(fact: Fact, segments, tail: Optional[datetime]) -> List[Any]:
+    """Totals per dimension value over the rollup segments plus the raw tail, in one query."""
+    raw = fact.raw
+    rollup = fact.rollup
+    dimension = getattr(rollup, fact.dimension)
+    parts = []
+    for granularity, start, end in segments:
+        columns = [dimension.label('dimension'), rollup.total.label('total'), rollup.anonymous.label('anonymous')]
+        if fact.has_last:
+            columns.append(rollup.last_viewed.label('last_seen'))
+        select = db.select(*columns).where(rollup.granularity == granularity, rollup.bucket < end)
+        if start is not None:
+            select = select.where(rollup.bucket >= start)
+        parts.append(select)
+
+    columns = [
+        fact.raw_dimension.label('dimension'),
+        db.func.count(raw.id).label('total'),
+        (db.func.sum(db.case((raw.user_id.is_(None), 1), else_=0)) if fact.has_user
+         else db.literal(0)).label('anonymous'),
+    ]
+    if fact.has_last:
+        columns.append(db.func.max(raw.timestamp).label('last_seen'))
+    select = db.select(*columns).group_by(fact.raw_dimension)
+    if tail is not None:
+        select = select.where(raw.timestamp >= tail)
+    parts.append(select)
+
+    combined = db.union_all(*parts).subquery()
+    columns = [combined.c.dimension, db.func.sum(combined.c.total), db.func.sum(combined.c.anonymous)]
+    if fact.has_last:
+        columns.append(db.func.max(combined.c.last_seen))
+    return db.session.execute(db.select(*columns).group_by(combined.c.dimension)).all()
+
+
+def summarize(start: Optional[datetime], limit: int = 10) -> Dict[str, Any]:
+    """
+    Compute the analytics totals for everything since start.
+
+    Args:
+        start: Beginning of the period (None for all time)
+        limit: Number of popular pages and articles to return
+
+    Returns:
+        dict: visits (total, anonymous, unique_ips), article_views (total,
+        anonymous), activities (per type), popular_pages [(path, count)],
+        popular_articles [(submission_id, count, last_viewed)], and the
+        estimated unique visitors of those pages and articles (page_visitors,
+        article_visitors)
+    """
+    segments, tail = _segments(start)
+    facts = {fact.name: fact for fact in _facts()}
+
+    visits = _fact_totals(facts['visits'], segments, tail)
+    article_views = _fact_totals(facts['article_views'], segments, tail)
+    activities = _fact_totals(facts['activities'], segments, tail)
+
+    popular_pages = sorted(((path, int(total)) for path, total, _ in visits), key=lambda row: -row[1])
+    popular_articles = sorted(
+        ((submission_id, int(total), last) for submission_id, total, _, last in article_views),
+        key=lambda row: -row[1]
+    )[:limit]
+    popular_pages = popular_pages[:limit]
+    return {
+        'visits': {
+            'total': sum(int(total) for _, total, _ in visits),
+            'anonymous': sum(int(anonymous) for _, _, anonymous in visits),
+            'unique_ips': unique_visitors('site', start).get('', 0),
+        },
+        'article_views': {
+            'total': sum(int(total) for _, total, _, _ in article_views),
+            'anonymous': sum(int(anonymous) for _, _, anonymous, _ in article_views),
+        },
+        'activities': {activity_type: int(total) for activity_type, total, _ in activities},
+        'popular_pages': popular_pages,
+        'popular_articles': popular_articles,
+        'page_visitors': unique_visitors('path', start, keys=[path for path, _ in popular_pages]),
+        'article_visitors': {
+            int(key): count for key, count in
+            unique_visitors('article', start, keys=[row[0] for row in popular_articles]).items()
+        },
+    }
+
+
+def bucket_series(fact_name: str, start: datetime, end: datetime, granularity: str) -> List[int]:
+    """
+    Count events per chart bucket from the rollups plus the raw tail.
+
+    Args:
+        fact_name: 'visits', 'article_views' or 'activities'
+        start: Beginning of the range
+        end: End of the range (exclusive)
+        granularity: One of the time_buckets GRANULARITIES
+
+    Returns:
+        list: Count for each bucket of bucket_starts(start, end, granularity)
+    """
+    fact = {fact.name: fact for fact in _facts()}[fact_name]
+    raw = fact.raw
+    rollup = fact.rollup
+    dialect = _dialect_name()
+    group = 'day' if granularity == 'week' else granularity
+    marks = get_watermarks()
+
+    parts = []
+    tail = start
+    # Hourly charts need hourly rollups all the way; coarser ones use daily rollups first
+    for rollup_granularity in ('day', 'hour'):
+        mark = marks[rollup_granularity]
+        if rollup_granularity == 'day' and granularity == 'hour':
+            continue
+        if mark is None or tail >= mark or tail >= end or not is_aligned(tail, rollup_granularity):
+            continue
+        bucket = truncate(rollup.bucket, group, dialect)
+        parts.append(
+            db.select(bucket.label('bucket'), db.func.sum(rollup.total).label('total'))
+            .where(rollup.granularity == rollup_granularity, rollup.bucket >= tail,
+                   rollup.bucket < min(mark, end))
+            .group_by(bucket)
+        )
+        tail = mark
+
+    if tail < end:
+        bucket = truncate(raw.timestamp, group, dialect)
+        parts.append(
+            db.select(bucket.label('bucket'), db.func.count(raw.id).label('total'))
+            .where(raw.timestamp >= tail, raw.timestamp < end)
+            .group_by(bucket)
+        )
+
+    rows = []
+    if parts:
+        combined = db.union_all(*parts).subquery() if len(parts) > 1 else parts[0].subquery()
+        rows = db.session.execute(
+            db.select(combined.c.bucket, db.func.sum(combined.c.total)).group_by(combined.c.bucket)
+        ).all()
+    return fill_buckets(rows, bucket_starts(start, end, granularity), granularity)
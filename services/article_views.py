@@ -0,0 +1,166 @@
+"""
+Article view counting for the Academic Journal Submission System.
+
+Article views are counted in one place: article_detail calls
+ArticleViewCounter.record once the article is known to exist and be visible to
+the visitor. Each (visitor, article) pair is counted at most once per
+ARTICLE_VIEW_DEDUP_WINDOW seconds. Counted views go through the tracking
+buffer, which writes the raw article_views rows and increments the matching
+article_view_daily counters in the same transaction. This lets listings and
+analytics read counts without scanning the event log.
+"""
+
+import logging
+from collections import Counter
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class ArticleViewCounter:
+    """Deduplicates article views and hands them to the tracking buffer."""
+
+    def __init__(self, tracking_buffer, dedup):
+        """
+        Create an article view counter.
+
+        Args:
+            tracking_buffer: TrackingBuffer that writes the view events
+            dedup: VisitDeduplicator whose window applies per (visitor, article)
+        """
+        self.tracking_buffer = tracking_buffer
+        self.dedup = dedup
+
+    def record(self, submission_id: int, visitor: str, user_id: Optional[int],
+               ip_address: Optional[str]) -> bool:
+        """
+        Count a view of an article unless this visitor was already counted recently.
+
+        Args:
+            submission_id: Article being viewed
+            visitor: Visitor key (see services.visit_dedup.visitor_key)
+            user_id: ID of the logged-in user, or None for anonymous visitors
+            ip_address: Client IP address
+
+        Returns:
+            bool: True if the view was counted
+        """
+        if self.dedup.seen(f'{visitor}|article:{submission_id}'):
+            return False
+        return self.tracking_buffer.record_article_view(submission_id, user_id, ip_address)
+
+
+def daily_counter_rows(article_views: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Aggregate article_views rows into per-article, per-day increments.
+
+    Args:
+        article_views: Rows as inserted into article_views
+
+    Returns:
+        list: One dict per (submission_id, day) with views and anonymous_views
+    """
+    views = Counter()
+    anonymous = Counter()
+    for row in article_views:
+        key = (row['submission_id'], row['timestamp'].date())
+        views[key] += 1
+        if row['user_id'] is None:
+            anonymous[key] += 1
+    return [
+        {'submission_id': submission_id, 'day': day, 'views': count,
+         'anonymous_views': anonymous[(submission_id, day)]}
+        for (submission_id, day), count in views.items()
+    ]
+
+
+def increment_daily_counters(executor, dialect_name: str, article_views: List[Dict[str, Any]]) -> None:
+    """
+    Atomically add a batch of article views to the daily counters.
+
+    SQLite and PostgreSQL use a single INSERT ... ON CONFLICT DO UPDATE
+    SET views = views + excluded.views. Other databases fall back to an
+    UPDATE followed by an INSERT for counters that do not exist yet.
+
+    Args:
+        executor: Connection or session to execute on (the caller commits)
+        dialect_name: Name of the database dialect
+        article_views: Rows as inserted into article_views
+    """
+    from models import ArticleViewDaily
+
+    rows = daily_counter_rows(article_views)
+    if not rows:
+        return
+    table = ArticleViewDaily.__table__
+
+    if dialect_name in ('sqlite', 'postgresql'):
+        if dialect_name == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.submission_id, table.c.day],
+            set_={
+                'views': table.c.views + statement.excluded.views,
+                'anonymous_views': table.c.anonymous_views + statement.excluded.anonymous_views,
+            }
+        )
+        executor.execute(statement, rows)
+        return
+
+    for row in rows:
+        result = executor.execute(
+            db.update(table)
+            .where(table.c.submission_id == row['submission_id'], table.c.day == row['day'])
+            .values(views=table.c.views + row['views'],
+                    anonymous_views=table.c.anonymous_views + row['anonymous_views'])
+        )
+        if result.rowcount == 0:
+            executor.execute(table.insert(), [row])
+
+
+def rebuild_daily_counters() -> int:
+    """
+    Recompute every daily counter from the article_views log.
+
+    Used to backfill the counters for views recorded before they existed.
+    Runs in the current session and commits.
+
+    Returns:
+        int: Number of counter rows written
+    """
+    from models import ArticleView, ArticleViewDaily
+
+    day = db.func.date(ArticleView.timestamp)
+    totals = db.session.query(
+        ArticleView.submission_id,
+        day,
+        db.func.count(ArticleView.id),
+        db.func.sum(db.case((ArticleView.user_id.is_(None), 1), else_=0))
+    ).group_by(ArticleView.submission_id, day).all()
+
+    try:
+        db.session.execute(db.delete(ArticleViewDaily))
+        if totals:
+            db.session.execute(ArticleViewDaily.__table__.insert(), [
+                {
+                    'submission_id': submission_id,
+                    'day': view_day if isinstance(view_day, date) else date.fromisoformat(view_day),
+                    'views': views,
+                    'anonymous_views': int(anonymous or 0),
+                }
+                for submission_id, view_day, views, anonymous in totals
+            ])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error rebuilding article view counters: {str(e)}")
+        raise
+    logger.info(f"Rebuilt {len(totals)} daily article view counters")
+    return len(totals)
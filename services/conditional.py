@@ -0,0 +1,179 @@
+"""
+Conditional responses for the Academic Journal Submission System.
+
+Crawlers and feed readers re-fetch article and issue pages that rarely
+change, and every fetch loaded the article or issue with its relationships
+and rendered the whole page. The anonymous article and issue pages now carry
+validators, read with a single query over primary keys and indexed foreign
+keys before anything else is loaded:
+
+- Article pages: the submission's updated_at, its publication (status,
+  publication time and pages), the issue's number and title, the author's
+  name, institution and bio, and the settings version.
+- Issue pages: the issue's fields, and the number, IDs, latest update,
+  latest publication time and total views of its published articles, plus
+  the settings version.
+
+The validators are hashed into a strong ETag. Requests with a matching
+If-None-Match are answered with 304 Not Modified before the page is rendered.
+No Last-Modified is sent: issues, authors and publications have no update
+time, and an issue page also changes with its view totals, so no timestamp
+would move with everything the ETag covers, and an If-Modified-Since check
+would answer 304 for changed pages. Only anonymous visitors without
+flashed messages get validators, since the page differs for logged-in users;
+responses are marked Cache-Control: no-cache and Vary: Cookie so that
+browsers revalidate and never reuse them for a logged-in session.
+"""
+
+import functools
+import hashlib
+import logging
+from typing import Any, Callable, NamedTuple, Optional
+
+from flask import Response, current_app, request
+
+from app import db
+from services.page_cache import cacheable_request
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class Validators(NamedTuple):
+    """Validators of a page: a strong ETag."""
+
+    etag: str
+
+
+def make_validators(parts) -> Validators:
+    """
+    Build validators from the values a page is rendered from.
+
+    Args:
+        parts: Values that change whenever the page changes
+
+    Returns:
+        Validators: ETag (a digest of the parts)
+    """
+    return Validators(hashlib.sha256(repr(tuple(parts)).encode()).hexdigest()[:32])
+
+
+def _settings_row():
+    from models import SettingsVersion
+
+    return SettingsVersion.__table__, SettingsVersion.__table__.c.id == SettingsVersion.ROW_ID
+
+
+def article_validators(submission_id: int) -> Optional[Validators]:
+    """
+    Read the validators of a published article's page.
+
+    Args:
+        submission_id: ID of the article
+
+    Returns:
+        Validators, or None if the article is missing or not published
+    """
+    from models import Submission, Publication, Issue, User
+
+    settings, settings_row = _settings_row()
+    row = db.session.execute(
+        db.select(Submission.updated_at, Publication.id, Publication.status, Publication.published_at,
+                  Publication.page_start, Publication.page_end, Issue.id, Issue.volume, Issue.issue_number,
+                  Issue.title, User.name, User.institution, User.bio,
+                  settings.c.version, settings.c.updated_at)
+        .select_from(Submission)
+        .join(Publication, Publication.submission_id == Submission.id)
+        .join(Issue, Issue.id == Publication.issue_id)
+        .join(User, User.id == Submission.author_id)
+        .join(settings, settings_row)
+        .where(Submission.id == submission_id, Publication.status == 'published',
+               Publication.published_at.isnot(None))
+    ).first()
+    if row is None:
+        return None
+    return make_validators(('article', submission_id, *row))
+
+
+def issue_validators(issue_id: int) -> Optional[Validators]:
+    """
+    Read the validators of an issue's page.
+
+    Args:
+        issue_id: ID of the issue
+
+    Returns:
+        Validators, or None if the issue does not exist
+    """
+    from models import Submission, Publication, Issue
+
+    settings, settings_row = _settings_row()
+    row = db.session.execute(
+        db.select(Issue.volume, Issue.issue_number, Issue.title, Issue.description, Issue.status,
+                  Issue.publication_date, Issue.created_at,
+                  db.func.count(Submission.id), db.func.sum(Submission.id), db.func.max(Submission.updated_at),
+                  db.func.max(Publication.published_at), db.func.sum(Submission.view_count),
+                  settings.c.version, settings.c.updated_at)
+        .select_from(Issue)
+        .join(settings, settings_row)
+        .outerjoin(Publication, db.and_(Publication.issue_id == Issue.id, Publication.status == 'published'))
+        .outerjoin(Submission, Submission.id == Publication.submission_id)
+        .where(Issue.id == issue_id)
+        .group_by(Issue.id, settings.c.version, settings.c.updated_at)
+    ).first()
+    if row is None:
+        return None
+    return make_validators(('issue', issue_id, *row))
+
+
+def not_modified(validators: Validators) -> bool:
+    """Whether the request's If-None-Match matches the validators."""
+    return bool(request.if_none_match) and request.if_none_match.contains(validators.etag)
+
+
+def _add_headers(response: Response, validators: Validators) -> Response:
+    response.set_etag(validators.etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Cookie')
+    return response
+
+
+def conditional(lookup: Callable[..., Optional[Validators]],
+                on_not_modified: Optional[Callable[..., Any]] = None):
+    """
+    Answer conditional requests for a view with 304 before it runs.
+
+    Args:
+        lookup: Called with the view arguments; returns the page's Validators,
+            or None to render the view without them
+        on_not_modified: Called with the view arguments when a 304 is sent,
+            for side effects the view would have had (counting an article view)
+
+    Returns:
+        Decorator for a view function
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not cacheable_request():
+                return view(*args, **kwargs)
+            try:
+                validators = lookup(*args, **kwargs)
+            except Exception as e:
+                current_app.logger.error(f"Error reading page validators: {str(e)}")
+                db.session.rollback()
+                validators = None
+            if validators is None:
+                return view(*args, **kwargs)
+
+            if not_modified(validators):
+                if on_not_modified is not None:
+                    on_not_modified(*args, **kwargs)
+                return _add_headers(Response(status=304), validators)
+
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                _add_headers(response, validators)
+            return response
+        return wrapper
+    return decorator
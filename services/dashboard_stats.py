@@ -0,0 +1,187 @@
+"""
+Admin dashboard statistics for the Academic Journal Submission System.
+
+The admin dashboard shows user, submission, review and issue totals plus users
+per role and submissions per status. They are computed with two grouped
+queries and kept as a snapshot that is reused until one of the counted tables
+changes:
+
+- SQLAlchemy session events note, during a flush, whether a User, Submission,
+  Review or Issue row was added or deleted, or a user's role or a submission's
+  status changed. Bulk INSERT and DELETE statements on those tables count too,
+  as do bulk UPDATEs that set a role or a status. The view and review counter
+  updates on submissions do not.
+- The first such change in a transaction bumps the dashboard_stats_version
+  row in the same transaction, so the bump commits or rolls back with it.
+- The snapshot remembers the version it was computed at. Each dashboard load
+  reads the version row (one primary key lookup) and recomputes the counts
+  only when it moved, so a commit in any worker invalidates every worker's
+  snapshot.
+
+DASHBOARD_STATS_MAX_AGE bounds how long a snapshot is trusted, for changes
+made outside the application.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import event, inspect
+
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Tables whose changes invalidate the snapshot
+TRACKED_TABLES = ('users', 'submissions', 'reviews', 'issues')
+
+# Columns whose updates change a grouped count
+TRACKED_ATTRIBUTES = {'users': 'role', 'submissions': 'status'}
+
+_SESSION_FLAG = 'dashboard_stats_changed'
+
+
+class DashboardStats:
+    """Snapshot of the admin dashboard counts, invalidated when the counted rows change."""
+
+    def __init__(self, max_age: float = 300):
+        """
+        Create the statistics service.
+
+        Args:
+            max_age: Seconds a snapshot is trusted at most (0 disables the limit)
+        """
+        self.max_age = max_age
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._snapshot_version: Optional[int] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        """Current version of the counted tables, shared by every worker through the database."""
+        from models import DashboardStatsVersion
+        return DashboardStatsVersion.current()
+
+    def invalidate(self) -> None:
+        """Drop this worker's snapshot (other workers notice changes through the version row)."""
+        with self._lock:
+            self._snapshot = None
+
+    def get(self) -> Dict[str, Any]:
+        """
+        Get the dashboard counts, recomputing them only if they may have changed.
+
+        Returns:
+            dict: users, submissions, reviews and issues totals, roles
+            (users per role) and statuses (submissions per status)
+        """
+        version = self.version
+        snapshot = self._snapshot
+        expired = self.max_age and time.monotonic() - self._loaded_at > self.max_age
+        if snapshot is not None and self._snapshot_version == version and not expired:
+            return snapshot
+
+        snapshot = self.compute()
+        with self._lock:
+            self._snapshot, self._snapshot_version, self._loaded_at = snapshot, version, time.monotonic()
+        return snapshot
+
+    @staticmethod
+    def compute() -> Dict[str, Any]:
+        """Compute the counts with one grouped query per table family."""
+        from models import User, Submission, Review, Issue
+
+        totals = db.session.execute(db.union_all(
+            db.select(db.literal('role'), User.role, db.func.count(User.id)).group_by(User.role),
+            db.select(db.literal('total'), db.literal('reviews'), db.func.count(Review.id)),
+            db.select(db.literal('total'), db.literal('issues'), db.func.count(Issue.id)),
+        )).all()
+        statuses = db.session.execute(
+            db.select(Submission.status, db.func.count(Submission.id)).group_by(Submission.status)
+        ).all()
+
+        roles = {role: count for kind, role, count in totals if kind == 'role'}
+        stats = {name: count for kind, name, count in totals if kind == 'total'}
+        stats['roles'] = roles
+        stats['statuses'] = dict(statuses)
+        stats['users'] = sum(roles.values())
+        stats['submissions'] = sum(stats['statuses'].values())
+        return stats
+
+
+def _changes_counts(instance) -> bool:
+    """Whether a dirty instance changed a column the grouped counts depend on."""
+    attribute = TRACKED_ATTRIBUTES.get(getattr(instance, '__tablename__', None))
+    if attribute is None:
+        return False
+    return inspect(instance).attrs[attribute].history.has_changes()
+
+
+def _mark_changed(session) -> None:
+    """Bump the version row once per transaction that changes the counted rows."""
+    from models import DashboardStatsVersion
+
+    if session.info.get(_SESSION_FLAG):
+        return
+    session.info[_SESSION_FLAG] = True
+    DashboardStatsVersion.bump(session.connection())
+
+
+def _after_flush(session, flush_context) -> None:
+    """Note a change to the counted rows (the session still shows pre-flush state here)."""
+    if session.info.get(_SESSION_FLAG):
+        return
+    for instance in list(session.new) + list(session.deleted):
+        if getattr(instance, '__tablename__', None) in TRACKED_TABLES:
+            _mark_changed(session)
+            return
+    if any(_changes_counts(instance) for instance in session.dirty):
+        _mark_changed(session)
+
+
+def _updated_columns(orm_execute_state) -> Optional[Set[str]]:
+    """Names of the columns a bulk UPDATE sets, or None if they cannot be told."""
+    values = getattr(orm_execute_state.statement, '_values', None)
+    if values:
+        return {getattr(key, 'key', key) for key in values}
+    parameters = orm_execute_state.parameters
+    if isinstance(parameters, dict) and parameters:
+        return set(parameters)
+    if isinstance(parameters, (list, tuple)) and parameters and all(isinstance(p, dict) for p in parameters):
+        return set().union(*parameters)
+    return None
+
+
+def _do_orm_execute(orm_execute_state) -> None:
+    """Note bulk INSERT and DELETE statements on the counted tables, and bulk UPDATEs of role or status."""
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    name = getattr(getattr(orm_execute_state.statement, 'table', None), 'name', None)
+    if name not in TRACKED_TABLES:
+        return
+    if orm_execute_state.is_update:
+        # The view and review counter updates on submissions leave the counts alone
+        columns = _updated_columns(orm_execute_state)
+        if columns is not None and TRACKED_ATTRIBUTES.get(name) not in columns:
+            return
+    _mark_changed(orm_execute_state.session)
+
+
+def _after_commit(session) -> None:
+    session.info.pop(_SESSION_FLAG, None)
+
+
+def _after_rollback(session) -> None:
+    session.info.pop(_SESSION_FLAG, None)
+
+
+def install_listeners() -> None:
+    """Register the session listeners (once per process)."""
+    session_class = db.session.session_factory.class_
+    for name, listener in [('after_flush', _after_flush), ('do_orm_execute', _do_orm_execute),
+                           ('after_commit', _after_commit), ('after_rollback', _after_rollback)]:
+        if not event.contains(session_class, name, listener):
+            event.listen(session_class, name, listener)
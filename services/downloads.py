@@ -0,0 +1,282 @@
+"""
+Access-controlled downloads for the Academic Journal Submission System.
+
+/uploads/ served every file to anyone who knew its name, and pushed each one
+through Python with send_from_directory, tying up a worker for the whole
+transfer of a 16 MB manuscript. Uploads are now served by serve_upload():
+
+- Authorization: branding images and the manuscripts of published articles
+  are public. Other files are served to editors and admins, and to the
+  author, reviewers and copyeditors of a submission the file belongs to (as
+  its manuscript, a revision or a copy-edited document). Anonymous visitors
+  are sent to the login page; other users get 403 Forbidden.
+- Offload: with DOWNLOAD_OFFLOAD set to "x-accel" (nginx) or "x-sendfile"
+  (Apache mod_xsendfile), Flask only authorizes the request and returns a
+  header naming the file; the front-end server sends it and handles ETags
+  and Range requests itself.
+- Fallback: otherwise the file is handed to the WSGI server's
+  wsgi.file_wrapper, which gunicorn sends with os.sendfile(). Range requests
+  are answered with 206 Partial Content from the same file, positioned at
+  the start of the range, so a partial download is also sent by the kernel
+  rather than read through Python. Content-addressed files use their
+  SHA-256 digest as a strong ETag.
+- Caching: content-addressed files (objects/...) and timestamped uploads
+  never change under their name, so they are sent with
+  "Cache-Control: immutable" and a long max-age (public for published
+  articles, private otherwise). Other files must be revalidated.
+"""
+
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+from typing import Optional, Set
+
+from flask import abort, current_app, request, send_file
+from flask_login import current_user
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+from werkzeug.security import safe_join
+from werkzeug.wsgi import wrap_file
+
+from app import db
+from services.upload_store import OBJECTS_DIR
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Access levels returned by upload_access()
+PUBLIC = 'public'
+PRIVATE = 'private'
+
+# Uploads under these prefixes are served to everyone
+PUBLIC_PREFIXES = ('branding/',)
+
+# Uploads whose content never changes under their name: the content-addressed
+# store, and the timestamped names (YYYYmmddHHMMSS_...) used before it
+IMMUTABLE_NAME = re.compile(rf'^({OBJECTS_DIR}/|(.*/)?\d{{14}}_)')
+
+# Values of DOWNLOAD_OFFLOAD
+OFFLOAD_ACCEL = 'x-accel'
+OFFLOAD_SENDFILE = 'x-sendfile'
+
+
+class FileRange:
+    """
+    A byte range of an open file, for wsgi.file_wrapper.
+
+    The file is positioned at the start of the range. Servers that send files
+    with os.sendfile() start at the file's offset and stop after
+    Content-Length bytes; others read() it in blocks, which stops at the end
+    of the range.
+    """
+
+    def __init__(self, file, start: int, length: int):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def normalize_upload_path(path: str) -> Optional[str]:
+    """
+    Normalize a path under /uploads/ before any access decision is made on it.
+
+    Args:
+        path: Path as requested, relative to the upload folder
+
+    Returns:
+        str: Normalized path, or None if it is absolute or has '..' segments
+    """
+    if not path or path.startswith('/') or '\\' in path or '..' in path.split('/'):
+        return None
+    normalized = posixpath.normpath(path)
+    return None if normalized == '.' else normalized
+
+
+def upload_root(path: str) -> str:
+    """Directory a path under /uploads/ is relative to (branding images live in the app's uploads folder)."""
+    if path.startswith(PUBLIC_PREFIXES):
+        return os.path.join(current_app.root_path, 'uploads')
+    return current_app.config['UPLOAD_FOLDER']
+
+
+def is_immutable(path: str) -> bool:
+    """Check if an upload's name changes whenever its content does."""
+    return IMMUTABLE_NAME.match(path) is not None
+
+
+def _owning_submissions(path: str) -> Set[int]:
+    """IDs of the submissions a path belongs to, as manuscript, revision or copy-edited document."""
+    from models import Submission, Revision
+
+    submission_ids = {submission_id for (submission_id,) in
+                      db.session.query(Submission.id).filter(Submission.file_path == path)}
+    submission_ids.update(submission_id for (submission_id,) in
+                          db.session.query(Revision.submission_id).filter(Revision.file_path == path))
+    if 'copyedit' in current_app.blueprints:
+        from plugins.copyedit_plugin.models import CopyEdit
+        submission_ids.update(submission_id for (submission_id,) in db.session.query(CopyEdit.submission_id).filter(
+            db.or_(CopyEdit.original_file_path == path, CopyEdit.edited_file_path == path)
+        ))
+    return submission_ids
+
+
+def upload_access(path: str, user) -> Optional[str]:
+    """
+    Decide who may download an upload.
+
+    Args:
+        path: Path relative to the upload folder
+        user: Current user (may be anonymous)
+
+    Returns:
+        str: PUBLIC, PRIVATE (only for this user), or None if the user may not download it
+    """
+    from models import Submission, Review, Publication
+
+    if path.startswith(PUBLIC_PREFIXES):
+        return PUBLIC
+    published = db.session.query(Submission.id).join(Publication, Publication.submission_id == Submission.id).filter(
+        Submission.file_path == path,
+        Publication.status == 'published',
+        Publication.published_at.isnot(None),
+    ).first()
+    if published is not None:
+        return PUBLIC
+
+    if not user.is_authenticated:
+        return None
+    if user.is_admin() or user.is_editor():
+        return PRIVATE
+
+    submission_ids = _owning_submissions(path)
+    if not submission_ids:
+        return None
+    if db.session.query(Submission.id).filter(
+        Submission.id.in_(submission_ids), Submission.author_id == user.id
+    ).first() is not None:
+        return PRIVATE
+    if db.session.query(Review.id).filter(
+        Review.submission_id.in_(submission_ids), Review.reviewer_id == user.id
+    ).first() is not None:
+        return PRIVATE
+    if 'copyedit' in current_app.blueprints:
+        from plugins.copyedit_plugin.models import CopyEdit
+        if db.session.query(CopyEdit.id).filter(
+            CopyEdit.submission_id.in_(submission_ids), CopyEdit.copyeditor_id == user.id
+        ).first() is not None:
+            return PRIVATE
+    return None
+
+
+def send_upload(path: str, access: str = PRIVATE, as_attachment: bool = False):
+    """
+    Send an upload the current user is allowed to download.
+
+    Args:
+        path: Path relative to the upload folder
+        access: PUBLIC or PRIVATE, for the Cache-Control header
+        as_attachment: Ask the browser to save the file instead of showing it
+
+    Returns:
+        Response: The file, or a header handing it to the front-end server
+    """
+    path = normalize_upload_path(path)
+    if path is None:
+        abort(404)
+    root = upload_root(path)
+    absolute = safe_join(root, path)
+    if absolute is None or not os.path.isfile(absolute):
+        abort(404)
+
+    download_name = os.path.basename(absolute)
+    mimetype = mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+    offload = current_app.config.get('DOWNLOAD_OFFLOAD', '')
+
+    if offload in (OFFLOAD_ACCEL, OFFLOAD_SENDFILE):
+        response = current_app.response_class(mimetype=mimetype)
+        if offload == OFFLOAD_ACCEL:
+            response.headers['X-Accel-Redirect'] = current_app.config['DOWNLOAD_ACCEL_PREFIX'].rstrip('/') + '/' + path
+        else:
+            response.headers['X-Sendfile'] = absolute
+        response.headers.set('Content-Disposition', 'attachment' if as_attachment else 'inline',
+                             filename=download_name)
+    else:
+        response = _stream_file(path, absolute, mimetype, download_name, as_attachment)
+
+    if is_immutable(path):
+        response.cache_control.no_cache = None
+        response.cache_control.public = access == PUBLIC
+        response.cache_control.private = access != PUBLIC
+        response.cache_control.max_age = current_app.config['DOWNLOAD_IMMUTABLE_MAX_AGE']
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+        response.cache_control.private = access != PUBLIC
+    return response
+
+
+def _stream_file(path: str, absolute: str, mimetype: str, download_name: str, as_attachment: bool):
+    """Send a file through wsgi.file_wrapper, answering conditional and Range requests."""
+    from models import StoredFile
+
+    stat = os.stat(absolute)
+    stored = db.session.query(StoredFile.sha256, StoredFile.size).filter(StoredFile.path == path).first()
+    if stored is not None and stored.size == stat.st_size:
+        etag = stored.sha256
+    else:
+        etag = f'{int(stat.st_mtime)}-{stat.st_size}'
+
+    file = open(absolute, 'rb')
+    response = send_file(file, mimetype=mimetype, as_attachment=as_attachment, download_name=download_name,
+                         conditional=False, etag=etag, last_modified=stat.st_mtime)
+    response.content_length = stat.st_size
+    try:
+        response.make_conditional(request, accept_ranges=True, complete_length=stat.st_size)
+    except RequestedRangeNotSatisfiable:
+        file.close()
+        raise
+
+    if response.status_code == 206:
+        # Replace Werkzeug's range wrapper, which reads the range through Python
+        content_range = response.content_range
+        response.response = wrap_file(request.environ, FileRange(
+            file, content_range.start, content_range.stop - content_range.start
+        ))
+    return response
+
+
+def serve_upload(path: str, as_attachment: bool = False):
+    """
+    Authorize and send an upload.
+
+    Args:
+        path: Path relative to the upload folder
+        as_attachment: Ask the browser to save the file instead of showing it
+
+    Returns:
+        Response: The file, a redirect to the login page, or a 403 or 404 error
+    """
+    path = normalize_upload_path(path)
+    if path is None:
+        abort(404)
+    access = upload_access(path, current_user)
+    if access is None:
+        if not current_user.is_authenticated:
+            return current_app.login_manager.unauthorized()
+        logger.info(f"Refused download of {path} to user {current_user.id}")
+        abort(403)
+    return send_upload(path, access, as_attachment)
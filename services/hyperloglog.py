@@ -0,0 +1,156 @@
+"""
+HyperLogLog cardinality sketches for the Academic Journal Submission System.
+
+A HyperLogLog estimates how many distinct values were added to it using a
+fixed number of small registers, no matter how many values there were. Two
+sketches are merged by taking the maximum of each register, and the merged
+sketch estimates the size of the union. That makes per-bucket sketches
+summable over any range of buckets, which an exact count of distinct values
+is not.
+
+With m = 2 ** precision registers the relative standard error is
+1.04 / sqrt(m): about 1.6% at the default precision of 12 (4096 registers),
+so roughly 95% of estimates fall within 3.3% of the true count. Small
+cardinalities use linear counting and are close to exact.
+
+While few registers are set a sketch is kept, and serialized, in a sparse
+form (3 bytes per non-empty register); it switches to the dense register array
+(m bytes) once that is smaller.
+"""
+
+import hashlib
+import math
+import struct
+from typing import Dict, Iterable, Optional
+
+# Registers are 2 ** PRECISION bytes in the dense form
+PRECISION = 12
+
+# Relative standard error of an estimate at PRECISION
+STANDARD_ERROR = 1.04 / math.sqrt(1 << PRECISION)
+
+_SPARSE = 0
+_DENSE = 1
+_HEADER = struct.Struct('<BB')
+_SPARSE_ENTRY = struct.Struct('<HB')
+
+
+def _hash64(value: str) -> int:
+    """64-bit hash of a value, stable across processes."""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch."""
+
+    __slots__ = ('precision', 'sparse', 'registers')
+
+    def __init__(self, precision: int = PRECISION):
+        """
+        Create an empty sketch.
+
+        Args:
+            precision: Number of index bits (4-16); the sketch has 2 ** precision registers
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError(f"Unsupported precision: {precision}")
+        self.precision = precision
+        # Few registers are set in most hourly sketches, so they start as a
+        # {index: rank} dict and switch to the register array once it is smaller
+        self.sparse: Optional[Dict[int, int]] = {}
+        self.registers: Optional[bytearray] = None
+
+    @property
+    def size(self) -> int:
+        """Number of registers."""
+        return 1 << self.precision
+
+    def add(self, value: str) -> None:
+        """Add a value to the sketch."""
+        hashed = _hash64(value)
+        index = hashed >> (64 - self.precision)
+        remaining = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remaining.bit_length() + 1
+        if self.sparse is not None:
+            if rank > self.sparse.get(index, 0):
+                self.sparse[index] = rank
+                if len(self.sparse) * _SPARSE_ENTRY.size >= self.size:
+                    self._densify()
+        elif rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values: Iterable[str]) -> 'HyperLogLog':
+        """Add every value of an iterable and return the sketch."""
+        for value in values:
+            self.add(value)
+        return self
+
+    def _densify(self) -> None:
+        """Switch from the sparse dict to the register array."""
+        registers = bytearray(self.size)
+        for index, rank in self.sparse.items():
+            registers[index] = rank
+        self.registers = registers
+        self.sparse = None
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """
+        Merge another sketch into this one (the union of both value sets).
+
+        Args:
+            other: Sketch with the same precision
+
+        Returns:
+            HyperLogLog: This sketch
+        """
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precisions")
+        if other.sparse is not None:
+            if self.sparse is not None:
+                for index, rank in other.sparse.items():
+                    if rank > self.sparse.get(index, 0):
+                        self.sparse[index] = rank
+                if len(self.sparse) * _SPARSE_ENTRY.size >= self.size:
+                    self._densify()
+            else:
+                for index, rank in other.sparse.items():
+                    if rank > self.registers[index]:
+                        self.registers[index] = rank
+            return self
+        if self.sparse is not None:
+            self._densify()
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self) -> int:
+        """Estimate the number of distinct values added."""
+        m = self.size
+        ranks = self.sparse.values() if self.sparse is not None else [rank for rank in self.registers if rank]
+        zeros = m - len(ranks)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / (zeros + sum(math.ldexp(1.0, -rank) for rank in ranks))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        """Serialize the sketch, sparse while few registers are set."""
+        if self.sparse is not None:
+            return _HEADER.pack(_SPARSE, self.precision) + b''.join(
+                _SPARSE_ENTRY.pack(index, rank) for index, rank in sorted(self.sparse.items())
+            )
+        return _HEADER.pack(_DENSE, self.precision) + bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'HyperLogLog':
+        """Deserialize a sketch written by to_bytes()."""
+        encoding, precision = _HEADER.unpack_from(data)
+        body = memoryview(data)[_HEADER.size:]
+        sketch = cls(precision)
+        if encoding == _DENSE:
+            sketch.sparse = None
+            sketch.registers = bytearray(body)
+        else:
+            sketch.sparse = dict(_SPARSE_ENTRY.iter_unpack(body))
+        return sketch
@@ -0,0 +1,91 @@
+"""
+Index migration for the Academic Journal Submission System.
+
+db.create_all() creates the indexes declared in models.py only together with
+new tables, so databases created before an index was declared never get it.
+This module compares the declared indexes with the ones that exist and
+creates the missing ones. It is idempotent: running it again creates nothing.
+
+On SQLite missing indexes are created on startup. On PostgreSQL building an
+index on a large table blocks writes to it, so startup only reports missing
+indexes and setup/add_indexes.py creates them with CREATE INDEX CONCURRENTLY
+(plain CREATE INDEX for partitioned log tables, which cannot be indexed
+concurrently).
+"""
+
+import logging
+from typing import List
+
+from sqlalchemy.schema import CreateIndex
+
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def missing_indexes() -> List[db.Index]:
+    """
+    Find the indexes declared on the models that the database does not have.
+
+    Returns:
+        list: Index objects whose table exists but whose index does not
+    """
+    inspector = db.inspect(db.engine)
+    tables = set(inspector.get_table_names())
+    missing = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        missing.extend(index for index in sorted(table.indexes, key=lambda index: index.name)
+                       if index.name not in existing)
+    return missing
+
+
+def _is_partitioned(connection, table_name: str) -> bool:
+    return connection.execute(db.text(
+        'SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = :name'
+    ), {'name': table_name}).first() is not None
+
+
+def create_missing_indexes(concurrently: bool = False) -> List[str]:
+    """
+    Create every declared index the database is missing.
+
+    Args:
+        concurrently: On PostgreSQL, build indexes without blocking writes
+            (CREATE INDEX CONCURRENTLY, each in its own transaction)
+
+    Returns:
+        list: Names of the indexes created
+    """
+    created = []
+    indexes = missing_indexes()
+    if not indexes:
+        return created
+
+    if concurrently and db.engine.dialect.name == 'postgresql':
+        # CONCURRENTLY cannot run inside a transaction block
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            for index in indexes:
+                ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=connection.dialect))
+                if not _is_partitioned(connection, index.table.name):
+                    ddl = ddl.replace('CREATE INDEX', 'CREATE INDEX CONCURRENTLY', 1)
+                logger.info(f"Creating index {index.name}")
+                connection.execute(db.text(ddl))
+                created.append(index.name)
+        return created
+
+    try:
+        connection = db.session.connection()
+        for index in indexes:
+            logger.info(f"Creating index {index.name}")
+            index.create(bind=connection, checkfirst=True)
+            created.append(index.name)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error creating indexes: {str(e)}")
+        raise
+    return created
@@ -0,0 +1,164 @@
+"""
+Issue listings for the Academic Journal Submission System.
+
+The issue management pages listed every issue and counted each one's
+publications with a query per row (several per row, in the delete dialogs).
+issue_page() returns one page of issues, newest first, together with their
+publication counts per status from a single statement: the page of issues is
+selected as a subquery and outer joined to the publications it contains,
+grouped per issue. Rows are plain result rows (attribute access, no ORM
+loading), so templates cannot trigger further queries.
+
+Pages are keyed on (volume, issue_number), which is unique per issue, instead
+of on an offset: a page "after" a cursor starts right below that issue in the
+ordering, so every page costs the same however far down the list it is.
+"""
+
+import logging
+from typing import Any, List, Optional, Tuple
+
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+PUBLICATION_STATUSES = ('scheduled', 'published', 'unpublished')
+
+
+class IssuePage:
+    """One page of issue rows with the cursors of the neighbouring pages."""
+
+    def __init__(self, items: List[Any], newer: Optional[str], older: Optional[str]):
+        """
+        Create a page.
+
+        Args:
+            items: Issue rows, newest first
+            newer: Cursor for the page before this one (None on the first page)
+            older: Cursor for the page after this one (None on the last page)
+        """
+        self.items = items
+        self.newer = newer
+        self.older = older
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(row) -> str:
+    """Cursor for the position of an issue row ('volume.issue_number')."""
+    return f'{row.volume}.{row.issue_number}'
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Parse a cursor into (volume, issue_number), or None if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        volume, issue_number = cursor.split('.')
+        return int(volume), int(issue_number)
+    except ValueError:
+        return None
+
+
+def issue_rows(*criteria, newest_first: bool = True, limit: Optional[int] = None) -> List[Any]:
+    """
+    Select issues with their publication counts per status in one statement.
+
+    Args:
+        criteria: Filters on the Issue model
+        newest_first: Order by (volume, issue_number) descending rather than ascending
+        limit: Maximum number of issues
+
+    Returns:
+        list: Rows with the issue columns plus articles (all publications) and
+        one count per PUBLICATION_STATUSES entry
+    """
+    from models import Issue, Publication
+
+    def ordering(volume, issue_number):
+        if newest_first:
+            return [volume.desc(), issue_number.desc()]
+        return [volume.asc(), issue_number.asc()]
+
+    page = (
+        db.select(Issue.id, Issue.volume, Issue.issue_number, Issue.title, Issue.status,
+                  Issue.publication_date, Issue.created_at)
+        .where(*criteria)
+        .order_by(*ordering(Issue.volume, Issue.issue_number))
+        .limit(limit)
+        .subquery()
+    )
+    counts = [
+        db.func.coalesce(db.func.sum(db.case((Publication.status == status, 1), else_=0)), 0).label(status)
+        for status in PUBLICATION_STATUSES
+    ]
+    statement = (
+        db.select(page, db.func.count(Publication.id).label('articles'), *counts)
+        .outerjoin(Publication, Publication.issue_id == page.c.id)
+        .group_by(*page.c)
+        .order_by(*ordering(page.c.volume, page.c.issue_number))
+    )
+    return db.session.execute(statement).all()
+
+
+def issue_page(after: Optional[str] = None, before: Optional[str] = None, per_page: int = 50) -> IssuePage:
+    """
+    Get a page of issues, newest first, with their publication counts.
+
+    Args:
+        after: Cursor of the issue the page should start below (older issues)
+        before: Cursor of the issue the page should end above (newer issues)
+        per_page: Issues per page
+
+    Returns:
+        IssuePage: The rows and the cursors of the neighbouring pages
+    """
+    from models import Issue
+
+    def below(position):
+        volume, issue_number = position
+        return db.or_(Issue.volume < volume, db.and_(Issue.volume == volume, Issue.issue_number < issue_number))
+
+    def above(position):
+        volume, issue_number = position
+        return db.or_(Issue.volume > volume, db.and_(Issue.volume == volume, Issue.issue_number > issue_number))
+
+    # One extra row tells whether there is another page in the direction of travel
+    position = decode_cursor(before)
+    if position is not None:
+        rows = issue_rows(above(position), newest_first=False, limit=per_page + 1)
+        if not rows:
+            # Nothing newer than the cursor any more: show the first page
+            return issue_page(per_page=per_page)
+        more = len(rows) > per_page
+        rows = list(reversed(rows[:per_page]))
+        return IssuePage(rows, encode_cursor(rows[0]) if more else None, encode_cursor(rows[-1]))
+
+    position = decode_cursor(after)
+    criteria = [below(position)] if position is not None else []
+    rows = issue_rows(*criteria, limit=per_page + 1)
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    newer = encode_cursor(rows[0]) if position is not None and rows else None
+    older = encode_cursor(rows[-1]) if more else None
+    return IssuePage(rows, newer, older)
+
+
+def issue_summary(issue_id: int):
+    """
+    Get one issue's row with its publication counts.
+
+    Args:
+        issue_id: ID of the issue
+
+    Returns:
+        Row: As returned by issue_rows, or None if the issue does not exist
+    """
+    from models import Issue
+
+    rows = issue_rows(Issue.id == issue_id)
+    return rows[0] if rows else None
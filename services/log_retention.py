@@ -0,0 +1,362 @@
+"""
+Visitor log partitioning and retention for the Academic Journal Submission System.
+
+The raw visitor_logs and article_views tables receive a row for every
+tracked request. To keep the hot tables bounded no matter how old the site is,
+they are stored by month:
+
+- PostgreSQL: the tables are converted to native declarative partitions
+  (PARTITION BY RANGE (timestamp)) with one partition per month, created a few
+  months ahead, plus a DEFAULT partition for anything outside them.
+- SQLite: rows from completed months are moved out of the hot table into
+  per-month shadow tables (visitor_logs_2026_01, ...).
+
+Before raw rows leave the hot table or are dropped, they are compacted: the
+analytics rollup job folds them into the hourly/daily aggregates. Months are
+only moved or dropped once they are behind the daily rollup watermark. Raw
+months older than LOG_RETENTION_DAYS are then dropped whole, while the
+aggregates are kept forever. Set LOG_RETENTION_DAYS=0 to keep raw rows
+forever.
+
+Maintenance runs periodically on the tracking writer thread and can be run
+from the admin storage page.
+"""
+
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app import db
+from services.analytics_rollups import run_rollups, get_watermarks
+from services.time_buckets import floor, next_bucket
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Raw log tables stored by month
+PARTITIONED_TABLES = ('visitor_logs', 'article_views')
+
+# Aggregate tables shown next to them on the storage page
+AGGREGATE_TABLES = (
+    'visit_rollups', 'article_view_rollups', 'activity_rollups', 'visitor_sketches', 'article_view_daily'
+)
+
+
+def _month_suffix(month: datetime) -> str:
+    return f'{month.year:04d}_{month.month:02d}'
+
+
+class LogRetention:
+    """Monthly storage, compaction and retention for the raw visitor log tables."""
+
+    def __init__(self, retention_days: int = 90, months_ahead: int = 2, rollup_lag: float = 120):
+        """
+        Create the retention manager.
+
+        Args:
+            retention_days: Days of raw rows to keep (0 keeps them forever)
+            months_ahead: PostgreSQL partitions created ahead of the current month
+            rollup_lag: Lag passed to the rollup job when compacting
+        """
+        self.retention_days = retention_days
+        self.months_ahead = months_ahead
+        self.rollup_lag = rollup_lag
+
+    @staticmethod
+    def _tables() -> Dict[str, Any]:
+        from models import VisitorLog, ArticleView
+        return {model.__tablename__: model.__table__ for model in (VisitorLog, ArticleView)}
+
+    @staticmethod
+    def _dialect_name() -> str:
+        return db.session.get_bind().dialect.name
+
+    def run(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Run one maintenance pass: storage setup, compaction, rotation and retention.
+
+        Args:
+            now: Current UTC time (defaults to datetime.utcnow())
+
+        Returns:
+            dict: What the pass did (rolled-up hours/days, moved rows, dropped partitions)
+        """
+        now = now or datetime.utcnow()
+        report: Dict[str, Any] = {'moved': 0, 'dropped': []}
+
+        self.ensure_storage(now)
+
+        # Compaction: fold raw rows into the aggregates before anything is moved or dropped
+        report['rolled_up'] = run_rollups(now=now, lag=self.rollup_lag)
+        compacted_until = get_watermarks()['day']
+        if compacted_until is None:
+            return report
+
+        if self._dialect_name() == 'sqlite':
+            report['moved'] = self._rotate_sqlite(min(floor(now, 'month'), floor(compacted_until, 'month')))
+
+        if self.retention_days > 0:
+            cutoff = min(now - timedelta(days=self.retention_days), compacted_until)
+            report['dropped'] = self._drop_expired(cutoff)
+
+        if report['moved'] or report['dropped']:
+            logger.info(f"Visitor log maintenance moved {report['moved']} rows and dropped {report['dropped']}")
+        return report
+
+    # Storage setup
+
+    def ensure_storage(self, now: Optional[datetime] = None) -> None:
+        """Create the log table indexes and, on PostgreSQL, the monthly partitions."""
+        now = now or datetime.utcnow()
+        tables = self._tables()
+        connection = db.session.connection()
+        for table in tables.values():
+            for index in table.indexes:
+                index.create(bind=connection, checkfirst=True)
+        db.session.commit()
+
+        if self._dialect_name() != 'postgresql':
+            return
+        for name in tables:
+            if not self._is_partitioned(name):
+                if db.session.execute(text(f'SELECT 1 FROM {name} LIMIT 1')).first() is not None:
+                    logger.warning(f"{name} is not partitioned yet; run setup/partition_logs.py to convert it")
+                    db.session.rollback()
+                    continue
+                self.convert_to_partitioned(name, now)
+            elif not self._has_primary_key(name):
+                # Tables partitioned before the constraints were recreated
+                try:
+                    db.session.execute(text(f'UPDATE {name} SET timestamp = :now WHERE timestamp IS NULL'),
+                                       {'now': now})
+                    self._add_constraints(name)
+                    db.session.commit()
+                    logger.info(f"Restored the primary and foreign keys of {name}")
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Error restoring the keys of {name}: {str(e)}")
+            self._create_partitions(name, floor(now, 'month'), self.months_ahead)
+
+    def _is_partitioned(self, name: str) -> bool:
+        return db.session.execute(text(
+            'SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid '
+            'WHERE c.relname = :name'
+        ), {'name': name}).first() is not None
+
+    def _has_primary_key(self, name: str) -> bool:
+        return db.session.execute(text(
+            "SELECT 1 FROM pg_constraint con JOIN pg_class c ON c.oid = con.conrelid "
+            "WHERE c.relname = :name AND con.contype = 'p'"
+        ), {'name': name}).first() is not None
+
+    def _add_constraints(self, name: str) -> None:
+        """Add the primary key (id, timestamp) and the model's foreign keys to a partitioned log table."""
+        db.session.execute(text(f'ALTER TABLE {name} ADD PRIMARY KEY (id, timestamp)'))
+        for foreign_key in self._tables()[name].foreign_keys:
+            db.session.execute(text(
+                f'ALTER TABLE {name} ADD FOREIGN KEY ({foreign_key.parent.name}) '
+                f'REFERENCES {foreign_key.column.table.name} ({foreign_key.column.name})'
+            ))
+
+    def convert_to_partitioned(self, name: str, now: Optional[datetime] = None) -> None:
+        """
+        Convert a PostgreSQL log table to a table partitioned by month, keeping its rows.
+
+        The table is rebuilt in one transaction: renamed aside, recreated with
+        PARTITION BY RANGE (timestamp), given a partition per month of existing
+        data, refilled, and the old table dropped (its id sequence is kept).
+        CREATE TABLE ... LIKE copies no constraints, so the primary key is
+        recreated as (id, timestamp), since a partitioned table's key must
+        include the partition column, and the foreign keys are recreated from
+        the model. Rows without a timestamp are given the conversion time.
+
+        Args:
+            name: 'visitor_logs' or 'article_views'
+            now: Current UTC time (defaults to datetime.utcnow())
+        """
+        if name not in PARTITIONED_TABLES:
+            raise ValueError(f"Not a log table: {name}")
+        now = now or datetime.utcnow()
+        old = f'{name}_unpartitioned'
+
+        oldest = db.session.execute(text(f'SELECT MIN(timestamp) FROM {name}')).scalar()
+        first_month = floor(oldest or now, 'month')
+        sequence = db.session.execute(text('SELECT pg_get_serial_sequence(:name, :column)'),
+                                      {'name': name, 'column': 'id'}).scalar()
+        try:
+            db.session.execute(text(f'ALTER TABLE {name} RENAME TO {old}'))
+            db.session.execute(text(
+                f'CREATE TABLE {name} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE (timestamp)'
+            ))
+            db.session.execute(text(f'CREATE TABLE {name}_default PARTITION OF {name} DEFAULT'))
+            months = 0
+            month = first_month
+            while month <= floor(now, 'month'):
+                months += 1
+                month = next_bucket(month, 'month')
+            self._create_partitions(name, first_month, months + self.months_ahead, commit=False)
+            db.session.execute(text(f'UPDATE {old} SET timestamp = :now WHERE timestamp IS NULL'), {'now': now})
+            db.session.execute(text(f'INSERT INTO {name} SELECT * FROM {old}'))
+            if sequence:
+                db.session.execute(text(f'ALTER SEQUENCE {sequence} OWNED BY {name}.id'))
+            db.session.execute(text(f'DROP TABLE {old}'))
+            # Constraint names are free again once the old table is gone
+            self._add_constraints(name)
+            for index in self._tables()[name].indexes:
+                index.create(bind=db.session.connection(), checkfirst=True)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error partitioning {name}: {str(e)}")
+            raise
+        logger.info(f"Converted {name} to monthly partitions starting {first_month:%Y-%m}")
+
+    def _create_partitions(self, name: str, first_month: datetime, count: int, commit: bool = True) -> None:
+        """Create count monthly partitions of a PostgreSQL table starting at first_month."""
+        month = first_month
+        for _ in range(count + 1):
+            end = next_bucket(month, 'month')
+            partition = f'{name}_p{_month_suffix(month)}'
+            try:
+                db.session.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {name} "
+                    f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+                ))
+                if commit:
+                    db.session.commit()
+            except Exception as e:
+                # Usually rows for that month already sit in the DEFAULT partition
+                if not commit:
+                    raise
+                db.session.rollback()
+                logger.warning(f"Could not create partition {partition}: {str(e)}")
+            month = end
+
+    # Rotation (SQLite)
+
+    def _rotate_sqlite(self, before: datetime) -> int:
+        """Move rows older than before out of the hot tables into per-month shadow tables."""
+        moved = 0
+        for name, table in self._tables().items():
+            months = db.session.execute(text(
+                f"SELECT DISTINCT strftime('%Y-%m-01', timestamp) FROM {name} WHERE timestamp < :before"
+            ), {'before': before}).scalars().all()
+            for value in months:
+                month = datetime.fromisoformat(value)
+                moved += self._move_month(table, month)
+        return moved
+
+    def _move_month(self, table, month: datetime) -> int:
+        """Move one month of rows from a hot table into its shadow table."""
+        # Archived rows keep their columns but not their foreign keys, so users and
+        # articles can still be deleted after their visits were archived
+        name = f'{table.name}_{_month_suffix(month)}'
+        shadow = db.Table(
+            name, db.MetaData(),
+            *[db.Column(column.name, column.type, primary_key=column.primary_key) for column in table.columns],
+            db.Index(f'ix_{name}_timestamp', 'timestamp')
+        )
+        end = next_bucket(month, 'month')
+        columns = [column.name for column in table.columns]
+        try:
+            shadow.create(bind=db.session.connection(), checkfirst=True)
+            condition = (table.c.timestamp >= month) & (table.c.timestamp < end)
+            db.session.execute(shadow.insert().from_select(columns, db.select(*table.columns).where(condition)))
+            moved = db.session.execute(table.delete().where(condition)).rowcount
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error moving {table.name} rows for {month:%Y-%m}: {str(e)}")
+            return 0
+        return moved
+
+    # Retention
+
+    def partitions(self, name: str) -> List[Dict[str, Any]]:
+        """
+        List the monthly partitions (or shadow tables) of a log table.
+
+        Returns:
+            list: dicts with 'table' and 'month' (None for the DEFAULT partition)
+        """
+        if self._dialect_name() == 'postgresql':
+            names = db.session.execute(text(
+                'SELECT c.relname FROM pg_inherits i '
+                'JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent '
+                'WHERE p.relname = :name'
+            ), {'name': name}).scalars().all()
+            pattern = re.compile(rf'^{name}_p(\d{{4}})_(\d{{2}})$')
+        else:
+            names = db.session.execute(text(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE :prefix"
+            ), {'prefix': f'{name}_%'}).scalars().all()
+            pattern = re.compile(rf'^{name}_(\d{{4}})_(\d{{2}})$')
+
+        partitions = []
+        for partition in sorted(names):
+            match = pattern.match(partition)
+            if match:
+                partitions.append({'table': partition, 'month': datetime(int(match.group(1)), int(match.group(2)), 1)})
+            elif partition == f'{name}_default':
+                partitions.append({'table': partition, 'month': None})
+        return partitions
+
+    def _drop_expired(self, cutoff: datetime) -> List[str]:
+        """Drop every monthly partition that ends on or before cutoff, and older stray rows."""
+        postgres = self._dialect_name() == 'postgresql'
+        dropped = []
+        for name, table in self._tables().items():
+            for partition in self.partitions(name):
+                month = partition['month']
+                if month is None or next_bucket(month, 'month') > cutoff:
+                    continue
+                try:
+                    if postgres:
+                        db.session.execute(text(f"ALTER TABLE {name} DETACH PARTITION {partition['table']}"))
+                    db.session.execute(text(f"DROP TABLE {partition['table']}"))
+                    db.session.commit()
+                    dropped.append(partition['table'])
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Error dropping {partition['table']}: {str(e)}")
+
+            # Rows outside the monthly partitions (DEFAULT partition or SQLite hot table)
+            db.session.execute(table.delete().where(table.c.timestamp < floor(cutoff, 'month')))
+            db.session.commit()
+        return dropped
+
+    # Reporting
+
+    def table_sizes(self) -> List[Dict[str, Any]]:
+        """
+        Get the row count and, where the database reports it, the size of every log table.
+
+        Returns:
+            list: dicts with 'table', 'kind' (hot, partition or aggregate), 'rows' and 'bytes'
+        """
+        postgres = self._dialect_name() == 'postgresql'
+        entries = []
+        for name in PARTITIONED_TABLES:
+            entries.append({'table': name, 'kind': 'hot' if not postgres else 'partitioned'})
+            entries.extend({'table': partition['table'], 'kind': 'partition'} for partition in self.partitions(name))
+        entries.extend({'table': name, 'kind': 'aggregate'} for name in AGGREGATE_TABLES)
+
+        for entry in entries:
+            entry['rows'] = db.session.execute(text(f"SELECT COUNT(*) FROM {entry['table']}")).scalar()
+            entry['bytes'] = self._table_bytes(entry['table'], postgres)
+        return entries
+
+    @staticmethod
+    def _table_bytes(name: str, postgres: bool) -> Optional[int]:
+        try:
+            if postgres:
+                return db.session.execute(text('SELECT pg_total_relation_size(:name)'), {'name': name}).scalar()
+            return db.session.execute(text('SELECT SUM(pgsize) FROM dbstat WHERE name = :name'),
+                                      {'name': name}).scalar()
+        except Exception:
+            # SQLite builds without the dbstat virtual table
+            db.session.rollback()
+            return None
@@ -0,0 +1,282 @@
+"""
+Full-page cache for anonymous visitors for the Academic Journal Submission System.
+
+The public pages (home, browse, issues, issue and article pages, about and
+contact) look the same to every anonymous visitor, yet each visit re-ran
+their queries and re-rendered their templates. Views decorated with
+@cached_page() keep the rendered HTML per worker, keyed by the endpoint, its
+URL and query arguments (sorted), the site theme and the settings version:
+
+- Logged-in users and visitors with flashed messages waiting are never served
+  from, or stored in, the cache. Only 200 responses that left the session
+  untouched are stored.
+- Changing a setting bumps the settings version, so every page rendered with
+  the old settings stops matching.
+- Session events note, during a flush, any added, changed or deleted
+  Submission, Publication or Issue (publishing and unpublishing, issue
+  edits), and bulk statements on publications and issues. The first such
+  change in a transaction bumps the page_cache_version row in the same
+  transaction, so the bump commits or rolls back with it. View and review
+  counter updates do not count.
+- Every page remembers the version it was rendered at. Workers read the
+  version row (one primary key lookup) at most once per check_interval
+  seconds, so a commit in any worker on any host makes every worker's pages
+  stale within that interval; the committing worker drops its own at once.
+- Entries also expire after PAGE_CACHE_TTL seconds, which bounds how stale the
+  popular articles or other view-driven content can get.
+"""
+
+import functools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+from flask import Response, current_app, g, has_app_context, request, session
+from flask_login import current_user
+from sqlalchemy import event, inspect
+
+from app import db
+from services.submission_counters import COUNTER_COLUMNS
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Tables whose changes invalidate every cached page
+TRACKED_TABLES = ('submissions', 'publications', 'issues')
+
+# Bulk statements on submissions are left out: the tracking writer and the
+# counter listeners update view and review counts that way with every batch
+BULK_TRACKED_TABLES = ('publications', 'issues')
+
+# Submission columns that change without changing what the pages show
+IGNORED_ATTRIBUTES = {*COUNTER_COLUMNS, 'updated_at'}
+
+# Response headers stored with a page and sent again when it is served from the cache
+CACHED_HEADERS = ('ETag', 'Last-Modified', 'Cache-Control', 'Vary')
+
+_SESSION_FLAG = 'page_cache_changed'
+
+
+class PageCache:
+    """Per-process LRU of rendered pages, invalidated when the content they show changes."""
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 300.0, check_interval: float = 1.0):
+        """
+        Create an empty page cache.
+
+        Args:
+            max_entries: Pages kept; the least recently used are dropped first (0 disables the cache)
+            ttl: Seconds a page is served at most
+            check_interval: Seconds between version checks (0 checks every call)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._generation = 0
+        self._checked_at: Optional[float] = None
+        self._pages: 'OrderedDict[Tuple, Tuple[int, float, bytes, str, Tuple]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @property
+    def generation(self) -> int:
+        """Current version of the cached content, shared by every worker through the database."""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return self._generation
+
+        try:
+            from models import PageCacheVersion
+            generation = PageCacheVersion.current()
+        except Exception as e:
+            logger.error(f"Error checking page cache version: {str(e)}")
+            db.session.rollback()
+            return self._generation
+
+        with self._lock:
+            if generation != self._generation:
+                self._pages.clear()
+            self._generation, self._checked_at = generation, now
+        return generation
+
+    def invalidate(self) -> None:
+        """Drop this worker's pages and check the shared version on the next lookup."""
+        with self._lock:
+            self._pages.clear()
+            self._checked_at = None
+
+    def get(self, key: Tuple) -> Optional[Tuple[bytes, str, Tuple]]:
+        """
+        Get a cached page.
+
+        Args:
+            key: Key built by request_key()
+
+        Returns:
+            tuple: (body, mimetype, headers), or None if the page is missing or stale
+        """
+        generation = self.generation
+        with self._lock:
+            entry = self._pages.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] != generation or time.monotonic() - entry[1] > self.ttl:
+                del self._pages[key]
+                self.misses += 1
+                return None
+            self._pages.move_to_end(key)
+            self.hits += 1
+            return entry[2:]
+
+    def put(self, key: Tuple, body: bytes, mimetype: str, generation: int, headers: Tuple = ()) -> None:
+        """
+        Store a rendered page.
+
+        Args:
+            key: Key built by request_key()
+            body: Response body
+            mimetype: Response mimetype
+            generation: Generation read before the page was rendered, so a
+                change committed during rendering leaves it stale
+            headers: (name, value) pairs of CACHED_HEADERS to send with the page
+        """
+        with self._lock:
+            self._pages[key] = (generation, time.monotonic(), body, mimetype, headers)
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+
+    def __len__(self):
+        return len(self._pages)
+
+
+def request_key() -> Tuple:
+    """Cache key of the current request: endpoint, URL and query arguments, theme and settings version."""
+    site = g.get('site') or current_app.extensions['settings_cache'].current_site()
+    return (
+        request.endpoint,
+        request.host_url,
+        tuple(sorted((request.view_args or {}).items())),
+        tuple(sorted((key, tuple(values)) for key, values in request.args.lists())),
+        site.system_theme,
+        site.version,
+    )
+
+
+def cacheable_request() -> bool:
+    """Whether the current request may be answered from (and stored in) the page cache."""
+    return (
+        request.method in ('GET', 'HEAD')
+        and not current_user.is_authenticated
+        and not session.get('_flashes')
+    )
+
+
+def cached_page(on_hit: Optional[Callable[..., Any]] = None):
+    """
+    Serve a view's anonymous responses from the page cache.
+
+    Args:
+        on_hit: Called with the view arguments when a cached page is served,
+            for side effects the view would have had (counting an article view)
+
+    Returns:
+        Decorator for a view function
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            page_cache = current_app.extensions.get('page_cache')
+            if page_cache is None or not page_cache.enabled or not cacheable_request():
+                return view(*args, **kwargs)
+
+            key = request_key()
+            cached = page_cache.get(key)
+            if cached is not None:
+                if on_hit is not None:
+                    on_hit(*args, **kwargs)
+                body, mimetype, headers = cached
+                response = Response(body, mimetype=mimetype, headers=headers)
+                response.headers['X-Page-Cache'] = 'hit'
+                # Answers If-None-Match / If-Modified-Since with 304 when the page carries validators
+                return response.make_conditional(request)
+
+            generation = page_cache.generation
+            response = current_app.make_response(view(*args, **kwargs))
+            if (response.status_code == 200 and not response.is_streamed and not session.modified
+                    and 'Set-Cookie' not in response.headers):
+                headers = tuple((name, response.headers[name]) for name in CACHED_HEADERS if name in response.headers)
+                page_cache.put(key, response.get_data(), response.mimetype, generation, headers)
+                response.headers['X-Page-Cache'] = 'miss'
+            return response
+        return wrapper
+    return decorator
+
+
+def _changes_content(instance) -> bool:
+    """Whether a dirty instance changed a column the pages show (not just its counters)."""
+    if getattr(instance, '__tablename__', None) not in TRACKED_TABLES:
+        return False
+    state = inspect(instance)
+    return any(state.attrs[attribute.key].history.has_changes()
+               for attribute in state.mapper.column_attrs if attribute.key not in IGNORED_ATTRIBUTES)
+
+
+def _mark_changed(session) -> None:
+    """Bump the version row once per transaction that changes the rows the pages show."""
+    from models import PageCacheVersion
+
+    if session.info.get(_SESSION_FLAG):
+        return
+    session.info[_SESSION_FLAG] = True
+    PageCacheVersion.bump(session.connection())
+
+
+def _after_flush(session, flush_context) -> None:
+    """Note a change to the rows the public pages show (the session still shows pre-flush state here)."""
+    if session.info.get(_SESSION_FLAG):
+        return
+    for instance in list(session.new) + list(session.deleted):
+        if getattr(instance, '__tablename__', None) in TRACKED_TABLES:
+            _mark_changed(session)
+            return
+    if any(_changes_content(instance) for instance in session.dirty):
+        _mark_changed(session)
+
+
+def _do_orm_execute(orm_execute_state) -> None:
+    """Note bulk INSERT, UPDATE and DELETE statements against publications and issues."""
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, 'table', None)
+    if getattr(table, 'name', None) in BULK_TRACKED_TABLES:
+        _mark_changed(orm_execute_state.session)
+
+
+def _after_commit(session) -> None:
+    """Drop this worker's pages at once after committing a change (other workers see the version row)."""
+    if session.info.pop(_SESSION_FLAG, False) and has_app_context():
+        page_cache = current_app.extensions.get('page_cache')
+        if page_cache is not None:
+            page_cache.invalidate()
+
+
+def _after_rollback(session) -> None:
+    session.info.pop(_SESSION_FLAG, None)
+
+
+def install_listeners() -> None:
+    """Register the session listeners (once per process; they find the app's cache at commit time)."""
+    session_class = db.session.session_factory.class_
+    for name, listener in [('after_flush', _after_flush), ('do_orm_execute', _do_orm_execute),
+                           ('after_commit', _after_commit), ('after_rollback', _after_rollback)]:
+        if not event.contains(session_class, name, listener):
+            event.listen(session_class, name, listener)
@@ -0,0 +1,338 @@
+"""
+Keyset pagination for the Academic Journal Submission System.
+
+The public listings used Flask-SQLAlchemy's paginate(), which counts every
+matching row on each request and skips to a page with OFFSET, so deep pages
+(the ones crawlers walk) get slower the further they are. keyset_page()
+instead orders by a compound sort key ending in a unique column, such as
+(published_at, id) or (title, id), and starts each page right after the last
+row of the previous one:
+
+- Links carry an opaque cursor (?after= or ?before=) holding the sort key of
+  the row at the page boundary and the page number, so every page costs one
+  indexed range query however deep it is.
+- ?page=N links from before keep working: they are served once with OFFSET,
+  and the links on that page are cursors again.
+- The total is optional. 'cached' counts through a CountCache shared by the
+  worker, so the count runs at most once per PAGINATION_COUNT_TTL seconds for a
+  given listing and filter; the total shown can lag behind by that long.
+"""
+
+import base64
+import binascii
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from flask import current_app
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
+
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Query string arguments that select the page; links to other pages replace them
+PAGE_ARGS = ('page', 'after', 'before')
+
+
+class KeysetPage:
+    """One page of a keyset-paginated listing with the cursors of the neighbouring pages."""
+
+    def __init__(self, items: List[Any], page: int, per_page: int, prev_cursor: Optional[str],
+                 next_cursor: Optional[str], total: Optional[int] = None):
+        """
+        Create a page.
+
+        Args:
+            items: Rows on this page
+            page: Page number (1 for the first page)
+            per_page: Rows per page
+            prev_cursor: Cursor for the page before this one (None on the first page)
+            next_cursor: Cursor for the page after this one (None on the last page)
+            total: Number of matching rows, if it was counted
+        """
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.prev_cursor = prev_cursor
+        self.next_cursor = next_cursor
+        self.total = total
+
+    @property
+    def has_prev(self) -> bool:
+        return self.prev_cursor is not None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def pages(self) -> Optional[int]:
+        """Number of pages, if the total was counted."""
+        if self.total is None:
+            return None
+        return max(1, -(-self.total // self.per_page))
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+class CountCache:
+    """Per-process cache of listing totals, keyed by the count statement and its parameters."""
+
+    def __init__(self, ttl: float = 60.0, max_entries: int = 512):
+        """
+        Create an empty count cache.
+
+        Args:
+            ttl: Seconds a total is reused before it is counted again
+            max_entries: Totals kept; the least recently used are dropped first
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._totals: 'OrderedDict[str, Tuple[float, int]]' = OrderedDict()
+
+    def count(self, statement) -> int:
+        """
+        Count the rows a statement selects, reusing a recent total.
+
+        Args:
+            statement: SELECT to count (without ORDER BY)
+
+        Returns:
+            int: Number of rows
+        """
+        compiled = statement.compile(bind=db.session.get_bind())
+        key = f'{compiled}|{sorted(compiled.params.items(), key=lambda item: item[0])!r}'
+        now = time.monotonic()
+        with self._lock:
+            cached = self._totals.get(key)
+            if cached is not None and now - cached[0] < self.ttl:
+                self._totals.move_to_end(key)
+                return cached[1]
+
+        total = count_rows(statement)
+        with self._lock:
+            self._totals[key] = (now, total)
+            self._totals.move_to_end(key)
+            while len(self._totals) > self.max_entries:
+                self._totals.popitem(last=False)
+        return total
+
+    def clear(self) -> None:
+        """Forget every cached total."""
+        with self._lock:
+            self._totals.clear()
+
+
+def count_rows(statement) -> int:
+    """Count the rows a statement selects."""
+    return db.session.execute(db.select(db.func.count()).select_from(statement.subquery())).scalar()
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+        raise ValueError(f"unknown cursor value {value!r}")
+    return value
+
+
+def encode_cursor(values: Sequence[Any], page: int) -> str:
+    """
+    Encode a sort key position and page number as an opaque URL-safe token.
+
+    Args:
+        values: Sort key values of the row at the page boundary
+        page: Number of the page the cursor leads to
+
+    Returns:
+        str: Cursor token
+    """
+    payload = json.dumps({'k': [_encode_value(value) for value in values], 'p': page}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str], width: int) -> Optional[Tuple[List[Any], int]]:
+    """
+    Decode a cursor token.
+
+    Args:
+        cursor: Token from the query string
+        width: Number of sort key values the listing expects
+
+    Returns:
+        tuple: (sort key values, page number), or None if the cursor is
+        missing, malformed or belongs to a different ordering
+    """
+    if not cursor:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        values = [_decode_value(value) for value in payload['k']]
+        page = int(payload['p'])
+    except (binascii.Error, ValueError, TypeError, KeyError, AttributeError):
+        return None
+    if len(values) != width or page < 1:
+        return None
+    return values, page
+
+
+def link_args(args) -> Dict[str, List[str]]:
+    """
+    Get the query string arguments to keep in links to other pages.
+
+    Args:
+        args: request.args
+
+    Returns:
+        dict: Arguments other than PAGE_ARGS, as lists for url_for
+    """
+    return {key: args.getlist(key) for key in args if key not in PAGE_ARGS}
+
+
+def _sort_key(expression) -> Tuple[Any, bool]:
+    """Split an ORDER BY expression into (column expression, descending)."""
+    if isinstance(expression, UnaryExpression) and expression.modifier in (operators.desc_op, operators.asc_op):
+        return expression.element, expression.modifier is operators.desc_op
+    return expression, False
+
+
+def _beyond(keys: List[Tuple[Any, bool]], values: Sequence[Any], backwards: bool = False):
+    """Criterion for the rows after a position in the ordering (before it if backwards)."""
+    directions = {descending for _, descending in keys}
+    if len(directions) == 1:
+        # One direction for every column: a row value comparison, which the
+        # databases match against a composite index
+        columns = db.tuple_(*[column for column, _ in keys])
+        position = db.tuple_(*[db.literal(value, column.type) for (column, _), value in zip(keys, values)])
+        return columns < position if directions.pop() != backwards else columns > position
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        further = column < values[i] if descending != backwards else column > values[i]
+        clauses.append(db.and_(*[keys[j][0] == values[j] for j in range(i)], further))
+    return db.or_(*clauses)
+
+
+def _typed_position(keys: List[Tuple[Any, bool]], position: Optional[Tuple[List[Any], int]]):
+    """
+    Check a decoded cursor's values against the sort key column types.
+
+    A cursor made for another ordering (or edited by hand) can carry a string
+    where a timestamp is expected, which would only fail once the query runs.
+
+    Returns:
+        tuple: The position, with integers widened for float columns, or None if a value has the wrong type
+    """
+    if position is None:
+        return None
+    values, number = position
+    typed = []
+    for (column, _), value in zip(keys, values):
+        try:
+            expected = column.type.python_type
+        except NotImplementedError:
+            typed.append(value)
+            continue
+        if expected is float and isinstance(value, int) and not isinstance(value, bool):
+            value = float(value)
+        elif expected is date and isinstance(value, datetime):
+            value = value.date()
+        if not isinstance(value, expected) or (isinstance(value, bool) and expected is not bool):
+            return None
+        typed.append(value)
+    return typed, number
+
+
+def _ordering(keys: List[Tuple[Any, bool]], backwards: bool = False) -> List[Any]:
+    return [column.desc() if descending != backwards else column.asc() for column, descending in keys]
+
+
+def keyset_page(query, order_by: Sequence[Any], after: Optional[str] = None, before: Optional[str] = None,
+                page: Optional[int] = None, per_page: int = 10, count: Optional[str] = None) -> KeysetPage:
+    """
+    Get a page of a query, ordered by a compound sort key, starting at a cursor.
+
+    The last sort key column must be unique (usually the primary key) so that
+    every row has its own position, and the sort key columns must not be NULL.
+
+    Args:
+        query: ORM query selecting one entity, filtered but not ordered
+        order_by: Sort key columns, each optionally with .desc() or .asc()
+        after: Cursor of the row the page should start after
+        before: Cursor of the row the page should end before
+        page: Legacy page number, used (with OFFSET) when there is no cursor
+        per_page: Rows per page
+        count: None to skip the total, 'exact' to count it, or 'cached' to
+            count it through the app's CountCache
+
+    Returns:
+        KeysetPage: The rows and the cursors of the neighbouring pages
+    """
+    keys = [_sort_key(expression) for expression in order_by]
+    width = len(keys)
+    keyed = query.add_columns(*[column.label(f'keyset_{i}') for i, (column, _) in enumerate(keys)])
+
+    def split(rows):
+        items = [row[0] if len(row) == width + 1 else row[:-width] for row in rows]
+        positions = [list(row[-width:]) for row in rows]
+        return items, positions
+
+    total = None
+    if count == 'exact':
+        total = count_rows(query.order_by(None).statement)
+    elif count == 'cached':
+        total = current_app.extensions['pagination_counts'].count(query.order_by(None).statement)
+
+    # One extra row tells whether there is another page in the direction of travel
+    position = _typed_position(keys, decode_cursor(before, width))
+    if position is not None:
+        values, number = position
+        rows = keyed.filter(_beyond(keys, values, backwards=True)).order_by(
+            *_ordering(keys, backwards=True)).limit(per_page + 1).all()
+        if not rows:
+            # Nothing before the cursor any more: show the first page
+            return keyset_page(query, order_by, per_page=per_page, count=count)
+        more = len(rows) > per_page
+        items, positions = split(list(reversed(rows[:per_page])))
+        # Rows added or removed since the link was made shift the page numbers
+        number = max(number, 2) if more else 1
+        return KeysetPage(items, number, per_page,
+                          encode_cursor(positions[0], number - 1) if more else None,
+                          encode_cursor(positions[-1], number + 1), total)
+
+    position = _typed_position(keys, decode_cursor(after, width))
+    if position is not None:
+        values, number = position
+        rows = keyed.filter(_beyond(keys, values)).order_by(*_ordering(keys)).limit(per_page + 1).all()
+        if not rows:
+            # Nothing after the cursor any more: show the first page
+            return keyset_page(query, order_by, per_page=per_page, count=count)
+    else:
+        number = page if page and page > 1 else 1
+        rows = keyed.order_by(*_ordering(keys)).offset((number - 1) * per_page).limit(per_page + 1).all()
+    more = len(rows) > per_page
+    items, positions = split(rows[:per_page])
+    return KeysetPage(items, number, per_page,
+                      encode_cursor(positions[0], number - 1) if items and number > 1 else None,
+                      encode_cursor(positions[-1], number + 1) if more else None, total)
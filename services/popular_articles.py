@@ -0,0 +1,209 @@
+"""
+Popular articles leaderboards for the Academic Journal Submission System.
+
+/browse and the home page list the most viewed articles of all time, of the
+last 30 days and of the last 7 days. Instead of counting views per request,
+each worker keeps the leaderboards in memory and updates them incrementally:
+
+- refresh() loads the state from the counters every worker writes: the
+  all-time leaders from submissions.view_count (through its index) and the
+  last 30 days of article_view_daily rows. It runs on the first read, then
+  every POPULAR_ARTICLES_REFRESH_INTERVAL seconds on the tracking
+  writer thread, which picks up the views written by the other workers.
+- add() is called by the tracking writer with every batch of article views
+  it writes, so this worker's views show up immediately.
+
+Every board keeps its top candidates (a few times the number listed) in a
+dict; an article whose count rises above the lowest candidate replaces it.
+Counts only grow between refreshes, so this keeps the exact top candidates
+of the 7 and 30-day windows. When the date changes, the window totals are
+recomputed from the per-day counts. The all-time board only follows the
+candidates loaded by refresh(); an article outside them enters at the next
+refresh. Reading a board costs one primary key query for the listed articles.
+"""
+
+import heapq
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Leaderboards and their window in days (None = all time)
+PERIODS = {'week': 7, 'month': 30, 'all': None}
+
+# Days of per-day counts kept in memory
+LONGEST_WINDOW = max(days for days in PERIODS.values() if days)
+
+# Candidates kept per board, as a multiple of the articles listed, so that
+# articles hidden when the board is read (no longer published) leave enough
+CANDIDATE_FACTOR = 4
+
+
+class PopularArticles:
+    """In-memory leaderboards of the most viewed articles, updated from the view stream."""
+
+    def __init__(self, size: int = 5, refresh_interval: float = 300.0):
+        """
+        Create the leaderboards; they are loaded on first use.
+
+        Args:
+            size: Articles listed per board
+            refresh_interval: Seconds after which the boards are reloaded from the database
+        """
+        self.size = size
+        self.capacity = size * CANDIDATE_FACTOR
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._loaded_at: Optional[float] = None
+        self._today: Optional[date] = None
+        self._days: Dict[date, Counter] = {}
+        self._totals: Dict[str, Counter] = {period: Counter() for period in PERIODS}
+        self._top: Dict[str, Dict[int, int]] = {period: {} for period in PERIODS}
+
+    @staticmethod
+    def _window_start(today: date, days: int) -> date:
+        return today - timedelta(days=days - 1)
+
+    def refresh(self, today: Optional[date] = None) -> None:
+        """
+        Reload the boards from submissions.view_count and article_view_daily.
+
+        Args:
+            today: Current UTC date (defaults to today)
+        """
+        from models import Submission, Publication, ArticleViewDaily
+
+        today = today or datetime.utcnow().date()
+        published = db.select(Publication.id).where(
+            Publication.submission_id == Submission.id, Publication.status == 'published'
+        ).exists()
+        leaders = db.session.execute(
+            db.select(Submission.id, Submission.view_count)
+            .where(Submission.view_count > 0, published)
+            .order_by(Submission.view_count.desc())
+            .limit(self.capacity)
+        ).all()
+
+        start = self._window_start(today, LONGEST_WINDOW)
+        days: Dict[date, Counter] = {}
+        for submission_id, day, views in db.session.execute(
+            db.select(ArticleViewDaily.submission_id, ArticleViewDaily.day, ArticleViewDaily.views)
+            .where(ArticleViewDaily.day >= start, ArticleViewDaily.day <= today)
+        ):
+            days.setdefault(day, Counter())[submission_id] += views
+
+        with self._lock:
+            self._days = days
+            self._totals['all'] = Counter(dict(leaders))
+            self._recompute_windows(today)
+            self._top['all'] = dict(leaders)
+            self._loaded_at = time.monotonic()
+
+    def _recompute_windows(self, today: date) -> None:
+        """Rebuild the window totals and candidates from the per-day counts (lock held)."""
+        self._today = today
+        oldest = self._window_start(today, LONGEST_WINDOW)
+        for day in [day for day in self._days if day < oldest]:
+            del self._days[day]
+        for period, window in PERIODS.items():
+            if window is None:
+                continue
+            start = self._window_start(today, window)
+            totals = Counter()
+            for day, views in self._days.items():
+                if day >= start:
+                    totals.update(views)
+            self._totals[period] = totals
+            self._top[period] = dict(heapq.nlargest(self.capacity, totals.items(), key=lambda item: item[1]))
+
+    def _offer(self, period: str, submission_id: int) -> None:
+        """Update an article's place among a board's candidates after its count rose (lock held)."""
+        top = self._top[period]
+        count = self._totals[period][submission_id]
+        if submission_id in top or len(top) < self.capacity:
+            top[submission_id] = count
+            return
+        lowest = min(top, key=top.get)
+        if count > top[lowest]:
+            del top[lowest]
+            top[submission_id] = count
+
+    def add(self, article_views: List[Dict[str, Any]]) -> None:
+        """
+        Count a batch of article views written by the tracking writer.
+
+        Args:
+            article_views: Rows as inserted into article_views
+        """
+        if self._loaded_at is None or not article_views:
+            # Not loaded yet: the first read loads these views from the database
+            return
+        with self._lock:
+            today = datetime.utcnow().date()
+            if today != self._today:
+                self._recompute_windows(today)
+            for row in article_views:
+                submission_id = row['submission_id']
+                day = row['timestamp'].date()
+                for period, window in PERIODS.items():
+                    if window is None:
+                        if submission_id not in self._totals['all']:
+                            continue
+                    elif day < self._window_start(today, window) or day > today:
+                        continue
+                    self._totals[period][submission_id] += 1
+                    self._offer(period, submission_id)
+                if self._window_start(today, LONGEST_WINDOW) <= day <= today:
+                    self._days.setdefault(day, Counter())[submission_id] += 1
+
+    def leaders(self, period: str = 'all') -> List[Tuple[int, int]]:
+        """
+        Get a board's candidates, most viewed first.
+
+        Args:
+            period: 'week', 'month' or 'all'
+
+        Returns:
+            list: (submission_id, views) pairs, at most size * CANDIDATE_FACTOR
+        """
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_interval:
+            self.refresh()
+        with self._lock:
+            if datetime.utcnow().date() != self._today:
+                self._recompute_windows(datetime.utcnow().date())
+            return sorted(self._top[period].items(), key=lambda item: (-item[1], item[0]))
+
+    def articles(self, *periods: str, limit: Optional[int] = None) -> Dict[str, List[Any]]:
+        """
+        Get the published articles on one or more boards with a single query.
+
+        Args:
+            periods: Boards to read ('week', 'month', 'all'; all of them if none given)
+            limit: Articles per board (defaults to size)
+
+        Returns:
+            dict: period -> Submission objects, most viewed first
+        """
+        from models import Submission, Publication
+
+        limit = limit or self.size
+        boards = {period: self.leaders(period) for period in (periods or PERIODS)}
+        submission_ids = {submission_id for leaders in boards.values() for submission_id, _ in leaders}
+        if not submission_ids:
+            return {period: [] for period in boards}
+        submissions = {
+            submission.id: submission
+            for submission in Submission.query.join(Publication)
+            .filter(Submission.id.in_(submission_ids), Publication.status == 'published')
+        }
+        return {
+            period: [submissions[submission_id] for submission_id, _ in leaders if submission_id in submissions][:limit]
+            for period, leaders in boards.items()
+        }
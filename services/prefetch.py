@@ -0,0 +1,120 @@
+"""
+Batched relationship loading for the Academic Journal Submission System.
+
+Dashboards load a list of submissions, reviews or publications and their
+templates then follow relationships on every row (submission.author.name,
+publication.issue.title, review.submission.title). Left to lazy loading, each
+of those is a query per row. The functions here take the already loaded list
+and fill those relationships in with one IN query per relationship, so a page
+runs the same number of statements whether it lists ten rows or a thousand.
+
+Loaded objects are attached with set_committed_value, which populates the
+relationship as if it had been loaded (nothing is marked as changed), and
+relationships that are already loaded are left alone. Review counts need no
+prefetching: they are denormalized onto Submission
+(services/submission_counters.py).
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import inspect
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def _attach(objects: Iterable[Any], attribute: str, model, foreign_key: str) -> List[Any]:
+    """
+    Load a many-to-one relationship for every object with a single IN query.
+
+    Args:
+        objects: Instances whose relationship to fill in
+        attribute: Name of the relationship on the instances
+        model: Model the relationship points to
+        foreign_key: Name of the instances' column holding the related id
+
+    Returns:
+        list: The related instances (loaded now or before), without duplicates
+    """
+    unloaded = [obj for obj in objects if attribute in inspect(obj).unloaded]
+    ids = {getattr(obj, foreign_key) for obj in unloaded} - {None}
+    related: Dict[Any, Any] = {}
+    if ids:
+        related = {row.id: row for row in model.query.filter(model.id.in_(ids))}
+    for obj in unloaded:
+        set_committed_value(obj, attribute, related.get(getattr(obj, foreign_key)))
+
+    seen = {}
+    for obj in objects:
+        target = getattr(obj, attribute)
+        if target is not None:
+            seen[id(target)] = target
+    return list(seen.values())
+
+
+def prefetch_submissions(submissions: List[Any], decisions: bool = False) -> List[Any]:
+    """
+    Load the authors (and optionally the latest editor decision) of submissions.
+
+    Args:
+        submissions: Submission instances
+        decisions: Also set submission.latest_decision (the most recent
+            EditorDecision, or None) with one grouped query
+
+    Returns:
+        list: The same submissions, for chaining
+    """
+    from models import User, EditorDecision
+
+    _attach(submissions, 'author', User, 'author_id')
+    if decisions:
+        ids = {submission.id for submission in submissions}
+        latest: Dict[int, Any] = {}
+        if ids:
+            newest = (
+                db.select(db.func.max(EditorDecision.id))
+                .where(EditorDecision.submission_id.in_(ids))
+                .group_by(EditorDecision.submission_id)
+            )
+            latest = {decision.submission_id: decision
+                      for decision in EditorDecision.query.filter(EditorDecision.id.in_(newest))}
+        for submission in submissions:
+            submission.latest_decision = latest.get(submission.id)
+    return submissions
+
+
+def prefetch_publications(publications: List[Any]) -> List[Any]:
+    """
+    Load the submissions, their authors and the issues of publications.
+
+    Args:
+        publications: Publication instances
+
+    Returns:
+        list: The same publications, for chaining
+    """
+    from models import Submission, Issue
+
+    prefetch_submissions(_attach(publications, 'submission', Submission, 'submission_id'))
+    _attach(publications, 'issue', Issue, 'issue_id')
+    return publications
+
+
+def prefetch_reviews(reviews: List[Any]) -> List[Any]:
+    """
+    Load the submissions (and their authors) of reviews.
+
+    Args:
+        reviews: Review instances
+
+    Returns:
+        list: The same reviews, for chaining
+    """
+    from models import Submission
+
+    prefetch_submissions(_attach(reviews, 'submission', Submission, 'submission_id'))
+    return reviews
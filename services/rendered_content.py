@@ -0,0 +1,179 @@
+"""
+Render-once content for the Academic Journal Submission System.
+
+The about and contact pages ran the nl2br filter (escaping and a regular
+expression) over several long settings on every request, and the privacy
+policy page imported markdown and converted the whole policy each time. The
+text rarely changes, so it is now rendered when it is written:
+
+- SystemSetting.set_value() stores the nl2br HTML of every setting, and the
+  Markdown HTML of the settings in MARKDOWN_SETTINGS, next to the value. The
+  settings cache loads them with the values, and the pages emit them as
+  Markup without any text processing.
+- Any other text the markdown filter sees is rendered once per distinct
+  content: a per-process LRU keyed by a SHA-256 digest of the text holds the
+  resulting Markup.
+
+Databases created before the rendered columns existed get them on startup,
+and prerender_settings() fills them in for the settings already stored.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from markupsafe import Markup, escape
+
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Settings whose values are Markdown and also get a Markdown rendering
+MARKDOWN_SETTINGS = frozenset({'gdpr_privacy_policy'})
+
+# Rendered columns on system_settings and their DDL for databases created before them
+RENDERED_COLUMNS = {
+    'nl2br_html': 'TEXT',
+    'markdown_html': 'TEXT',
+}
+
+_NEWLINE = re.compile(r'\r\n|\r|\n')
+
+
+def render_nl2br(text: Optional[str]) -> Markup:
+    """Escape text and turn its line breaks into <br> tags."""
+    if text is None:
+        return Markup('')
+    return Markup(_NEWLINE.sub('<br>', escape(text)))
+
+
+def render_markdown(text: Optional[str]) -> Markup:
+    """Convert Markdown text to HTML."""
+    if text is None:
+        return Markup('')
+    import markdown
+    return Markup(markdown.markdown(text))
+
+
+def render_variants(key: str, value: str) -> Tuple[str, Optional[str]]:
+    """
+    Render the stored HTML variants of a setting.
+
+    Args:
+        key: Setting key
+        value: Setting value
+
+    Returns:
+        tuple: (nl2br HTML, Markdown HTML or None if the setting is not Markdown)
+    """
+    return str(render_nl2br(value)), str(render_markdown(value)) if key in MARKDOWN_SETTINGS else None
+
+
+class RenderCache:
+    """Per-process LRU of rendered Markdown keyed by a digest of the source text."""
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Create an empty render cache.
+
+        Args:
+            max_entries: Renderings kept; the least recently used are dropped first (0 disables the cache)
+        """
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[bytes, Markup]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def markdown(self, text: Optional[str]) -> Markup:
+        """
+        Render Markdown text, once per distinct content.
+
+        Args:
+            text: Markdown source
+
+        Returns:
+            Markup: The HTML rendering
+        """
+        if not text or self.max_entries <= 0:
+            return render_markdown(text)
+        digest = hashlib.sha256(text.encode('utf-8')).digest()
+        with self._lock:
+            html = self._entries.get(digest)
+            if html is not None:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return html
+            self.misses += 1
+
+        # Rendered outside the lock; two threads may render the same text once each
+        html = render_markdown(text)
+        with self._lock:
+            self._entries[digest] = html
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return html
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def ensure_rendered_columns() -> bool:
+    """
+    Add the rendered columns to a system_settings table created before they existed.
+
+    Returns:
+        bool: True if columns were added (the settings then need prerendering)
+    """
+    existing = {column['name'] for column in db.inspect(db.engine).get_columns('system_settings')}
+    missing = [name for name in RENDERED_COLUMNS if name not in existing]
+    if not missing:
+        return False
+    try:
+        for name in missing:
+            db.session.execute(db.text(f'ALTER TABLE system_settings ADD COLUMN {name} {RENDERED_COLUMNS[name]}'))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error adding rendered setting columns: {str(e)}")
+        raise
+    logger.info(f"Added rendered setting columns: {', '.join(missing)}")
+    return True
+
+
+def prerender_settings() -> int:
+    """
+    Render the settings stored without their HTML variants. Commits.
+
+    Returns:
+        int: Number of settings rendered
+    """
+    from models import SystemSetting
+
+    settings = SystemSetting.__table__
+    rows = db.session.execute(
+        db.select(settings.c.id, settings.c.setting_key, settings.c.setting_value).where(db.or_(
+            settings.c.nl2br_html.is_(None),
+            db.and_(settings.c.setting_key.in_(MARKDOWN_SETTINGS), settings.c.markdown_html.is_(None))
+        ))
+    ).all()
+    if not rows:
+        return 0
+    updates: Dict[int, Tuple[str, Optional[str]]] = {row.id: render_variants(row.setting_key, row.setting_value)
+                                                     for row in rows}
+    try:
+        db.session.execute(db.update(settings).where(settings.c.id == db.bindparam('setting_id')), [
+            {'setting_id': setting_id, 'nl2br_html': nl2br_html, 'markdown_html': markdown_html}
+            for setting_id, (nl2br_html, markdown_html) in updates.items()
+        ])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error prerendering system settings: {str(e)}")
+        raise
+    logger.info(f"Prerendered {len(updates)} system settings")
+    return len(updates)
@@ -0,0 +1,106 @@
+"""
+Request classification for the before_request pipeline.
+
+Every request is classified once into a bitmask of the pipeline stages that
+apply to it (settings loading, GDPR consent checking and visitor tracking).
+Classification is keyed by the matched URL rule, so after the first request
+for a route it is a single dictionary lookup; only unmatched paths (404s) are
+classified from the raw path each time.
+"""
+
+import re
+from typing import Dict, Optional
+
+# Pipeline stages
+STAGE_SETTINGS = 1 << 0   # load the SiteContext onto g
+STAGE_GDPR = 1 << 1       # check GDPR consent for logged-in users
+STAGE_TRACKING = 1 << 2   # record visitor / article view analytics
+ALL_STAGES = STAGE_SETTINGS | STAGE_GDPR | STAGE_TRACKING
+
+# Route classes, matched against the rule (or path) in a single regex
+_ROUTE_CLASS_PATTERN = re.compile(
+    r'^(?:'
+    r'(?P<static>/static|/css|/favicon)'
+    r'|(?P<upload>/uploads)'
+    r'|(?P<admin>/admin)'
+    r'|(?P<auth>/auth)'
+    r'|(?P<health>/(?:ping|health)/?$)'
+    r')'
+)
+
+# Stages that apply to each route class
+_CLASS_STAGES = {
+    'static': 0,
+    'upload': 0,
+    'admin': STAGE_SETTINGS | STAGE_GDPR,
+    'auth': STAGE_SETTINGS | STAGE_TRACKING,
+    'health': STAGE_SETTINGS | STAGE_GDPR,
+    None: ALL_STAGES,
+}
+
+# Endpoints that must stay reachable without GDPR consent
+GDPR_EXEMPT_ENDPOINTS = frozenset({'main.index', 'auth.provide_consent'})
+
+
+class RequestClassifier:
+    """Maps URL rules to the bitmask of before_request stages that apply."""
+
+    def __init__(self):
+        self._rule_stages: Dict[str, int] = {}
+
+    @staticmethod
+    def route_class(path: str) -> Optional[str]:
+        """
+        Get the route class for a path or URL rule.
+
+        Args:
+            path: Request path or URL rule string
+
+        Returns:
+            Optional[str]: 'static', 'upload', 'admin', 'auth', 'health' or None
+        """
+        match = _ROUTE_CLASS_PATTERN.match(path)
+        return match.lastgroup if match else None
+
+    @classmethod
+    def stages_for(cls, path: str, endpoint: Optional[str] = None) -> int:
+        """
+        Compute the stage bitmask for a path (or URL rule) and endpoint.
+
+        Args:
+            path: Request path or URL rule string
+            endpoint: Matched endpoint name, if any
+
+        Returns:
+            int: Bitmask of STAGE_* flags
+        """
+        stages = _CLASS_STAGES[cls.route_class(path)]
+        if endpoint in GDPR_EXEMPT_ENDPOINTS:
+            stages &= ~STAGE_GDPR
+        return stages
+
+    def prime(self, url_map) -> None:
+        """Precompute the stages for every rule currently registered."""
+        for rule in url_map.iter_rules():
+            self._rule_stages[rule.rule] = self.stages_for(rule.rule, rule.endpoint)
+
+    def classify(self, request) -> int:
+        """
+        Classify a request.
+
+        Args:
+            request: The current Flask request
+
+        Returns:
+            int: Bitmask of STAGE_* flags
+        """
+        rule = request.url_rule
+        if rule is None:
+            # Unmatched path (404 or routing error): classify by the raw path
+            return self.stages_for(request.path)
+
+        stages = self._rule_stages.get(rule.rule)
+        if stages is None:
+            # Rule registered after the classifier was primed (e.g. in main.py)
+            stages = self._rule_stages[rule.rule] = self.stages_for(rule.rule, rule.endpoint)
+        return stages
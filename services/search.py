@@ -0,0 +1,307 @@
+"""
+Full-text search for the Academic Journal Submission System.
+
+/browse used to search with ILIKE '%term%' on four columns, which cannot use
+an index and returns matches in no particular order. Published articles are
+now indexed in a submission_search table with a dialect-specific backend:
+
+- SQLite: an FTS5 virtual table holding the title, authors, keywords and
+  abstract, keyed by rowid = submission id, ranked with bm25().
+- PostgreSQL: a table of weighted tsvector documents with a GIN index, ranked
+  with ts_rank().
+
+Every word of a search must match, and each word also matches as a prefix
+("quant" finds "quantum"). Words are not stemmed, since a stemmed prefix no
+longer matches the words it was typed from ("catalys" would become
+"catali"). Matches in the title weigh most, then authors and
+keywords, then the abstract. Snippets of the abstract with the matching words
+highlighted are built for the displayed page only.
+
+The index holds only submissions with a published publication. Listeners on
+Submission and Publication re-index the affected submissions in the flush's
+transaction when an article is published, unpublished, edited or deleted.
+Bulk statements bypass them; rebuild() (setup/rebuild_search_index.py)
+re-indexes everything, and runs on startup when the index is out of step with
+the published articles.
+"""
+
+import logging
+import re
+from typing import Dict, Iterable, List, Optional
+
+from flask import current_app
+from markupsafe import Markup, escape
+from sqlalchemy import event, inspect
+
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = 'submission_search'
+
+# Submission attributes copied into the index
+INDEXED_ATTRIBUTES = ('title', 'authors', 'keywords', 'abstract')
+
+# Relative weight of a match in each indexed column (bm25 on SQLite)
+COLUMN_WEIGHTS = (10.0, 5.0, 5.0, 1.0)
+
+# Search words beyond this are ignored
+MAX_TERMS = 8
+
+# Markers around highlighted words; replaced with <mark> after escaping the snippet
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+
+_SESSION_KEY = 'search_index_changed'
+
+_PUBLISHED = 'EXISTS (SELECT 1 FROM publications p WHERE p.submission_id = s.id AND p.status = \'published\')'
+
+_POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(s.title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(s.authors, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(s.keywords, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(s.abstract, '')), 'D')"
+)
+
+
+def search_terms(text: Optional[str]) -> List[str]:
+    """
+    Split a search into the words that are looked up.
+
+    Args:
+        text: Search as typed
+
+    Returns:
+        list: Lowercase words (letters, digits and underscores only)
+    """
+    return re.findall(r'\w+', (text or '').lower())[:MAX_TERMS]
+
+
+def _storage_statements(dialect: str) -> List[str]:
+    if dialect == 'postgresql':
+        return [
+            f'CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ('
+            'submission_id INTEGER PRIMARY KEY REFERENCES submissions (id) ON DELETE CASCADE, '
+            'document TSVECTOR NOT NULL)',
+            f'CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_document ON {SEARCH_TABLE} USING GIN (document)',
+        ]
+    return [
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5('
+        f"{', '.join(INDEXED_ATTRIBUTES)}, tokenize='unicode61')"
+    ]
+
+
+class SearchIndex:
+    """Full-text index of the published articles."""
+
+    def __init__(self):
+        """Create the search index; ensure_storage() makes it available."""
+        self.available = False
+
+    @staticmethod
+    def _dialect_name() -> str:
+        return db.session.get_bind().dialect.name
+
+    def ensure_storage(self) -> bool:
+        """
+        Create the search table if it does not exist.
+
+        Returns:
+            bool: True if the index can be used (False, for example, on an
+            SQLite build without FTS5, where /browse falls back to ILIKE)
+        """
+        try:
+            for statement in _storage_statements(self._dialect_name()):
+                db.session.execute(db.text(statement))
+            db.session.commit()
+            self.available = True
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Full-text search is unavailable: {str(e)}")
+            self.available = False
+        return self.available
+
+    def needs_rebuild(self) -> bool:
+        """Whether the index holds a different number of articles than are published."""
+        from models import Submission
+
+        indexed = db.session.execute(db.text(f'SELECT count(*) FROM {SEARCH_TABLE}')).scalar()
+        published = db.session.execute(
+            db.select(db.func.count()).select_from(Submission.__table__.alias('s')).where(db.text(_PUBLISHED))
+        ).scalar()
+        return indexed != published
+
+    def rebuild(self) -> int:
+        """
+        Re-index every published article. Runs in the current session and commits.
+
+        Returns:
+            int: Number of articles indexed
+        """
+        try:
+            sync(db.session.connection(), None)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error rebuilding the search index: {str(e)}")
+            raise
+        indexed = db.session.execute(db.text(f'SELECT count(*) FROM {SEARCH_TABLE}')).scalar()
+        logger.info(f"Rebuilt the search index ({indexed} articles)")
+        return indexed
+
+    def matches(self, text: Optional[str]):
+        """
+        Select the articles matching a search with their relevance.
+
+        Args:
+            text: Search as typed
+
+        Returns:
+            Subquery with submission_id and rank columns (a lower rank is a
+            better match), or None if the index is unavailable or the search
+            has no words
+        """
+        terms = search_terms(text)
+        if not self.available or not terms:
+            return None
+        if self._dialect_name() == 'postgresql':
+            statement = db.text(
+                f"SELECT submission_id, -ts_rank(document, to_tsquery('simple', :query)) AS rank "
+                f"FROM {SEARCH_TABLE} WHERE document @@ to_tsquery('simple', :query)"
+            ).bindparams(query=' & '.join(f'{term}:*' for term in terms))
+        else:
+            weights = ', '.join(str(weight) for weight in COLUMN_WEIGHTS)
+            # LIMIT -1 (no limit) keeps SQLite from flattening the subquery into the
+            # caller's join, which would run the MATCH once per joined row
+            statement = db.text(
+                f'SELECT rowid AS submission_id, bm25({SEARCH_TABLE}, {weights}) AS rank '
+                f'FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :query LIMIT -1'
+            ).bindparams(query=' '.join(f'"{term}"*' for term in terms))
+        return statement.columns(submission_id=db.Integer, rank=db.Float).subquery('search_matches')
+
+    def snippets(self, text: Optional[str], submission_ids: Iterable[int], words: int = 32) -> Dict[int, Markup]:
+        """
+        Build abstract snippets with the matching words highlighted.
+
+        Args:
+            text: Search as typed
+            submission_ids: Articles to build snippets for (the displayed page)
+            words: Approximate snippet length in words
+
+        Returns:
+            dict: Submission ID -> escaped HTML with the matches in <mark> tags
+        """
+        terms = search_terms(text)
+        submission_ids = list(submission_ids)
+        if not self.available or not terms or not submission_ids:
+            return {}
+        if self._dialect_name() == 'postgresql':
+            options = f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxWords={words}, MinWords={words // 2}'
+            statement = db.text(
+                "SELECT s.id, ts_headline('simple', coalesce(s.abstract, ''), to_tsquery('simple', :query), "
+                ":options) FROM submissions s WHERE s.id IN :ids"
+            ).bindparams(query=' & '.join(f'{term}:*' for term in terms), options=options)
+        else:
+            statement = db.text(
+                f"SELECT rowid, snippet({SEARCH_TABLE}, {INDEXED_ATTRIBUTES.index('abstract')}, "
+                f":start, :end, '…', :words) FROM {SEARCH_TABLE} "
+                f'WHERE {SEARCH_TABLE} MATCH :query AND rowid IN :ids'
+            ).bindparams(query=' '.join(f'"{term}"*' for term in terms), start=HIGHLIGHT_START,
+                         end=HIGHLIGHT_END, words=min(words, 64))
+        statement = statement.bindparams(db.bindparam('ids', value=submission_ids, expanding=True))
+        return {
+            submission_id: Markup(str(escape(snippet))
+                                  .replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>'))
+            for submission_id, snippet in db.session.execute(statement)
+        }
+
+
+def sync(connection, submission_ids: Optional[Iterable[int]]) -> None:
+    """
+    Re-index submissions: remove them, then add back those that are published.
+
+    Args:
+        connection: Connection to execute on (the caller commits)
+        submission_ids: Submissions to re-index (all submissions if None)
+    """
+    postgresql = connection.dialect.name == 'postgresql'
+    key = 'submission_id' if postgresql else 'rowid'
+    parameters = {}
+    if submission_ids is None:
+        delete, where = f'DELETE FROM {SEARCH_TABLE}', ''
+    else:
+        parameters['ids'] = list(submission_ids)
+        if not parameters['ids']:
+            return
+        delete, where = f'DELETE FROM {SEARCH_TABLE} WHERE {key} IN :ids', 'AND s.id IN :ids'
+
+    if postgresql:
+        insert = (f'INSERT INTO {SEARCH_TABLE} (submission_id, document) '
+                  f'SELECT s.id, {_POSTGRES_DOCUMENT} FROM submissions s WHERE {_PUBLISHED} {where}')
+    else:
+        columns = ', '.join(f"coalesce(s.{name}, '')" for name in INDEXED_ATTRIBUTES)
+        insert = (f"INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(INDEXED_ATTRIBUTES)}) "
+                  f'SELECT s.id, {columns} FROM submissions s WHERE {_PUBLISHED} {where}')
+
+    for sql in (delete, insert):
+        statement = db.text(sql)
+        if parameters:
+            statement = statement.bindparams(db.bindparam('ids', expanding=True))
+        connection.execute(statement, parameters)
+
+
+def _search_index() -> Optional[SearchIndex]:
+    search_index = current_app.extensions.get('search_index')
+    return search_index if search_index is not None and search_index.available else None
+
+
+def _note_changed(mapper, connection, target) -> None:
+    """Remember a submission to re-index at the end of the flush."""
+    from models import Submission
+
+    session = inspect(target).session
+    if session is None:
+        return
+    if isinstance(target, Submission):
+        state = inspect(target)
+        if state.persistent and not any(state.attrs[name].history.has_changes() for name in INDEXED_ATTRIBUTES):
+            return
+        submission_id = target.id
+    else:
+        submission_id = target.submission_id
+    session.info.setdefault(_SESSION_KEY, set()).add(submission_id)
+
+
+def _after_flush(session, flush_context) -> None:
+    """Re-index the submissions published, unpublished, edited or deleted in the flush."""
+    submission_ids = session.info.pop(_SESSION_KEY, None)
+    if submission_ids and _search_index() is not None:
+        sync(session.connection(), submission_ids)
+
+
+def _create_storage(target, connection, **kw) -> None:
+    """Create the search table along with the model tables."""
+    try:
+        for statement in _storage_statements(connection.dialect.name):
+            connection.exec_driver_sql(statement)
+    except Exception as e:
+        logger.warning(f"Could not create the search index: {str(e)}")
+
+
+def _drop_storage(target, connection, **kw) -> None:
+    """Drop the search table before the model tables."""
+    connection.exec_driver_sql(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+def install_listeners() -> None:
+    """Register the Submission, Publication, session and metadata listeners (once per process)."""
+    from models import Submission, Publication
+
+    listeners = [(Submission, name, _note_changed) for name in ('after_update', 'after_delete')]
+    listeners += [(Publication, name, _note_changed) for name in ('after_insert', 'after_update', 'after_delete')]
+    listeners.append((db.session.session_factory.class_, 'after_flush', _after_flush))
+    listeners += [(db.metadata, 'after_create', _create_storage), (db.metadata, 'before_drop', _drop_storage)]
+    for target, name, listener in listeners:
+        if not event.contains(target, name, listener):
+            event.listen(target, name, listener)
@@ -0,0 +1,134 @@
+"""
+System settings cache for the Academic Journal Submission System.
+
+Each worker process keeps its own copy of the system_settings table. A single
+version counter stored in the database (see models.SettingsVersion) is bumped
+whenever a setting changes, so workers only need one cheap version lookup to
+know whether their copy is still current. Every reload also rebuilds the
+immutable SiteContext handed to templates, and loads the HTML renderings
+stored with each setting (see services/rendered_content.py).
+"""
+
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+from markupsafe import Markup
+
+from app import db
+from services.rendered_content import render_markdown, render_nl2br
+from services.site_context import SiteContext
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class SettingsCache:
+    """Per-process settings cache validated against the shared settings version."""
+
+    def __init__(self, check_interval: float = 1.0):
+        """
+        Create an empty settings cache.
+
+        Args:
+            check_interval: Seconds between version checks (0 checks every call)
+        """
+        self.check_interval = check_interval
+        self.values: Dict[str, str] = {}
+        self.rendered: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        self.version: Optional[int] = None
+        self.site: SiteContext = SiteContext({})
+        self._checked_at: Optional[float] = None
+
+    def refresh_if_stale(self) -> Dict[str, str]:
+        """
+        Return the cached settings, reloading them if the shared version changed.
+
+        Returns:
+            Dict[str, str]: Mapping of setting keys to values
+        """
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return self.values
+
+        self._checked_at = now
+        try:
+            from models import SettingsVersion
+            current_version = SettingsVersion.current()
+            if current_version != self.version:
+                self._reload(current_version)
+        except Exception as e:
+            logger.error(f"Error checking system settings version: {str(e)}")
+            db.session.rollback()
+
+        return self.values
+
+    def current_site(self) -> SiteContext:
+        """
+        Return the SiteContext for the current settings version.
+
+        Returns:
+            SiteContext: Precomputed site-wide template values
+        """
+        self.refresh_if_stale()
+        return self.site
+
+    def _reload(self, version: int) -> None:
+        """Load every setting in a single query and remember the version."""
+        from models import SystemSetting
+
+        all_settings = SystemSetting.query.with_entities(
+            SystemSetting.setting_key, SystemSetting.setting_value,
+            SystemSetting.nl2br_html, SystemSetting.markdown_html
+        ).all()
+        self.values = {key: value for key, value, _, _ in all_settings}
+        self.rendered = {key: (nl2br_html, markdown_html) for key, _, nl2br_html, markdown_html in all_settings}
+        self.site = SiteContext(self.values, version)
+        self.version = version
+        logger.debug(f"Reloaded {len(self.values)} system settings (version {version})")
+
+    def invalidate(self) -> None:
+        """Force a version check on the next call to refresh_if_stale()."""
+        self._checked_at = None
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """Get a cached setting value without triggering a refresh."""
+        return self.values.get(key, default)
+
+    def nl2br(self, key: str) -> Optional[Markup]:
+        """
+        Get a setting's value with escaped HTML and line breaks as <br> tags.
+
+        Args:
+            key: Setting key
+
+        Returns:
+            Markup: The HTML stored with the setting, or None if it is not set
+        """
+        self.refresh_if_stale()
+        return self._rendered(key, 0, render_nl2br)
+
+    def markdown(self, key: str) -> Optional[Markup]:
+        """
+        Get a setting's Markdown value rendered to HTML.
+
+        Args:
+            key: Setting key
+
+        Returns:
+            Markup: The HTML stored with the setting, or None if it is not set
+        """
+        self.refresh_if_stale()
+        return self._rendered(key, 1, render_markdown)
+
+    def _rendered(self, key, index, render) -> Optional[Markup]:
+        value = self.values.get(key)
+        if value is None:
+            return None
+        variants = self.rendered.get(key, (None, None))
+        if variants[index] is None:
+            # Stored before it was rendered on write (or not a Markdown setting);
+            # kept until the next reload
+            variants = tuple(str(render(value)) if i == index else variant for i, variant in enumerate(variants))
+            self.rendered[key] = variants
+        return Markup(variants[index])
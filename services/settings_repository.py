@@ -0,0 +1,121 @@
+"""
+Settings repository for the Academic Journal Submission System.
+
+Routes and admin forms read system settings one key at a time, and every
+SystemSetting.get_value() call was its own SELECT, even though the worker's
+settings cache already held every setting. Reads now go through this module:
+
+- get() and get_many() answer from the shared settings cache, which costs at
+  most one version check per SETTINGS_VERSION_CHECK_INTERVAL and no query at
+  all on a warm cache. get_many() also takes a mapping of keys to defaults.
+- get_bool() and get_int() parse the stored strings the way the forms write
+  them ('true'/'false', digits).
+- Without an application context or a settings cache (scripts, setup tools)
+  the settings are read from the database, all requested keys in one query.
+
+SystemSetting.get_value() is routed through get(). As with the SiteContext,
+another worker's change is seen within the version check interval; a change
+made by this worker is seen immediately, since set_value() invalidates the
+local cache.
+"""
+
+import logging
+from typing import Dict, Iterable, Mapping, Optional, Union
+
+from flask import current_app, has_app_context
+
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Values get_bool() reads as True
+TRUE_VALUES = frozenset({'true', '1', 'yes', 'on'})
+
+
+def _cached_values() -> Optional[Dict[str, str]]:
+    """The current settings from the app's settings cache, or None if there is none."""
+    if not has_app_context():
+        return None
+    settings_cache = current_app.extensions.get('settings_cache')
+    if settings_cache is None:
+        return None
+    return settings_cache.refresh_if_stale()
+
+
+def _query(keys) -> Dict[str, str]:
+    """Read the given settings from the database in one query."""
+    from models import SystemSetting
+
+    return dict(db.session.query(SystemSetting.setting_key, SystemSetting.setting_value)
+                .filter(SystemSetting.setting_key.in_(list(keys))).all())
+
+
+def get(key: str, default: Optional[str] = None) -> Optional[str]:
+    """
+    Get a system setting value.
+
+    Args:
+        key: Setting key
+        default: Value returned if the setting does not exist
+
+    Returns:
+        str: The setting value, or the default
+    """
+    values = _cached_values()
+    if values is None:
+        values = _query([key])
+    return values.get(key, default)
+
+
+def get_many(keys: Union[Iterable[str], Mapping[str, Optional[str]]]) -> Dict[str, Optional[str]]:
+    """
+    Get several system setting values at once.
+
+    Args:
+        keys: Setting keys, or a mapping of setting keys to their defaults
+
+    Returns:
+        dict: Mapping of each requested key to its value (or its default, None if not given)
+    """
+    defaults = dict(keys) if isinstance(keys, Mapping) else dict.fromkeys(keys)
+    values = _cached_values()
+    if values is None:
+        values = _query(defaults)
+    return {key: values.get(key, default) for key, default in defaults.items()}
+
+
+def get_bool(key: str, default: bool = False) -> bool:
+    """
+    Get a system setting as a boolean.
+
+    Args:
+        key: Setting key
+        default: Value returned if the setting does not exist
+
+    Returns:
+        bool: True if the stored value is 'true' (or 1, yes, on)
+    """
+    value = get(key)
+    if value is None:
+        return default
+    return value.strip().lower() in TRUE_VALUES
+
+
+def get_int(key: str, default: int = 0) -> int:
+    """
+    Get a system setting as an integer.
+
+    Args:
+        key: Setting key
+        default: Value returned if the setting does not exist or is not a number
+
+    Returns:
+        int: The stored value as an integer
+    """
+    value = get(key)
+    try:
+        return int(value) if value is not None else default
+    except ValueError:
+        logger.warning(f"System setting {key} is not an integer: {value!r}")
+        return default
@@ -0,0 +1,110 @@
+"""
+Precomputed site context for the Academic Journal Submission System.
+
+A SiteContext is built once whenever the system settings cache reloads. It
+holds every branding, content and GDPR value the templates need, with the
+derived values (defaults, normalized URLs, parsed booleans, consent markup)
+already computed, so a request only has to store a reference to it.
+"""
+
+from typing import Dict, Optional
+
+from markupsafe import Markup
+
+import config
+
+
+class SiteContext:
+    """Immutable snapshot of the site-wide settings used by templates."""
+
+    __slots__ = (
+        'version',
+        # Theme and branding
+        'system_theme',
+        'site_name',
+        'site_description',
+        'logo_url',
+        'use_logo_text',
+        'logo_text',
+        'banner_url',
+        'banner_title',
+        'banner_subtitle',
+        # Content pages
+        'about_content',
+        'submission_guidelines',
+        'review_policy',
+        'ethics_policy',
+        'author_guidelines',
+        'contact_email',
+        'contact_phone',
+        'contact_address',
+        'twitter_url',
+        'facebook_url',
+        'linkedin_url',
+        'support_hours_weekday',
+        'support_hours_saturday',
+        'support_hours_sunday',
+        'urgent_email',
+        # GDPR
+        'require_consent',
+        'consent_text',
+        'privacy_policy',
+    )
+
+    def __init__(self, settings: Dict[str, str], version: Optional[int] = None):
+        """
+        Build the context from a settings mapping.
+
+        Args:
+            settings: Mapping of system setting keys to values
+            version: Settings version the mapping was loaded at
+        """
+        get = settings.get
+        values = {
+            'version': version,
+            'system_theme': get('theme', 'dark'),
+            'site_name': get('site_name', 'EasyJournal'),
+            'site_description': get('site_description', 'A peer-reviewed academic journal'),
+            'logo_url': get('logo_url'),
+            'use_logo_text': get('use_logo_text') == 'true',
+            'logo_text': get('logo_text'),
+            'banner_url': self._normalize_url(get('banner_url')),
+            'banner_title': get('banner_title'),
+            'banner_subtitle': get('banner_subtitle'),
+            'about_content': get('about_content'),
+            'submission_guidelines': get('submission_guidelines'),
+            'review_policy': get('review_policy'),
+            'ethics_policy': get('ethics_policy'),
+            'author_guidelines': get('author_guidelines'),
+            'contact_email': get('contact_email'),
+            'contact_phone': get('contact_phone'),
+            'contact_address': get('contact_address'),
+            'twitter_url': get('twitter_url'),
+            'facebook_url': get('facebook_url'),
+            'linkedin_url': get('linkedin_url'),
+            'support_hours_weekday': get('support_hours_weekday', '9:00 AM - 6:00 PM (EST)'),
+            'support_hours_saturday': get('support_hours_saturday', '10:00 AM - 2:00 PM (EST)'),
+            'support_hours_sunday': get('support_hours_sunday', 'Closed'),
+            'urgent_email': get('urgent_email', 'urgent@easyjournal.org'),
+            'require_consent': get('gdpr_require_existing_consent', 'true') == 'true',
+            'consent_text': Markup(get('gdpr_consent_text', config.DEFAULT_CONSENT_TEXT).replace('\n', '<br>')),
+            'privacy_policy': get('gdpr_privacy_policy', config.DEFAULT_PRIVACY_POLICY),
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    @staticmethod
+    def _normalize_url(url: Optional[str]) -> Optional[str]:
+        """Make sure stored upload URLs are absolute paths."""
+        if url and not url.startswith('/'):
+            return '/' + url
+        return url
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SiteContext is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("SiteContext is immutable")
+
+    def __repr__(self):
+        return f'<SiteContext version={self.version} site_name={self.site_name!r}>'
@@ -0,0 +1,227 @@
+"""
+Submission review and view counters for the Academic Journal Submission System.
+
+The editor dashboard and the issue pages used to count each submission's
+reviews and views with a query per row. Instead, Submission carries
+denormalized counters that are kept up to date as the rows they count are
+written:
+
+- total_reviews, completed_reviews, pending_reviews and oldest_pending_due
+  (the earliest due date of the reviews still assigned) are recomputed for a
+  submission, in the flush's transaction, whenever one of its reviews is
+  added, deleted, moved or changes status or due date.
+- view_count is incremented with every article view, by the tracking writer
+  for the views it writes in batches and by a listener for ArticleView rows
+  added through the ORM. It is an all-time total, so log retention removing
+  old article_views rows does not lower it.
+
+Bulk UPDATE and DELETE statements on reviews bypass the listeners;
+reconcile_counters() (setup/reconcile_counters.py) recomputes every counter
+in bulk after such changes, and on startup when the counter columns are added
+to an existing database.
+"""
+
+import logging
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import object_session
+
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Counter columns on submissions and their DDL for databases created before them
+COUNTER_COLUMNS = {
+    'total_reviews': 'INTEGER DEFAULT 0 NOT NULL',
+    'completed_reviews': 'INTEGER DEFAULT 0 NOT NULL',
+    'pending_reviews': 'INTEGER DEFAULT 0 NOT NULL',
+    'oldest_pending_due': 'TIMESTAMP',
+    'view_count': 'INTEGER DEFAULT 0 NOT NULL',
+}
+
+# Review columns the review counters depend on
+REVIEW_ATTRIBUTES = ('submission_id', 'status', 'due_date')
+
+_SESSION_KEY = 'submission_counters_changed'
+
+
+def review_counters_statement(submission_ids: Optional[Iterable[int]] = None):
+    """
+    Build an UPDATE recomputing the review counters from the reviews table.
+
+    Args:
+        submission_ids: Submissions to update (all submissions if None)
+
+    Returns:
+        Update: Statement setting each counter from a correlated subquery
+    """
+    from models import Submission, Review
+
+    submissions = Submission.__table__
+    reviews = Review.__table__
+
+    def aggregate(column, *criteria):
+        return db.select(column).where(reviews.c.submission_id == submissions.c.id, *criteria).scalar_subquery()
+
+    assigned = reviews.c.status == 'assigned'
+    statement = db.update(submissions).values(
+        total_reviews=aggregate(db.func.count(reviews.c.id)),
+        completed_reviews=aggregate(db.func.count(reviews.c.id), reviews.c.status == 'completed'),
+        pending_reviews=aggregate(db.func.count(reviews.c.id), assigned),
+        oldest_pending_due=aggregate(db.func.min(reviews.c.due_date), assigned),
+        # Counters are not edits of the submission
+        updated_at=submissions.c.updated_at,
+    )
+    if submission_ids is not None:
+        statement = statement.where(submissions.c.id.in_(list(submission_ids)))
+    return statement
+
+
+def increment_view_counts(executor, article_views: List[Dict[str, Any]]) -> None:
+    """
+    Add a batch of article views to the submissions' view counts.
+
+    Args:
+        executor: Connection or session to execute on (the caller commits)
+        article_views: Rows as inserted into article_views
+    """
+    from models import Submission
+
+    views = Counter(row['submission_id'] for row in article_views)
+    if not views:
+        return
+    submissions = Submission.__table__
+    executor.execute(
+        db.update(submissions)
+        .where(submissions.c.id == db.bindparam('submission'))
+        .values(view_count=submissions.c.view_count + db.bindparam('added'),
+                updated_at=submissions.c.updated_at),
+        [{'submission': submission_id, 'added': count} for submission_id, count in views.items()]
+    )
+
+
+def _note_changed(target, *submission_ids) -> None:
+    """Remember submissions whose counters changed, so their loaded objects are refreshed after the flush."""
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_SESSION_KEY, set()).update(i for i in submission_ids if i is not None)
+
+
+def _recount_reviews(connection, target, submission_ids) -> None:
+    """Recompute the review counters of the given submissions in the flush's transaction."""
+    submission_ids = {submission_id for submission_id in submission_ids if submission_id is not None}
+    if submission_ids:
+        connection.execute(review_counters_statement(submission_ids))
+        _note_changed(target, *submission_ids)
+
+
+def _review_written(mapper, connection, target) -> None:
+    """Recount the submission of an added or deleted review."""
+    _recount_reviews(connection, target, [target.submission_id])
+
+
+def _review_updated(mapper, connection, target) -> None:
+    """Recount when a review changes status or due date, or moves to another submission."""
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes() for name in REVIEW_ATTRIBUTES):
+        return
+    # A review moved to another submission changes the old one too
+    _recount_reviews(connection, target, [target.submission_id, *(state.attrs.submission_id.history.deleted or ())])
+
+
+def _article_view_added(mapper, connection, target) -> None:
+    """Count an ArticleView added through the ORM like one written by the tracking writer."""
+    from services.article_views import increment_daily_counters
+
+    row = {'submission_id': target.submission_id, 'user_id': target.user_id, 'timestamp': target.timestamp}
+    increment_daily_counters(connection, connection.dialect.name, [row])
+    increment_view_counts(connection, [row])
+    _note_changed(target, target.submission_id)
+
+
+def _after_flush_postexec(session, flush_context) -> None:
+    """Expire the counters of loaded submissions that the flush recomputed."""
+    from models import Submission
+
+    submission_ids = session.info.pop(_SESSION_KEY, None)
+    if not submission_ids:
+        return
+    for submission_id in submission_ids:
+        submission = session.identity_map.get(inspect(Submission).identity_key_from_primary_key([submission_id]))
+        if submission is not None:
+            session.expire(submission, list(COUNTER_COLUMNS))
+
+
+def install_listeners() -> None:
+    """Register the Review, ArticleView and session listeners (once per process)."""
+    from models import Review, ArticleView
+
+    listeners = [(Review, 'after_insert', _review_written), (Review, 'after_update', _review_updated),
+                 (Review, 'after_delete', _review_written)]
+    listeners.append((ArticleView, 'after_insert', _article_view_added))
+    listeners.append((db.session.session_factory.class_, 'after_flush_postexec', _after_flush_postexec))
+    for target, name, listener in listeners:
+        if not event.contains(target, name, listener):
+            event.listen(target, name, listener)
+
+
+def ensure_counter_columns() -> bool:
+    """
+    Add the counter columns to a submissions table created before they existed.
+
+    Returns:
+        bool: True if columns were added (the counters then need reconciling)
+    """
+    existing = {column['name'] for column in db.inspect(db.engine).get_columns('submissions')}
+    missing = [name for name in COUNTER_COLUMNS if name not in existing]
+    if not missing:
+        return False
+    try:
+        for name in missing:
+            db.session.execute(db.text(f'ALTER TABLE submissions ADD COLUMN {name} {COUNTER_COLUMNS[name]}'))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error adding submission counter columns: {str(e)}")
+        raise
+    logger.info(f"Added submission counter columns: {', '.join(missing)}")
+    return True
+
+
+def reconcile_counters() -> int:
+    """
+    Recompute every submission's counters in bulk.
+
+    Review counters come from the reviews table; view counts from the daily
+    article view counters, which keep counting after log retention has removed
+    the raw rows. Runs in the current session and commits.
+
+    Returns:
+        int: Number of submissions whose counters were corrected
+    """
+    from models import Submission, ArticleViewDaily
+
+    submissions = Submission.__table__
+    columns = [submissions.c[name] for name in COUNTER_COLUMNS]
+    before = {row[0]: tuple(row[1:]) for row in db.session.execute(db.select(submissions.c.id, *columns))}
+
+    daily = ArticleViewDaily.__table__
+    views = db.select(db.func.coalesce(db.func.sum(daily.c.views), 0)).where(
+        daily.c.submission_id == submissions.c.id
+    ).scalar_subquery()
+    try:
+        db.session.execute(review_counters_statement())
+        db.session.execute(db.update(submissions).values(view_count=views, updated_at=submissions.c.updated_at))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error reconciling submission counters: {str(e)}")
+        raise
+
+    after = db.session.execute(db.select(submissions.c.id, *columns))
+    corrected = sum(1 for row in after if before.get(row[0]) != tuple(row[1:]))
+    logger.info(f"Reconciled submission counters ({corrected} corrected)")
+    return corrected
@@ -0,0 +1,150 @@
+"""
+Time bucketing helpers for the Academic Journal Submission System.
+
+Analytics group timestamps into hour, day, week, month or year buckets inside
+the database, so a chart needs one GROUP BY query per table instead of one
+COUNT per bucket. The truncation expression depends on the dialect:
+PostgreSQL uses date_trunc, and SQLite uses strftime with the same text layout
+SQLAlchemy uses to store DateTime values, so truncated buckets compare
+correctly with stored columns.
+
+Weeks are seven-day windows counted from the first day of the requested range
+(rather than calendar weeks), grouped by day in SQL and folded in Python.
+Buckets with no rows are filled with zeros on the Python side.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ('hour', 'day', 'week', 'month', 'year')
+
+# strftime layouts matching SQLAlchemy's SQLite DateTime storage format
+_SQLITE_FORMATS = {
+    'hour': '%Y-%m-%d %H:00:00.000000',
+    'day': '%Y-%m-%d 00:00:00.000000',
+    'month': '%Y-%m-01 00:00:00.000000',
+    'year': '%Y-01-01 00:00:00.000000',
+}
+
+
+def truncate(column, granularity: str, dialect_name: str):
+    """
+    Build a SQL expression truncating a timestamp column to the start of its bucket.
+
+    Args:
+        column: DateTime column or expression
+        granularity: 'hour', 'day', 'month' or 'year'
+        dialect_name: Name of the database dialect
+
+    Returns:
+        SQL expression of the bucket start (text on SQLite, timestamp elsewhere)
+    """
+    if granularity not in _SQLITE_FORMATS:
+        raise ValueError(f"Unsupported granularity: {granularity}")
+    if dialect_name == 'sqlite':
+        return db.func.strftime(_SQLITE_FORMATS[granularity], column)
+    return db.func.date_trunc(granularity, column)
+
+
+def floor(moment: datetime, granularity: str) -> datetime:
+    """
+    Truncate a datetime to the start of its bucket in Python.
+
+    Args:
+        moment: Datetime to truncate
+        granularity: 'hour', 'day', 'month' or 'year'
+
+    Returns:
+        datetime: Start of the bucket containing moment
+    """
+    if granularity == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == 'month':
+        return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    if granularity == 'year':
+        return moment.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unsupported granularity: {granularity}")
+
+
+def next_bucket(moment: datetime, granularity: str) -> datetime:
+    """Get the start of the bucket following the one starting at moment."""
+    if granularity == 'hour':
+        return moment + timedelta(hours=1)
+    if granularity == 'day':
+        return moment + timedelta(days=1)
+    if granularity == 'week':
+        return moment + timedelta(days=7)
+    if granularity == 'month':
+        if moment.month == 12:
+            return moment.replace(year=moment.year + 1, month=1)
+        return moment.replace(month=moment.month + 1)
+    if granularity == 'year':
+        return moment.replace(year=moment.year + 1)
+    raise ValueError(f"Unsupported granularity: {granularity}")
+
+
+def is_aligned(moment: Optional[datetime], granularity: str) -> bool:
+    """Check whether a datetime is exactly the start of a bucket (None counts as aligned)."""
+    return moment is None or floor(moment, granularity) == moment
+
+
+def as_datetime(value) -> Optional[datetime]:
+    """Convert a bucket value returned by the database (text on SQLite) to a datetime."""
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+def bucket_starts(start: datetime, end: datetime, granularity: str) -> List[datetime]:
+    """
+    List the start of every bucket overlapping [start, end).
+
+    Args:
+        start: Beginning of the range
+        end: End of the range (exclusive)
+        granularity: One of GRANULARITIES
+
+    Returns:
+        list: Bucket starts in order (weeks start on the range's first day)
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unsupported granularity: {granularity}")
+    moment = floor(start, 'day' if granularity == 'week' else granularity)
+    starts = []
+    while moment < end:
+        starts.append(moment)
+        moment = next_bucket(moment, granularity)
+    return starts
+
+
+def fill_buckets(rows, starts: List[datetime], granularity: str) -> List[int]:
+    """
+    Place grouped (bucket, count) rows into a list with one entry per bucket.
+
+    Args:
+        rows: (bucket value, count) pairs; for weeks the bucket values are days
+        starts: Bucket starts from bucket_starts()
+        granularity: One of GRANULARITIES
+
+    Returns:
+        list: Count for each bucket, zero where no row matched
+    """
+    counts = [0] * len(starts)
+    positions = {moment: index for index, moment in enumerate(starts)}
+    for value, count in rows:
+        moment = as_datetime(value)
+        if granularity == 'week':
+            index = (moment - starts[0]).days // 7 if starts else None
+        else:
+            index = positions.get(moment)
+        if index is not None and 0 <= index < len(counts):
+            counts[index] += int(count)
+    return counts
@@ -0,0 +1,323 @@
+"""
+Visitor tracking writer for the Academic Journal Submission System.
+
+Page visits and article views are no longer written inside the request. They
+are pushed onto a bounded in-process queue that a background thread drains,
+inserting each batch with a single executemany per table (plus one upsert of
+the daily article view counters, an increment of the submissions' view counts
+and a merge into the hourly unique visitor sketches) every TRACKING_FLUSH_INTERVAL_MS or
+TRACKING_BATCH_SIZE rows, whichever comes first. Committed article views are
+then passed to the view listeners (the popular articles leaderboards). When the queue is full new
+events are dropped and counted rather than slowing the request down.
+
+Set TRACKING_MODE=sync (or run the app with TESTING enabled) to write events
+synchronously instead, which keeps tests deterministic.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app import db
+from services.article_views import increment_daily_counters
+from services.submission_counters import increment_view_counts
+from services.visitor_sketches import merge_visitor_sketches
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# A queued event: a visitor_logs row or an article_views row (the other is None)
+TrackingEvent = Tuple[Dict[str, Any], Optional[Dict[str, Any]]]
+
+
+class TrackingBuffer:
+    """Bounded queue of tracking events drained by a background writer thread."""
+
+    def __init__(self, app=None, max_queue_size: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 0.5):
+        """
+        Create a tracking buffer.
+
+        Args:
+            app: Flask application the events belong to
+            max_queue_size: Events held in memory before new ones are dropped
+            batch_size: Maximum events written per batch
+            flush_interval: Maximum seconds an event waits before being written
+        """
+        self.app = None
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.counters = {'enqueued': 0, 'written': 0, 'dropped': 0, 'batches': 0, 'errors': 0}
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._periodic_tasks: List[List[Any]] = []
+        self._view_listeners: List[Callable[[List[Dict[str, Any]]], Any]] = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        """Attach the buffer to an application and flush it on process exit."""
+        self.app = app
+        app.extensions['tracking_buffer'] = self
+        atexit.register(self.shutdown)
+
+    def add_periodic_task(self, task: Callable[[], Any], interval: float) -> None:
+        """
+        Run a task on the writer thread (inside an app context) every interval seconds.
+
+        Args:
+            task: Callable taking no arguments
+            interval: Seconds between runs
+        """
+        self._periodic_tasks.append([task, interval, time.monotonic() + interval])
+
+    def add_view_listener(self, listener: Callable[[List[Dict[str, Any]]], Any]) -> None:
+        """
+        Call a listener with every batch of article views once it is committed.
+
+        Args:
+            listener: Callable taking the list of article_views rows written
+        """
+        self._view_listeners.append(listener)
+
+    @property
+    def synchronous(self) -> bool:
+        """Whether events are written inline instead of by the writer thread."""
+        return self.app.testing or self.app.config.get('TRACKING_MODE') == 'sync'
+
+    def record_visit(self, user_id: Optional[int], ip_address: Optional[str], path: str) -> bool:
+        """
+        Record a page visit.
+
+        Args:
+            user_id: ID of the logged-in user, or None for anonymous visitors
+            ip_address: Client IP address
+            path: Request path
+
+        Returns:
+            bool: False if the event was dropped because the queue was full
+        """
+        visit = {
+            'user_id': user_id,
+            'ip_address': ip_address,
+            'user_agent': None,  # Omit user agent to reduce data storage
+            'path': path,
+            'referer': None,  # Omit referer to reduce data storage
+            'timestamp': datetime.utcnow(),
+        }
+        return self._enqueue((visit, None))
+
+    def record_article_view(self, submission_id: int, user_id: Optional[int],
+                            ip_address: Optional[str]) -> bool:
+        """
+        Record an article view and increment the article's daily counter.
+
+        Args:
+            submission_id: Article being viewed
+            user_id: ID of the logged-in user, or None for anonymous visitors
+            ip_address: Client IP address
+
+        Returns:
+            bool: False if the event was dropped because the queue was full
+        """
+        article_view = {
+            'submission_id': submission_id,
+            'user_id': user_id,
+            'ip_address': ip_address,
+            'timestamp': datetime.utcnow(),
+        }
+        return self._enqueue((None, article_view))
+
+    def _enqueue(self, event: TrackingEvent) -> bool:
+        """Write the event inline in synchronous mode, otherwise queue it for the writer."""
+        if self.synchronous:
+            self._write_in_session([event])
+            return True
+
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('enqueued')
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """Get a snapshot of the buffer counters plus the current queue depth."""
+        with self._lock:
+            snapshot = dict(self.counters)
+        snapshot['queued'] = self._queue.qsize()
+        return snapshot
+
+    def flush(self) -> int:
+        """
+        Write every queued event from the calling thread.
+
+        Returns:
+            int: Number of events taken off the queue
+        """
+        drained = 0
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return drained
+            self._write(batch)
+            drained += len(batch)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Stop the writer thread and flush anything still queued."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            thread.join(timeout)
+        if self.app is not None:
+            self.flush()
+            stats = self.stats()
+            if stats['dropped'] or stats['errors']:
+                logger.warning(f"Visitor tracking shut down with {stats['dropped']} dropped events "
+                               f"and {stats['errors']} failed batches")
+
+    def _ensure_writer(self) -> None:
+        """Start the writer thread in this process if it is not running yet."""
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == pid and self._thread is not None and self._thread.is_alive():
+                return
+            if self._pid != pid:
+                # Forked worker (e.g. gunicorn --preload): start from a fresh queue
+                self._queue = queue.Queue(maxsize=self.max_queue_size)
+            self._pid = pid
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='tracking-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        """Writer thread main loop."""
+        while not self._stop.is_set():
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+            self._run_periodic_tasks()
+
+    def _run_periodic_tasks(self) -> None:
+        """Run the periodic tasks that are due."""
+        now = time.monotonic()
+        for entry in self._periodic_tasks:
+            task, interval, due = entry
+            if now < due:
+                continue
+            entry[2] = now + interval
+            try:
+                with self.app.app_context():
+                    task()
+            except Exception as e:
+                logger.error(f"Periodic tracking task failed: {str(e)}")
+
+    def _collect(self) -> List[TrackingEvent]:
+        """Wait for the next event, then gather a batch until it is full or the interval ends."""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self, limit: int) -> List[TrackingEvent]:
+        """Take up to limit events off the queue without waiting."""
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[TrackingEvent]) -> None:
+        """Insert a batch on a dedicated connection (used by the writer thread and flush)."""
+        from models import VisitorLog, ArticleView
+
+        visits, article_views = self._split(batch)
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as connection:
+                    if visits:
+                        connection.execute(VisitorLog.__table__.insert(), visits)
+                    if article_views:
+                        connection.execute(ArticleView.__table__.insert(), article_views)
+                        increment_daily_counters(connection, connection.dialect.name, article_views)
+                        increment_view_counts(connection, article_views)
+                    merge_visitor_sketches(connection, connection.dialect.name, visits, article_views)
+        except Exception as e:
+            logger.error(f"Visitor tracking error: {str(e)}")
+            self._count('errors')
+            self._count('dropped', len(batch))
+            return
+        self._count('batches')
+        self._count('written', len(batch))
+        self._notify_view_listeners(article_views)
+
+    def _write_in_session(self, batch: List[TrackingEvent]) -> None:
+        """Insert a batch through the request's session (synchronous mode)."""
+        from models import VisitorLog, ArticleView
+
+        visits, article_views = self._split(batch)
+        try:
+            if visits:
+                db.session.execute(VisitorLog.__table__.insert(), visits)
+            if article_views:
+                db.session.execute(ArticleView.__table__.insert(), article_views)
+                increment_daily_counters(db.session, db.session.get_bind().dialect.name, article_views)
+                increment_view_counts(db.session, article_views)
+            merge_visitor_sketches(db.session, db.session.get_bind().dialect.name, visits, article_views)
+            db.session.commit()
+        except Exception as e:
+            # Log the error but don't let it affect user experience
+            logger.error(f"Visitor tracking error: {str(e)}")
+            db.session.rollback()
+            self._count('errors')
+            self._count('dropped', len(batch))
+            return
+        self._count('batches')
+        self._count('written', len(batch))
+        self._notify_view_listeners(article_views)
+
+    def _notify_view_listeners(self, article_views: List[Dict[str, Any]]) -> None:
+        """Pass committed article views to the view listeners."""
+        if not article_views:
+            return
+        for listener in self._view_listeners:
+            try:
+                listener(article_views)
+            except Exception as e:
+                logger.error(f"Article view listener failed: {str(e)}")
+
+    @staticmethod
+    def _split(batch: List[TrackingEvent]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Split events into visitor_logs rows and article_views rows."""
+        visits = [visit for visit, _ in batch if visit is not None]
+        article_views = [view for _, view in batch if view is not None]
+        return visits, article_views
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[counter] += amount
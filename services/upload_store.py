@@ -0,0 +1,285 @@
+"""
+Content-addressed upload store for the Academic Journal Submission System.
+
+Manuscripts, revisions and copy-edited documents were saved with
+FileStorage.save() into one flat folder under timestamped names, so the same
+file uploaded twice was stored twice and nothing recorded its size or
+checksum. Uploads now go through an UploadStore:
+
+- The upload is streamed to a temporary file in fixed-size chunks
+  (UPLOAD_CHUNK_SIZE) while its SHA-256 digest and size are computed, so
+  memory use does not depend on the file size.
+- The file is stored under its digest, sharded by the first two pairs of hex
+  digits (objects/ab/cd/abcd...ef.pdf), which keeps every directory small.
+  The extension is kept so the file is served with the right type.
+- A file whose content is already stored is not written again: the same
+  digest and extension reuse the stored file, and the same digest with
+  another extension gets a hard link to it.
+- Every stored path has a stored_files row with its digest, size and a
+  reference count, written in the caller's transaction. verify() re-hashes a
+  file for integrity checks; sweep() removes files no longer referenced
+  (setup/verify_uploads.py runs both).
+
+Stored paths are relative to UPLOAD_FOLDER, like the timestamped names
+before them, so existing rows and the /uploads/ URLs keep working.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+from typing import List, NamedTuple, Optional
+
+from flask import current_app
+from werkzeug.utils import secure_filename
+
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Directory under UPLOAD_FOLDER holding the stored files, and its temporary files
+OBJECTS_DIR = 'objects'
+TEMP_DIR = os.path.join(OBJECTS_DIR, 'tmp')
+
+# Shard directories: this many levels of this many hex digits of the digest
+SHARD_LEVELS = 2
+SHARD_WIDTH = 2
+
+
+class StoredUpload(NamedTuple):
+    """Where an upload was stored and what it contains."""
+
+    path: str  # Relative to UPLOAD_FOLDER
+    sha256: str
+    size: int
+    deduplicated: bool  # True if the content was already stored
+
+
+def object_path(sha256: str, extension: str = '') -> str:
+    """
+    Build the stored path of a file from its digest.
+
+    Args:
+        sha256: Hex SHA-256 digest of the content
+        extension: File extension without the dot ('' for none)
+
+    Returns:
+        str: Path relative to UPLOAD_FOLDER, e.g. objects/ab/cd/abcd...ef.pdf
+    """
+    shards = [sha256[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH] for i in range(SHARD_LEVELS)]
+    name = f'{sha256}.{extension}' if extension else sha256
+    return '/'.join([OBJECTS_DIR, *shards, name])
+
+
+def file_extension(filename: Optional[str]) -> str:
+    """Lower-case extension of an uploaded file name ('' if it has none)."""
+    filename = secure_filename(filename or '')
+    return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+
+
+class UploadStore:
+    """Streams uploads into content-addressed, sharded storage under UPLOAD_FOLDER."""
+
+    def __init__(self, chunk_size: int = 64 * 1024):
+        """
+        Create an upload store.
+
+        Args:
+            chunk_size: Bytes read and written at a time while streaming an upload
+        """
+        self.chunk_size = chunk_size
+
+    @property
+    def root(self) -> str:
+        """Upload folder of the current app."""
+        return current_app.config['UPLOAD_FOLDER']
+
+    def absolute_path(self, path: str) -> str:
+        """Absolute location of a stored path."""
+        return os.path.join(self.root, *path.split('/'))
+
+    def save(self, file, filename: Optional[str] = None) -> StoredUpload:
+        """
+        Store an uploaded file and add a reference to it in the current session.
+
+        The caller commits; if the transaction is rolled back the stored file
+        stays on disk and is reused by the next upload of the same content.
+
+        Args:
+            file: Uploaded FileStorage (or any object with a readable stream)
+            filename: Name to take the extension from (defaults to file.filename)
+
+        Returns:
+            StoredUpload: Stored path, digest and size
+        """
+        from models import StoredFile
+
+        extension = file_extension(filename or getattr(file, 'filename', None))
+        temp_dir = self.absolute_path(TEMP_DIR)
+        os.makedirs(temp_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir)
+        try:
+            sha256, size = self._stream(getattr(file, 'stream', file), fd)
+            path = object_path(sha256, extension)
+            absolute = self.absolute_path(path)
+            deduplicated = os.path.exists(absolute)
+            if not deduplicated:
+                os.makedirs(os.path.dirname(absolute), exist_ok=True)
+                same_content = db.session.query(StoredFile.path).filter(
+                    StoredFile.sha256 == sha256, StoredFile.path != path
+                ).first()
+                if same_content is not None and self._link(self.absolute_path(same_content.path), absolute):
+                    deduplicated = True
+                else:
+                    os.replace(temp_path, absolute)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+        self._reference(path, sha256, size)
+        logger.debug(f"Stored upload {path} ({size} bytes{', deduplicated' if deduplicated else ''})")
+        return StoredUpload(path, sha256, size, deduplicated)
+
+    def _stream(self, stream, fd: int):
+        """Copy a stream into an open file descriptor in chunks; returns (hex digest, size)."""
+        digest = hashlib.sha256()
+        size = 0
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = stream.read(self.chunk_size)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+        return digest.hexdigest(), size
+
+    @staticmethod
+    def _link(source: str, target: str) -> bool:
+        """Hard-link a stored file under another name; False if the file system cannot."""
+        try:
+            os.link(source, target)
+            return True
+        except FileExistsError:
+            return True
+        except OSError as e:
+            logger.debug(f"Could not hard-link {source}: {str(e)}")
+            return False
+
+    def _reference(self, path: str, sha256: str, size: int) -> None:
+        """Insert the stored_files row of a path, or add a reference to it."""
+        from models import StoredFile
+
+        table = StoredFile.__table__
+        row = {'path': path, 'sha256': sha256, 'size': size, 'ref_count': 1}
+        dialect_name = db.session.get_bind().dialect.name
+        if dialect_name in ('sqlite', 'postgresql'):
+            if dialect_name == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            db.session.execute(insert(table).values(row).on_conflict_do_update(
+                index_elements=[table.c.path], set_={'ref_count': table.c.ref_count + 1}
+            ))
+            return
+        if not self.add_reference(path):
+            db.session.execute(table.insert().values(row))
+
+    def add_reference(self, path: Optional[str]) -> bool:
+        """
+        Count another use of a stored path (a copyedit reusing a manuscript).
+
+        Args:
+            path: Stored path
+
+        Returns:
+            bool: False if the path is not in the store (files saved before it)
+        """
+        from models import StoredFile
+
+        if not path:
+            return False
+        table = StoredFile.__table__
+        result = db.session.execute(
+            db.update(table).where(table.c.path == path).values(ref_count=table.c.ref_count + 1)
+        )
+        return result.rowcount > 0
+
+    def release(self, path: Optional[str]) -> bool:
+        """
+        Drop one use of a stored path; sweep() removes it once nothing uses it.
+
+        Args:
+            path: Stored path
+
+        Returns:
+            bool: False if the path is not in the store
+        """
+        from models import StoredFile
+
+        if not path:
+            return False
+        table = StoredFile.__table__
+        result = db.session.execute(
+            db.update(table).where(table.c.path == path, table.c.ref_count > 0)
+            .values(ref_count=table.c.ref_count - 1)
+        )
+        return result.rowcount > 0
+
+    def verify(self, stored_file) -> bool:
+        """
+        Check that a stored file is on disk with the recorded size and digest.
+
+        Args:
+            stored_file: StoredFile row
+
+        Returns:
+            bool: True if the file is intact
+        """
+        absolute = self.absolute_path(stored_file.path)
+        try:
+            if os.path.getsize(absolute) != stored_file.size:
+                return False
+            digest = hashlib.sha256()
+            with open(absolute, 'rb') as f:
+                for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                    digest.update(chunk)
+        except OSError:
+            return False
+        return digest.hexdigest() == stored_file.sha256
+
+    def verify_all(self) -> List[str]:
+        """
+        Verify every stored file.
+
+        Returns:
+            list: Paths of the files that are missing or do not match their digest
+        """
+        from models import StoredFile
+
+        return [stored_file.path for stored_file in StoredFile.query.order_by(StoredFile.id).yield_per(500)
+                if not self.verify(stored_file)]
+
+    def sweep(self) -> int:
+        """
+        Delete the stored files nothing references any more, and their rows. Commits.
+
+        Returns:
+            int: Number of files removed
+        """
+        from models import StoredFile
+
+        unreferenced = StoredFile.query.filter(StoredFile.ref_count <= 0).all()
+        for stored_file in unreferenced:
+            try:
+                os.unlink(self.absolute_path(stored_file.path))
+            except FileNotFoundError:
+                pass
+            db.session.delete(stored_file)
+        db.session.commit()
+        if unreferenced:
+            logger.info(f"Removed {len(unreferenced)} unreferenced uploads")
+        return len(unreferenced)
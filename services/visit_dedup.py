@@ -0,0 +1,165 @@
+"""
+Visit deduplication for the Academic Journal Submission System.
+
+A visitor's repeated requests for the same path are only tracked once per
+window. Previously this was remembered in the signed session cookie with one
+key per path, so the cookie grew with every page a visitor opened. The
+deduplicator keeps that state server-side instead, in a rotating pair of
+Bloom filters with a fixed memory budget:
+
+- Time is split into generations of TRACKING_DEDUP_WINDOW seconds. Visits are
+  added to the current generation and looked up in the current and previous
+  ones, so a repeat is suppressed for between one and two windows.
+- When a new generation starts, the older filter is cleared and reused.
+- With TRACKING_DEDUP_FILE set the filters live in a memory-mapped file, so
+  every worker process on the host shares them; otherwise each worker keeps
+  its own copy.
+
+A Bloom filter can report false positives (a first visit treated as a repeat)
+but never false negatives. The hash count is chosen from the memory budget
+and TRACKING_DEDUP_CAPACITY, the number of distinct visits expected per window.
+"""
+
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Header: the epoch held by each of the two generation slots
+_HEADER = struct.Struct('<qq')
+_HASH = struct.Struct('<QQ')
+_MAX_HASHES = 16
+
+
+def visitor_key(user, request) -> str:
+    """
+    Identify the visitor for deduplication without storing anything in the session.
+
+    Args:
+        user: The current user (flask_login current_user)
+        request: The current Flask request
+
+    Returns:
+        str: 'user:<id>' for logged-in users, otherwise IP address and user agent
+    """
+    if user.is_authenticated:
+        return f'user:{user.id}'
+    return f"ip:{request.remote_addr}|{request.headers.get('User-Agent', '')}"
+
+
+class VisitDeduplicator:
+    """Rotating Bloom filter answering "was this visit tracked recently?"."""
+
+    def __init__(self, window: float = 600, memory_kb: int = 256, capacity: int = 50000,
+                 path: Optional[str] = None):
+        """
+        Create a deduplicator.
+
+        Args:
+            window: Seconds per generation; repeats are suppressed for 1-2 windows
+            memory_kb: Total memory for both generations, in kilobytes
+            capacity: Distinct visits expected per window, used to pick the hash count
+            path: File to memory-map so worker processes share the filters
+        """
+        self.window = window
+        self.generation_bytes = max(64, memory_kb * 1024 // 2)
+        self.bits = self.generation_bytes * 8
+        self.hashes = max(1, min(_MAX_HASHES, round(self.bits / max(capacity, 1) * math.log(2))))
+        self.shared = bool(path)
+        self.counters = {'hits': 0, 'misses': 0, 'rotations': 0}
+        self._lock = threading.Lock()
+
+        size = _HEADER.size + 2 * self.generation_bytes
+        self._buffer = self._map_file(path, size) if path else bytearray(size)
+
+    @staticmethod
+    def _map_file(path: str, size: int) -> mmap.mmap:
+        """Open (or create) the shared filter file and map it into memory."""
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size != size:
+                # New file or a changed memory budget: start from empty filters
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+            return mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+    def seen(self, key: str, now: Optional[float] = None) -> bool:
+        """
+        Check a visit and remember it if it is new.
+
+        Args:
+            key: Visitor and path identifying the visit
+            now: Current time in seconds since the epoch (defaults to time.time())
+
+        Returns:
+            bool: True if the visit was already tracked within the window
+        """
+        positions = self._positions(key)
+        epoch = int((time.time() if now is None else now) // self.window)
+
+        with self._lock:
+            current = self._generation(epoch)
+            previous = self._offset(epoch - 1)
+            if self._contains(current, positions) or (
+                    previous is not None and self._contains(previous, positions)):
+                self.counters['hits'] += 1
+                return True
+            self._add(current, positions)
+            self.counters['misses'] += 1
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters, the hit rate and the memory in use."""
+        with self._lock:
+            snapshot: Dict[str, Any] = dict(self.counters)
+        checked = snapshot['hits'] + snapshot['misses']
+        snapshot['hit_rate'] = snapshot['hits'] / checked if checked else 0.0
+        snapshot['memory_bytes'] = len(self._buffer)
+        snapshot['hashes'] = self.hashes
+        snapshot['shared'] = self.shared
+        return snapshot
+
+    def _positions(self, key: str) -> List[int]:
+        """Bit positions for a key, by double hashing one 128-bit digest."""
+        h1, h2 = _HASH.unpack(hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest())
+        h2 |= 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def _offset(self, epoch: int) -> Optional[int]:
+        """Byte offset of the filter holding epoch, or None if it has been rotated out."""
+        slot = epoch % 2
+        if _HEADER.unpack_from(self._buffer, 0)[slot] != epoch:
+            return None
+        return _HEADER.size + slot * self.generation_bytes
+
+    def _generation(self, epoch: int) -> int:
+        """Byte offset of the filter for epoch, clearing the stale one it replaces."""
+        offset = self._offset(epoch)
+        if offset is not None:
+            return offset
+
+        slot = epoch % 2
+        offset = _HEADER.size + slot * self.generation_bytes
+        self._buffer[offset:offset + self.generation_bytes] = bytes(self.generation_bytes)
+        struct.pack_into('<q', self._buffer, slot * 8, epoch)
+        self.counters['rotations'] += 1
+        return offset
+
+    def _contains(self, offset: int, positions: List[int]) -> bool:
+        buffer = self._buffer
+        return all(buffer[offset + (p >> 3)] & (1 << (p & 7)) for p in positions)
+
+    def _add(self, offset: int, positions: List[int]) -> None:
+        buffer = self._buffer
+        for p in positions:
+            buffer[offset + (p >> 3)] |= 1 << (p & 7)
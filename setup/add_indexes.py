@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Add Indexes Script for Academic Journal Submission System
+
+This script creates the indexes declared in models.py that an existing
+database is missing. It can be run any number of times; indexes that already
+exist are left alone. On PostgreSQL the indexes are built with
+CREATE INDEX CONCURRENTLY so the tables stay writable while they are built.
+Usage: python add_indexes.py [--dry-run]
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    """Main function to parse arguments and create the missing indexes"""
+    parser = argparse.ArgumentParser(description='Create the indexes missing from an existing database')
+    parser.add_argument('--dry-run', action='store_true', help='Only list the missing indexes')
+    args = parser.parse_args()
+
+    from app import create_app
+    from services.indexes import missing_indexes, create_missing_indexes
+
+    app = create_app()
+    with app.app_context():
+        missing = missing_indexes()
+        if not missing:
+            print("All indexes are present.")
+            return
+        for index in missing:
+            columns = ', '.join(column.name for column in index.columns)
+            print(f"Missing: {index.name} ON {index.table.name} ({columns})")
+        if args.dry_run:
+            return
+        created = create_missing_indexes(concurrently=True)
+        print(f"Created {len(created)} indexes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -38,6 +38,11 @@ CREATE TABLE IF NOT EXISTS submissions (
     author_id INTEGER NOT NULL,
     submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    total_reviews INTEGER NOT NULL DEFAULT 0,
+    completed_reviews INTEGER NOT NULL DEFAULT 0,
+    pending_reviews INTEGER NOT NULL DEFAULT 0,
+    oldest_pending_due TIMESTAMP,
+    view_count INTEGER NOT NULL DEFAULT 0,
     FOREIGN KEY (author_id) REFERENCES users(id)
 );
 
@@ -118,8 +123,13 @@ CREATE INDEX IF NOT EXISTS idx_user_email ON users(email);
 CREATE INDEX IF NOT EXISTS idx_sessions_token ON sessions(token);
 CREATE INDEX IF NOT EXISTS idx_submissions_author ON submissions(author_id);
 CREATE INDEX IF NOT EXISTS idx_submissions_status ON submissions(status);
+CREATE INDEX IF NOT EXISTS ix_submissions_status_submitted_at ON submissions(status, submitted_at);
+CREATE INDEX IF NOT EXISTS ix_submissions_status_updated_at ON submissions(status, updated_at);
+CREATE INDEX IF NOT EXISTS ix_submissions_author_submitted_at ON submissions(author_id, submitted_at);
 CREATE INDEX IF NOT EXISTS idx_reviews_submission ON reviews(submission_id);
 CREATE INDEX IF NOT EXISTS idx_reviews_reviewer ON reviews(reviewer_id);
+CREATE INDEX IF NOT EXISTS ix_reviews_reviewer_status_due_date ON reviews(reviewer_id, status, due_date);
+CREATE INDEX IF NOT EXISTS ix_reviews_submission_status ON reviews(submission_id, status);
 CREATE INDEX IF NOT EXISTS idx_decisions_submission ON decisions(submission_id);
 CREATE INDEX IF NOT EXISTS idx_notifications_user ON notifications(user_id);
 CREATE INDEX IF NOT EXISTS idx_notifications_read ON notifications(read);
\ No newline at end of file
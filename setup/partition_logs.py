@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Partition Visitor Logs Script for Academic Journal Submission System
+
+This script converts the visitor_logs and article_views tables of an existing
+PostgreSQL database to monthly partitions, keeping their rows. New databases
+are partitioned automatically on startup; existing tables with rows are only
+converted by this script, preferably during a maintenance window since the
+tables are locked while their rows are copied.
+Usage: python partition_logs.py [--table TABLE]
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    """Main function to parse arguments and convert the tables"""
+    parser = argparse.ArgumentParser(description='Convert visitor log tables to monthly partitions')
+    parser.add_argument('--table', choices=['visitor_logs', 'article_views'],
+                        help='Convert only this table')
+    args = parser.parse_args()
+
+    from app import create_app, db
+    from services.log_retention import PARTITIONED_TABLES
+
+    app = create_app()
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            print("Partitioning is only used on PostgreSQL; SQLite rotates old months into shadow tables.")
+            sys.exit(1)
+
+        retention = app.extensions['log_retention']
+        for table in [args.table] if args.table else PARTITIONED_TABLES:
+            if retention.partitions(table):
+                print(f"{table} is already partitioned.")
+                continue
+            print(f"Converting {table}...")
+            retention.convert_to_partitioned(table)
+        retention.ensure_storage()
+        print("Visitor log partitioning complete!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Rebuild Search Index Script for Academic Journal Submission System
+
+This script re-indexes every published article for the /browse full-text
+search. The index is normally kept up to date as articles are published,
+unpublished and edited; run this after bulk changes made outside the
+application.
+Usage: python rebuild_search_index.py
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    """Main function to parse arguments and rebuild the search index"""
+    parser = argparse.ArgumentParser(description='Re-index the published articles for full-text search')
+    parser.parse_args()
+
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        search_index = app.extensions['search_index']
+        if not search_index.available:
+            print("Full-text search is unavailable on this database (see the application log).")
+            sys.exit(1)
+        indexed = search_index.rebuild()
+        print(f"Search index rebuilt ({indexed} articles indexed).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Reconcile Submission Counters Script for Academic Journal Submission System
+
+This script recomputes every submission's review counters (total, completed,
+pending, oldest pending due date) from the reviews table and its view count
+from the daily article view counters. The counters are normally kept up to
+date as reviews and views are written; run this after bulk changes made
+outside the application, or to check for drift.
+Usage: python reconcile_counters.py
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    """Main function to parse arguments and reconcile the counters"""
+    parser = argparse.ArgumentParser(description='Recompute the denormalized submission counters')
+    parser.parse_args()
+
+    from app import create_app
+    from services.submission_counters import reconcile_counters
+
+    app = create_app()
+    with app.app_context():
+        corrected = reconcile_counters()
+        print(f"Submission counters reconciled ({corrected} submissions corrected).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Verify Uploads Script for Academic Journal Submission System
+
+This script re-hashes every file in the content-addressed upload store and
+reports the ones that are missing or no longer match their recorded size and
+SHA-256 digest. With --sweep it also deletes the stored files that no
+submission or copyedit references any more.
+Usage: python verify_uploads.py [--sweep]
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    """Main function to parse arguments and verify the stored uploads"""
+    parser = argparse.ArgumentParser(description='Check stored uploads against their digests')
+    parser.add_argument('--sweep', action='store_true', help='Delete stored files that are no longer referenced')
+    args = parser.parse_args()
+
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        store = app.extensions['upload_store']
+        damaged = store.verify_all()
+        for path in damaged:
+            print(f"Missing or damaged: {path}")
+        print(f"Stored uploads verified ({len(damaged)} missing or damaged).")
+
+        if args.sweep:
+            removed = store.sweep()
+            print(f"Unreferenced uploads removed: {removed}.")
+
+    return 1 if damaged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Tests for the analytics rollups.
+
+This module checks that totals read from the hourly and daily rollups plus the
+raw tail match the same totals computed directly from the raw log tables. With
+only a handful of visitor IPs the unique visitor sketches are exact as well.
+The analytics page only reads: rolling up is left to the tracking writer.
+Its most viewed article is the all-time leader, whatever the period.
+"""
+
+import random
+import unittest
+from datetime import datetime, timedelta
+
+from flask import g
+from sqlalchemy import func
+
+from app import create_app, db
+from models import (
+    User, Submission, VisitorLog, ArticleView, UserActivity, VisitRollup, RollupWatermark
+)
+from services.analytics_rollups import run_rollups, summarize, get_watermarks, _advance
+from services.visitor_sketches import rebuild_sketches
+
+NOW = datetime(2026, 3, 10, 15, 30)
+
+
+def raw_summary(start):
+    """Compute the analytics totals straight from the raw tables, as the view used to."""
+    def since(query, column):
+        return query.filter(column >= start) if start is not None else query
+
+    visits = since(VisitorLog.query, VisitorLog.timestamp)
+    views = since(ArticleView.query, ArticleView.timestamp)
+    activities = since(db.session.query(UserActivity.activity_type, func.count(UserActivity.id)),
+                       UserActivity.timestamp)
+    pages = since(db.session.query(VisitorLog.path, func.count(VisitorLog.id)), VisitorLog.timestamp)
+    articles = since(db.session.query(ArticleView.submission_id, func.count(ArticleView.id),
+                                      func.max(ArticleView.timestamp)), ArticleView.timestamp)
+    return {
+        'visits': {
+            'total': visits.count(),
+            'anonymous': visits.filter(VisitorLog.user_id == None).count(),
+            'unique_ips': visits.with_entities(VisitorLog.ip_address).distinct().count(),
+        },
+        'article_views': {
+            'total': views.count(),
+            'anonymous': views.filter(ArticleView.user_id == None).count(),
+        },
+        'activities': dict(activities.group_by(UserActivity.activity_type).all()),
+        'pages': dict(pages.group_by(VisitorLog.path).all()),
+        'articles': {row[0]: (row[1], row[2]) for row in articles.group_by(ArticleView.submission_id)},
+    }
+
+
+class TestAnalyticsRollups(unittest.TestCase):
+    """Test cases for the rollup job and summarize()."""
+
+    def setUp(self):
+        """Set up test case with a test app and database."""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.random = random.Random(7)
+
+    def tearDown(self):
+        """Clean up after test case."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def add_events(self, start, end, count):
+        """Insert random raw events with timestamps in [start, end)."""
+        span = (end - start).total_seconds()
+        for _ in range(count):
+            timestamp = start + timedelta(seconds=self.random.uniform(0, span))
+            user_id = self.random.choice([None, None, 1, 2])
+            ip_address = self.random.choice(['10.0.0.1', '10.0.0.2', '10.0.0.3', None])
+            db.session.add(VisitorLog(user_id=user_id, ip_address=ip_address, timestamp=timestamp,
+                                      path=self.random.choice(['/', '/browse', '/issues', '/articles/1'])))
+            db.session.add(ArticleView(submission_id=self.random.choice([1, 2, 3]), user_id=user_id,
+                                       ip_address=ip_address, timestamp=timestamp))
+            db.session.add(UserActivity(user_id=self.random.choice([1, 2]), timestamp=timestamp,
+                                        activity_type=self.random.choice(['login', 'review', 'submission'])))
+        db.session.commit()
+        # The rows bypass the tracking writer, so build their visitor sketches
+        rebuild_sketches()
+
+    def assertMatchesRaw(self, start):
+        expected = raw_summary(start)
+        actual = summarize(start, limit=100)
+        self.assertEqual(actual['visits'], expected['visits'])
+        self.assertEqual(actual['article_views'], expected['article_views'])
+        self.assertEqual(actual['activities'], expected['activities'])
+        self.assertEqual(dict(actual['popular_pages']), expected['pages'])
+        self.assertEqual({submission_id: (count, last) for submission_id, count, last in actual['popular_articles']},
+                         expected['articles'])
+
+    def test_rollups_match_raw_tables(self):
+        """Test that rollups plus the raw tail give exactly the raw-table totals."""
+        self.add_events(NOW - timedelta(days=9), NOW, 400)
+
+        rolled = run_rollups(now=NOW, lag=120)
+        self.assertEqual(get_watermarks(), {'hour': datetime(2026, 3, 10, 15), 'day': datetime(2026, 3, 10)})
+        self.assertEqual(rolled['days'], 9)
+        self.assertTrue(VisitRollup.query.filter_by(granularity='day').count() > 0)
+
+        today = datetime(2026, 3, 10)
+        for start in [None, today, today - timedelta(days=1), today - timedelta(days=7), datetime(2000, 1, 1)]:
+            self.assertMatchesRaw(start)
+
+    def test_incremental_runs(self):
+        """Test that later runs only roll up new hours and stay exact."""
+        self.add_events(NOW - timedelta(days=2), NOW, 150)
+        run_rollups(now=NOW, lag=120)
+        self.assertEqual(run_rollups(now=NOW, lag=120), {'hours': 0, 'days': 0})
+
+        later = NOW + timedelta(days=1, hours=3)
+        self.add_events(NOW, later, 150)
+        rolled = run_rollups(now=later, lag=120)
+        self.assertEqual(rolled, {'hours': 27, 'days': 1})
+
+        today = datetime(2026, 3, 11)
+        for start in [None, today, today - timedelta(days=2)]:
+            self.assertMatchesRaw(start)
+
+    def test_summary_without_rollups(self):
+        """Test that summarize() falls back to the raw tables before the first run."""
+        self.add_events(NOW - timedelta(days=1), NOW, 50)
+        self.assertMatchesRaw(None)
+        self.assertMatchesRaw(datetime(2026, 3, 10))
+
+    def test_analytics_page_does_not_roll_up(self):
+        """Test that loading the analytics page reads the raw tail instead of running the rollup job."""
+        # serve_css is only registered on the module-level app
+        self.app.add_url_rule('/css/<path:filename>', 'serve_css', lambda filename: '')
+        now = datetime.utcnow()
+        self.add_events(now - timedelta(days=3), now - timedelta(hours=2), 40)
+        admin = User('Rollup Admin', 'rollup-admin@example.com', 'password', 'admin')
+        db.session.add(admin)
+        db.session.commit()
+
+        client = self.app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(admin.id)
+            session['_fresh'] = True
+        g.pop('_login_user', None)
+        self.assertEqual(client.get('/admin/analytics/week').status_code, 200)
+        self.assertEqual(get_watermarks(), {'hour': None, 'day': None})
+        self.assertEqual(VisitRollup.query.count(), 0)
+
+    def test_most_viewed_is_all_time(self):
+        """Test that the most viewed article is the all-time leader whatever period is shown."""
+        self.app.add_url_rule('/css/<path:filename>', 'serve_css', lambda filename: '')
+        admin = User('Rollup Admin', 'rollup-admin@example.com', 'password', 'admin')
+        db.session.add(admin)
+        db.session.flush()
+        classic, recent = [
+            Submission(title=title, authors='A. Author', abstract='Abstract.', category='physics',
+                       file_path='paper.pdf', author_id=admin.id)
+            for title in ('Classic article', 'Recent article')
+        ]
+        db.session.add_all([classic, recent])
+        db.session.commit()
+        now = datetime.utcnow()
+        for _ in range(5):
+            db.session.add(ArticleView(submission_id=classic.id, timestamp=now - timedelta(days=200)))
+        db.session.add(ArticleView(submission_id=recent.id, timestamp=now))
+        db.session.commit()
+
+        client = self.app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(admin.id)
+            session['_fresh'] = True
+        g.pop('_login_user', None)
+        for period in ('today', 'all'):
+            html = client.get(f'/admin/analytics/{period}').get_data(as_text=True)
+            self.assertIn('Most viewed: <span class="fw-bold">Classic article</span>', html, period)
+
+    def test_watermark_compare_and_set(self):
+        """Test that a watermark is only advanced from the value it was read at."""
+        run_rollups(now=NOW, lag=0)
+        mark = get_watermarks()['hour']
+        self.assertFalse(_advance('hour', mark - timedelta(hours=1), mark + timedelta(hours=1)))
+        self.assertTrue(_advance('hour', mark, mark + timedelta(hours=1)))
+        db.session.commit()
+        self.assertEqual(db.session.get(RollupWatermark, 'hour').rolled_until, mark + timedelta(hours=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
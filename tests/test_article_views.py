@@ -0,0 +1,87 @@
+"""
+Tests for article view counting.
+
+This module checks that article views are counted once per visitor and
+article, that the daily counters are kept in step with the raw log, and that
+page tracking no longer records article views of its own.
+"""
+
+import unittest
+from datetime import datetime, timedelta
+
+from app import create_app, db
+from models import User, Submission, ArticleView, ArticleViewDaily
+from services.article_views import rebuild_daily_counters
+
+
+class TestArticleViews(unittest.TestCase):
+    """Test cases for the article view counter and daily counters."""
+
+    def setUp(self):
+        """Set up test case with a test app and database."""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        author = User(name='Test Author', email='views-author@example.com', password='password', role='author')
+        db.session.add(author)
+        db.session.commit()
+        self.submission_ids = []
+        for title in ['First', 'Second']:
+            submission = Submission(title=title, authors='Test Author', abstract='Abstract',
+                                    category='physics', file_path='paper.pdf', author_id=author.id)
+            db.session.add(submission)
+            db.session.commit()
+            self.submission_ids.append(submission.id)
+
+    def tearDown(self):
+        """Clean up after test case."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_views_deduplicated_per_visitor_and_article(self):
+        """Test that repeat views by the same visitor are counted once."""
+        counter = self.app.extensions['article_views']
+        first, second = self.submission_ids
+
+        self.assertTrue(counter.record(first, 'ip:10.0.0.1|Browser', None, '10.0.0.1'))
+        self.assertFalse(counter.record(first, 'ip:10.0.0.1|Browser', None, '10.0.0.1'))
+        self.assertTrue(counter.record(first, 'user:7', 7, '10.0.0.2'))
+        self.assertTrue(counter.record(second, 'ip:10.0.0.1|Browser', None, '10.0.0.1'))
+
+        self.assertEqual(ArticleView.query.count(), 3)
+        self.assertEqual(ArticleViewDaily.totals(), {first: 2, second: 1})
+        row = ArticleViewDaily.query.filter_by(submission_id=first).one()
+        self.assertEqual((row.views, row.anonymous_views), (2, 1))
+
+    def test_page_tracking_does_not_count_article_views(self):
+        """Test that visiting an article path only records the visit."""
+        with self.app.test_request_context(f'/articles/{self.submission_ids[0]}'):
+            self.app.preprocess_request()
+        self.assertEqual(ArticleView.query.count(), 0)
+
+    def test_rebuild_matches_log(self):
+        """Test that rebuilding the counters from article_views gives per-day totals."""
+        first, second = self.submission_ids
+        today = datetime.utcnow()
+        for submission_id, user_id, timestamp in [
+            (first, None, today),
+            (first, 3, today),
+            (first, None, today - timedelta(days=1)),
+            (second, None, today),
+        ]:
+            db.session.add(ArticleView(submission_id=submission_id, user_id=user_id, timestamp=timestamp))
+        db.session.commit()
+
+        self.assertEqual(rebuild_daily_counters(), 3)
+        self.assertEqual(ArticleViewDaily.totals(), {first: 3, second: 1})
+        self.assertEqual(ArticleViewDaily.totals([first], since=today.date()), {first: 2})
+        self.assertEqual(ArticleViewDaily.totals([]), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
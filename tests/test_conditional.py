@@ -0,0 +1,155 @@
+"""
+Tests for conditional article and issue responses.
+
+This module checks that anonymous article and issue pages carry an ETag (and
+no Last-Modified), that matching If-None-Match requests are answered with 304 after a single validator query (with and without the page
+cache), that edits, publishing, views and setting changes change the
+validators, and that logged-in users and unpublished articles get none.
+"""
+
+import unittest
+from datetime import datetime, timedelta
+
+from flask import g
+from sqlalchemy import event
+from werkzeug.http import http_date
+
+from app import create_app, db
+from models import User, Submission, Issue, Publication, ArticleView, SystemSetting
+from services.submission_counters import increment_view_counts
+
+
+class TestConditional(unittest.TestCase):
+    """Test cases for the article and issue validators."""
+
+    def setUp(self):
+        """Set up test case with a test app, database and one published article."""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        # serve_css and serve_uploads are only registered on the module-level app
+        self.app.add_url_rule('/css/<path:filename>', 'serve_css', lambda filename: '')
+        self.app.add_url_rule('/uploads/<path:filename>', 'serve_uploads', lambda filename: '')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.page_cache = self.app.extensions['page_cache']
+
+        self.author = User('Conditional Author', 'conditional-author@example.com', 'password', 'author')
+        db.session.add(self.author)
+        self.issue = Issue(volume=1, issue_number=1, title='Issue 1.1', description='First issue',
+                           status='published')
+        db.session.add(self.issue)
+        db.session.commit()
+        self.article = self.add_article('Conditional article')
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        """Clean up after test case."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def add_article(self, title, publish=True):
+        """Add a submission with a publication, published unless told otherwise."""
+        submission = Submission(title=title, authors='A. Author', abstract='Abstract.', category='physics',
+                                file_path='paper.pdf', author_id=self.author.id)
+        db.session.add(submission)
+        db.session.flush()
+        publication = Publication(submission_id=submission.id, issue_id=self.issue.id)
+        if publish:
+            publication.publish()
+        db.session.add(publication)
+        db.session.commit()
+        return submission
+
+    def etag(self, url):
+        """ETag of a fresh response, bypassing the page cache."""
+        self.page_cache.invalidate()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.get_etag()[0]
+
+    def test_validators_and_not_modified(self):
+        """Test that both pages carry validators and matching requests get an empty 304."""
+        for url in (f'/articles/{self.article.id}', f'/issues/{self.issue.id}'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            etag, weak = response.get_etag()
+            self.assertFalse(weak)
+            self.assertIsNone(response.last_modified)
+            self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+            self.assertIn('Cookie', response.vary)
+
+            # From the page cache, then from the view with the cache emptied
+            for _ in range(2):
+                revalidated = self.client.get(url, headers={'If-None-Match': f'"{etag}"'})
+                self.assertEqual(revalidated.status_code, 304, url)
+                self.assertEqual(revalidated.get_data(), b'')
+                self.assertEqual(revalidated.get_etag()[0], etag)
+                self.page_cache.invalidate()
+
+            # Without a Last-Modified there is nothing for If-Modified-Since to match
+            since = http_date(datetime.utcnow() + timedelta(days=1))
+            self.assertEqual(self.client.get(url, headers={'If-Modified-Since': since}).status_code, 200)
+            self.assertEqual(self.client.get(url, headers={'If-None-Match': '"other"'}).status_code, 200)
+
+    def test_not_modified_runs_one_query(self):
+        """Test that a 304 is answered with the validator query alone, and still counts the view."""
+        url = f'/articles/{self.article.id}'
+        etag = self.etag(url)
+        self.page_cache.invalidate()
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            response = self.client.get(url, headers={'If-None-Match': f'"{etag}"'},
+                                       environ_base={'REMOTE_ADDR': '192.0.2.9'})
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        self.assertEqual(response.status_code, 304)
+        reads = [s for s in statements if s.startswith('SELECT') and ('submissions' in s or 'issues' in s)]
+        self.assertEqual(len(reads), 1)
+        self.assertEqual(ArticleView.query.filter_by(ip_address='192.0.2.9').count(), 1)
+
+    def test_changes_change_the_validators(self):
+        """Test that edits, publishing, views and setting changes give new ETags."""
+        article_url, issue_url = f'/articles/{self.article.id}', f'/issues/{self.issue.id}'
+        article_etags, issue_etags = [self.etag(article_url)], [self.etag(issue_url)]
+
+        changes = [
+            lambda: setattr(self.article, 'title', 'Renamed article'),
+            lambda: setattr(self.author, 'institution', 'Another University'),
+            lambda: setattr(self.issue, 'title', 'Renamed issue'),
+            lambda: SystemSetting.set_value('journal_name', 'Renamed Journal'),
+        ]
+        for change in changes:
+            change()
+            db.session.commit()
+            article_etags.append(self.etag(article_url))
+            issue_etags.append(self.etag(issue_url))
+        self.assertEqual(len(set(article_etags)), len(article_etags))
+        self.assertEqual(len(set(issue_etags)), 4, 'the author is not shown on the issue page')
+
+        self.add_article('Second article')
+        increment_view_counts(db.session, [{'submission_id': self.article.id}])
+        db.session.commit()
+        self.assertNotIn(self.etag(issue_url), issue_etags)
+
+    def test_logged_in_and_unpublished_get_no_validators(self):
+        """Test that logged-in users and unpublished articles are served without validators."""
+        draft = self.add_article('Draft', publish=False)
+        self.assertEqual(self.client.get(f'/articles/{draft.id}').status_code, 403)
+
+        with self.client.session_transaction() as session:
+            session['_user_id'] = str(self.author.id)
+            session['_fresh'] = True
+        g.pop('_login_user', None)
+        for url in (f'/articles/{self.article.id}', f'/articles/{draft.id}', f'/issues/{self.issue.id}'):
+            response = self.client.get(url, headers={'If-None-Match': '*'})
+            self.assertEqual(response.status_code, 200, url)
+            self.assertIsNone(response.get_etag()[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
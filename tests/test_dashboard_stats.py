@@ -0,0 +1,143 @@
+"""
+Tests for the admin dashboard statistics snapshot.
+
+This module checks that the grouped queries give the same numbers as the
+per-filter COUNT queries the dashboard used before, that a cached snapshot
+costs only the version lookup, and that only committed changes to the counted
+rows invalidate it, in every worker.
+"""
+
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app import create_app, db
+from models import User, Submission, Review, Issue, DashboardStatsVersion
+from services.dashboard_stats import DashboardStats
+from services.submission_counters import increment_view_counts
+
+
+class TestDashboardStats(unittest.TestCase):
+    """Test cases for DashboardStats."""
+
+    def setUp(self):
+        """Set up test case with a test app and database."""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.editor = User('Stats Editor', 'stats-editor@example.com', 'password', 'editor')
+        self.author = User('Stats Author', 'stats-author@example.com', 'password', 'author')
+        reviewer = User('Stats Reviewer', 'stats-reviewer@example.com', 'password', 'reviewer')
+        db.session.add_all([self.editor, self.author, reviewer])
+        db.session.flush()
+        self.submissions = [
+            Submission(title=f'Paper {i}', authors='A. Author', abstract='Abstract', category='Science',
+                       file_path='paper.pdf', author_id=self.author.id, status=status)
+            for i, status in enumerate(['submitted', 'submitted', 'in_review', 'accepted', 'rejected'])
+        ]
+        db.session.add_all(self.submissions)
+        db.session.flush()
+        db.session.add(Review(submission_id=self.submissions[2].id, reviewer_id=reviewer.id,
+                              editor_id=self.editor.id, due_date=datetime.utcnow() + timedelta(days=14)))
+        db.session.add(Issue(volume=1, issue_number=1, title='Stats Issue'))
+        db.session.commit()
+
+        self.stats = self.app.extensions['dashboard_stats']
+        self.statements = []
+        event.listen(db.engine, 'before_cursor_execute', self.count_statement)
+
+    def tearDown(self):
+        """Clean up after test case."""
+        event.remove(db.engine, 'before_cursor_execute', self.count_statement)
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def count_statement(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def queries_for(self, function):
+        """Number of SQL statements issued by function()."""
+        self.statements.clear()
+        function()
+        return len(self.statements)
+
+    def test_matches_individual_counts(self):
+        """Test that the two grouped queries match the per-filter counts."""
+        self.assertEqual(self.queries_for(self.stats.get), 3)
+        stats = self.stats.get()
+        self.assertEqual(stats['users'], User.query.count())
+        self.assertEqual(stats['submissions'], Submission.query.count())
+        self.assertEqual(stats['reviews'], Review.query.count())
+        self.assertEqual(stats['issues'], Issue.query.count())
+        for role in ['admin', 'editor', 'reviewer', 'author']:
+            self.assertEqual(stats['roles'].get(role, 0), User.query.filter_by(role=role).count())
+        for status in ['submitted', 'in_review', 'accepted', 'rejected']:
+            self.assertEqual(stats['statuses'].get(status, 0), Submission.query.filter_by(status=status).count())
+
+    def test_snapshot_costs_one_lookup(self):
+        """Test that a snapshot is reused, after one version lookup, until something it counts changes."""
+        self.stats.get()
+        self.assertEqual(self.queries_for(self.stats.get), 1)
+
+        # Unrelated changes, including the view counter updates, keep the snapshot
+        version = DashboardStatsVersion.current()
+        self.editor.name = 'Renamed Editor'
+        self.submissions[0].title = 'Renamed Paper'
+        db.session.commit()
+        increment_view_counts(db.session, [{'submission_id': self.submissions[0].id}] * 3)
+        db.session.commit()
+        self.assertEqual(DashboardStatsVersion.current(), version)
+        self.assertEqual(self.queries_for(self.stats.get), 1)
+
+    def test_other_workers_see_commits(self):
+        """Test that a change committed anywhere invalidates another worker's snapshot."""
+        other_worker = DashboardStats()
+        before = other_worker.get()
+        version = DashboardStatsVersion.current()
+
+        db.session.add(User('Stats Other', 'stats-other@example.com', 'password', 'author'))
+        db.session.add(User('Stats Another', 'stats-another@example.com', 'password', 'author'))
+        db.session.commit()
+        self.assertEqual(DashboardStatsVersion.current(), version + 1)
+        self.assertEqual(other_worker.get()['users'], before['users'] + 2)
+
+    def test_committed_changes_invalidate(self):
+        """Test that new rows, role and status changes and bulk updates invalidate the snapshot."""
+        before = self.stats.get()
+
+        db.session.add(User('Stats Admin', 'stats-admin@example.com', 'password', 'admin'))
+        db.session.commit()
+        stats = self.stats.get()
+        self.assertEqual(stats['users'], before['users'] + 1)
+        self.assertEqual(stats['roles']['admin'], before['roles'].get('admin', 0) + 1)
+
+        self.submissions[0].status = 'accepted'
+        db.session.commit()
+        self.assertEqual(self.stats.get()['statuses']['accepted'], before['statuses']['accepted'] + 1)
+
+        db.session.execute(db.update(Submission).where(Submission.status == 'rejected').values(status='withdrawn'))
+        db.session.commit()
+        self.assertNotIn('rejected', self.stats.get()['statuses'])
+
+        db.session.delete(Issue.query.first())
+        db.session.commit()
+        self.assertEqual(self.stats.get()['issues'], 0)
+
+    def test_rollback_keeps_snapshot(self):
+        """Test that changes rolled back never invalidate the snapshot."""
+        self.stats.get()
+        db.session.add(User('Stats Temp', 'stats-temp@example.com', 'password', 'author'))
+        db.session.flush()
+        db.session.rollback()
+        db.session.commit()
+        self.assertEqual(self.queries_for(self.stats.get), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+"""
+Tests for access-controlled downloads.
+
+This module checks that uploads are served only to the users related to
+their submission (and to everyone once published), that Range and
+conditional requests are answered from the file, that published
+content-addressed files are marked immutable, and that downloads are handed
+to nginx or Apache when offloading is configured.
+"""
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from flask import g
+from werkzeug.exceptions import NotFound
+
+from app import create_app, db
+from models import User, Submission, Review, Issue, Publication
+from services.downloads import serve_upload, is_immutable, normalize_upload_path
+from services.upload_store import UploadStore
+
+
+class Upload:
+    """Minimal stand-in for an uploaded FileStorage: a file name and a stream."""
+
+    def __init__(self, filename, data):
+        self.filename = filename
+        self.stream = io.BytesIO(data)
+
+
+class TestDownloads(unittest.TestCase):
+    """Test cases for serve_upload."""
+
+    def setUp(self):
+        """Set up test case with a test app, database and one stored manuscript."""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        self.upload_folder = tempfile.mkdtemp()
+        self.app.config['UPLOAD_FOLDER'] = self.upload_folder
+        # serve_css and serve_uploads are only registered on the module-level app
+        self.app.add_url_rule('/css/<path:filename>', 'serve_css', lambda filename: '')
+        self.app.add_url_rule('/uploads/<path:filename>', 'serve_uploads', lambda filename: serve_upload(filename))
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.author = User('Download Author', 'download-author@example.com', 'password', 'author')
+        self.reviewer = User('Download Reviewer', 'download-reviewer@example.com', 'password', 'reviewer')
+        self.stranger = User('Download Stranger', 'download-stranger@example.com', 'password', 'author')
+        self.editor = User('Download Editor', 'download-editor@example.com', 'password', 'editor')
+        db.session.add_all([self.author, self.reviewer, self.stranger, self.editor])
+        db.session.commit()
+
+        self.data = bytes(range(256)) * 40
+        self.stored = UploadStore().save(Upload('paper.pdf', self.data))
+        self.submission = Submission(title='Download paper', authors='D. Author', abstract='Abstract.',
+                                     category='physics', file_path=self.stored.path, author_id=self.author.id)
+        db.session.add(self.submission)
+        db.session.flush()
+        db.session.add(Review(submission_id=self.submission.id, reviewer_id=self.reviewer.id,
+                              editor_id=self.editor.id, due_date=datetime.utcnow() + timedelta(days=14)))
+        db.session.commit()
+        self.url = f'/uploads/{self.stored.path}'
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        """Clean up after test case."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        shutil.rmtree(self.upload_folder)
+
+    def login(self, user):
+        """Log a user in on the test client."""
+        with self.client.session_transaction() as session:
+            session['_user_id'] = str(user.id)
+            session['_fresh'] = True
+        g.pop('_login_user', None)
+
+    def test_access_follows_the_submission(self):
+        """Test that only the author, reviewers and editors may download an unpublished manuscript."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/auth/login', response.headers['Location'])
+
+        self.login(self.stranger)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get('/uploads/objects/00/00/missing.pdf').status_code, 403)
+
+        for user in (self.author, self.reviewer, self.editor):
+            self.login(user)
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data, self.data)
+            self.assertEqual(response.mimetype, 'application/pdf')
+            self.assertEqual(response.get_etag()[0], self.stored.sha256)
+            self.assertTrue(response.cache_control.private)
+            self.assertTrue(response.cache_control.immutable)
+            response.close()
+
+    def test_traversal_is_rejected_before_access_checks(self):
+        """Test that paths with '..' segments or a leading slash are refused instead of classed as branding."""
+        # Lay the app out like the Docker image, where root_path/uploads is the upload folder
+        self.app.root_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.app.root_path)
+        os.symlink(self.upload_folder, os.path.join(self.app.root_path, 'uploads'))
+        os.makedirs(os.path.join(self.upload_folder, 'branding'))
+
+        for path in (f'branding/../{self.stored.path}', f'branding/./../{self.stored.path}'):
+            response = self.client.get(f'/uploads/{path}')
+            self.assertEqual(response.status_code, 404, path)
+        with self.app.test_request_context():
+            with self.assertRaises(NotFound):
+                serve_upload(f'/{UploadStore().absolute_path(self.stored.path)}')
+            with self.assertRaises(NotFound):
+                serve_upload(f'branding/../{self.stored.path}')
+
+        self.assertEqual(normalize_upload_path(f'objects/./{self.stored.path[8:]}'), self.stored.path)
+        self.assertIsNone(normalize_upload_path('objects/../branding/logo.png'))
+
+    def test_published_manuscripts_are_public_and_immutable(self):
+        """Test that a published manuscript is served to anyone with a long-lived public cache header."""
+        issue = Issue(volume=1, issue_number=1, title='Issue 1.1', status='published')
+        db.session.add(issue)
+        db.session.flush()
+        publication = Publication(submission_id=self.submission.id, issue_id=issue.id)
+        publication.publish()
+        db.session.add(publication)
+        db.session.commit()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.cache_control.public)
+        self.assertTrue(response.cache_control.immutable)
+        self.assertEqual(response.cache_control.max_age, self.app.config['DOWNLOAD_IMMUTABLE_MAX_AGE'])
+        response.close()
+
+        self.assertTrue(is_immutable('20250309211143_4_paper.docx'))
+        self.assertTrue(is_immutable('copyedits/20250309211143_4_paper.docx'))
+        self.assertFalse(is_immutable('demo_paper1.pdf'))
+
+    def test_range_and_conditional_requests(self):
+        """Test that Range requests get 206 with the requested bytes and matching ETags get 304."""
+        self.login(self.author)
+        response = self.client.get(self.url, headers={'Range': 'bytes=100-1123'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.headers['Content-Range'], f'bytes 100-1123/{len(self.data)}')
+        self.assertEqual(response.content_length, 1024)
+        self.assertEqual(response.data, self.data[100:1124])
+        response.close()
+
+        response = self.client.get(self.url, headers={'Range': 'bytes=-10'})
+        self.assertEqual(response.data, self.data[-10:])
+        response.close()
+
+        response = self.client.get(self.url, headers={'Range': f'bytes={len(self.data)}-'})
+        self.assertEqual(response.status_code, 416)
+
+        response = self.client.get(self.url, headers={'If-None-Match': f'"{self.stored.sha256}"'})
+        self.assertEqual(response.status_code, 304)
+        response.close()
+
+    def test_offload_to_front_end_server(self):
+        """Test that configured offloading returns a header naming the file instead of its content."""
+        self.login(self.author)
+        self.app.config['DOWNLOAD_OFFLOAD'] = 'x-accel'
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-Accel-Redirect'], f'/protected-uploads/{self.stored.path}')
+        self.assertEqual(response.data, b'')
+        self.assertEqual(response.mimetype, 'application/pdf')
+
+        self.app.config['DOWNLOAD_OFFLOAD'] = 'x-sendfile'
+        response = self.client.get(self.url)
+        self.assertEqual(response.headers['X-Sendfile'], UploadStore().absolute_path(self.stored.path))
+        self.assertNotIn('X-Accel-Redirect', response.headers)
+
+        self.login(self.stranger)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
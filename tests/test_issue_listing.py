@@ -0,0 +1,99 @@
+"""
+Tests for the paged issue listings.
+
+This module checks that the grouped publication counts match per-issue
+counts, that walking the keyset pages in either direction visits every issue
+exactly once in order, and that a page costs a single statement.
+"""
+
+import unittest
+
+from sqlalchemy import event
+
+from app import create_app, db
+from models import User, Submission, Issue, Publication
+from services.issue_listing import issue_page, issue_summary, PUBLICATION_STATUSES
+
+
+class TestIssueListing(unittest.TestCase):
+    """Test cases for issue_page and issue_summary."""
+
+    def setUp(self):
+        """Set up test case with a test app and database."""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        author = User('Listing Author', 'listing-author@example.com', 'password', 'author')
+        db.session.add(author)
+        db.session.flush()
+        # Volumes 1-4 with 1-3 issues each, so pages cut across volumes
+        self.issues = [Issue(volume=volume, issue_number=number, title=f'Issue {volume}.{number}')
+                       for volume in range(1, 5) for number in range(1, volume % 3 + 2)]
+        db.session.add_all(self.issues)
+        db.session.flush()
+        for i, issue in enumerate(self.issues):
+            for j in range(i % 4):
+                submission = Submission(title=f'Listed {i}.{j}', authors='A. Author', abstract='Abstract',
+                                        category='Science', file_path='paper.pdf', author_id=author.id)
+                db.session.add(submission)
+                db.session.flush()
+                db.session.add(Publication(submission_id=submission.id, issue_id=issue.id,
+                                           status=PUBLICATION_STATUSES[j % 3]))
+        db.session.commit()
+        self.ordered = sorted(self.issues, key=lambda issue: (issue.volume, issue.issue_number), reverse=True)
+
+    def tearDown(self):
+        """Clean up after test case."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_counts_match_per_issue_queries(self):
+        """Test that grouped counts equal counting each issue's publications."""
+        rows = issue_page(per_page=100).items
+        self.assertEqual([row.id for row in rows], [issue.id for issue in self.ordered])
+        for row in rows:
+            publications = Publication.query.filter_by(issue_id=row.id)
+            self.assertEqual(row.articles, publications.count())
+            for status in PUBLICATION_STATUSES:
+                self.assertEqual(getattr(row, status), publications.filter_by(status=status).count())
+        summary = issue_summary(self.ordered[0].id)
+        self.assertEqual(summary.articles, rows[0].articles)
+        self.assertIsNone(issue_summary(0))
+
+    def test_keyset_pages_cover_every_issue(self):
+        """Test that following older, then newer cursors visits each issue once, in order."""
+        pages = [issue_page(per_page=3)]
+        self.assertIsNone(pages[0].newer)
+        while pages[-1].older:
+            pages.append(issue_page(after=pages[-1].older, per_page=3))
+        self.assertEqual([row.id for page in pages for row in page], [issue.id for issue in self.ordered])
+
+        back = [pages[-1]]
+        while back[-1].newer:
+            back.append(issue_page(before=back[-1].newer, per_page=3))
+        self.assertEqual([[row.id for row in page] for page in reversed(back)],
+                         [[row.id for row in page] for page in pages])
+
+    def test_page_is_one_statement(self):
+        """Test that a page with its counts is fetched with a single statement."""
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', count)
+        try:
+            page = issue_page(after=f'{self.ordered[1].volume}.{self.ordered[1].issue_number}', per_page=4)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count)
+        self.assertEqual(len(statements), 1)
+        self.assertEqual([row.id for row in page], [issue.id for issue in self.ordered[2:6]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+"""
+Tests for visitor log partitioning, compaction and retention.
+
+This module checks that old months are moved out of the hot log tables only
+after they are rolled up, that expired months are dropped while the analytics
+totals and charts stay unchanged, and that table sizes are reported.
+"""
+
+import random
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import inspect, text
+
+from app import create_app, db
+from models import VisitorLog, ArticleView, UserActivity
+from routes.admin import chart_buckets
+from services.analytics_rollups import summarize, bucket_series
+from services.log_retention import LogRetention
+
+NOW = datetime(2026, 3, 10, 15, 30)
+TODAY = datetime(2026, 3, 10)
+
+
+class TestLogRetention(unittest.TestCase):
+    """Test cases for LogRetention."""
+
+    def setUp(self):
+        """Set up test case with a test app and database."""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        rng = random.Random(5)
+        start = datetime(2025, 12, 1)
+        span = (NOW - start).total_seconds()
+        for _ in range(500):
+            timestamp = start + timedelta(seconds=rng.uniform(0, span))
+            user_id = rng.choice([None, 1])
+            ip_address = rng.choice(['10.0.0.1', '10.0.0.2', '10.0.0.3'])
+            db.session.add(VisitorLog(user_id=user_id, ip_address=ip_address, timestamp=timestamp,
+                                      path=rng.choice(['/', '/browse', '/articles/1'])))
+            db.session.add(ArticleView(submission_id=rng.choice([1, 2]), user_id=user_id,
+                                       ip_address=ip_address, timestamp=timestamp))
+            db.session.add(UserActivity(user_id=1, activity_type='login', timestamp=timestamp))
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up after test case."""
+        retention = LogRetention()
+        for name in ['visitor_logs', 'article_views']:
+            for partition in retention.partitions(name):
+                db.session.execute(text(f"DROP TABLE {partition['table']}"))
+        db.session.commit()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def snapshot(self):
+        """Collect the analytics summaries and every chart series."""
+        summaries = [summarize(start, limit=100) for start in [None, TODAY - timedelta(days=30), TODAY]]
+        charts = []
+        for period in ['today', 'week', 'month', 'year', 'all']:
+            _, start, end, granularity = chart_buckets(period, TODAY)
+            charts.append([bucket_series(name, start, end, granularity) for name in ['visits', 'article_views']])
+        return summaries, charts
+
+    def test_rotates_completed_months_into_shadow_tables(self):
+        """Test that rolled-up months leave the hot table and the analytics do not change."""
+        _, start, end, granularity = chart_buckets('year', TODAY)
+        expected_chart = bucket_series('visits', start, end, granularity)
+        total = VisitorLog.query.count()
+
+        report = LogRetention(retention_days=0).run(now=NOW)
+        before = self.snapshot()
+
+        self.assertGreater(report['moved'], 0)
+        self.assertEqual(report['dropped'], [])
+        self.assertEqual(VisitorLog.query.filter(VisitorLog.timestamp < datetime(2026, 3, 1)).count(), 0)
+        tables = inspect(db.engine).get_table_names()
+        for month in ['2025_12', '2026_01', '2026_02']:
+            self.assertIn(f'visitor_logs_{month}', tables)
+            self.assertIn(f'article_views_{month}', tables)
+        self.assertNotIn('visitor_logs_2026_03', tables)
+
+        moved = sum(row['rows'] for row in LogRetention().table_sizes()
+                    if row['kind'] == 'partition' and row['table'].startswith('visitor_logs'))
+        self.assertEqual(moved + VisitorLog.query.count(), total)
+        self.assertEqual(bucket_series('visits', start, end, granularity), expected_chart)
+        self.assertEqual(before[0][0]['visits']['total'], total)
+
+        # A second pass has nothing left to move
+        self.assertEqual(LogRetention(retention_days=0).run(now=NOW)['moved'], 0)
+        self.assertEqual(self.snapshot(), before)
+
+    def test_drops_expired_months_and_keeps_aggregates(self):
+        """Test that months past the retention window are dropped while totals stay exact."""
+        LogRetention(retention_days=0).run(now=NOW)
+        before = self.snapshot()
+
+        report = LogRetention(retention_days=60).run(now=NOW)
+        self.assertEqual(report['dropped'], ['visitor_logs_2025_12', 'article_views_2025_12'])
+        tables = inspect(db.engine).get_table_names()
+        self.assertNotIn('visitor_logs_2025_12', tables)
+        self.assertIn('visitor_logs_2026_01', tables)
+        self.assertEqual(self.snapshot(), before)
+
+    def test_nothing_removed_before_compaction(self):
+        """Test that rows are neither moved nor dropped until the rollups cover them."""
+        total = VisitorLog.query.count()
+        report = LogRetention(retention_days=1, rollup_lag=86400 * 365).run(now=NOW)
+
+        self.assertEqual(report['moved'], 0)
+        self.assertEqual(report['dropped'], [])
+        self.assertEqual(VisitorLog.query.count(), total)
+
+    def test_table_sizes(self):
+        """Test that table sizes cover the hot tables, their partitions and the aggregates."""
+        LogRetention(retention_days=0).run(now=NOW)
+        sizes = {row['table']: row for row in LogRetention().table_sizes()}
+
+        self.assertEqual(sizes['visitor_logs']['kind'], 'hot')
+        self.assertEqual(sizes['visitor_logs']['rows'], VisitorLog.query.count())
+        self.assertEqual(sizes['visitor_logs_2026_01']['kind'], 'partition')
+        self.assertEqual(sizes['visit_rollups']['kind'], 'aggregate')
+        self.assertGreater(sizes['visit_rollups']['rows'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
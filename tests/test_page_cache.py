@@ -0,0 +1,193 @@
+"""
+Tests for the full-page cache.
+
+This module checks that anonymous visitors are served cached pages without
+queries, that publishing, issue edits and setting changes invalidate them
+while view counts do not, that logged-in users and visitors with flashed
+messages bypass the cache, that other workers see committed changes through
+the version row, and that cached article pages still count views.
+"""
+
+import unittest
+
+from flask import g
+from sqlalchemy import event
+
+from app import create_app, db
+from models import User, Submission, Issue, Publication, ArticleView, SystemSetting, PageCacheVersion
+from services.page_cache import PageCache
+from services.submission_counters import increment_view_counts
+
+
+class TestPageCache(unittest.TestCase):
+    """Test cases for PageCache and the cached public pages."""
+
+    def setUp(self):
+        """Set up test case with a test app, database and one published article."""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        # serve_css and serve_uploads are only registered on the module-level app
+        self.app.add_url_rule('/css/<path:filename>', 'serve_css', lambda filename: '')
+        self.app.add_url_rule('/uploads/<path:filename>', 'serve_uploads', lambda filename: '')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.page_cache = self.app.extensions['page_cache']
+        self.assertTrue(self.page_cache.enabled)
+
+        self.author = User('Cache Author', 'cache-author@example.com', 'password', 'author')
+        db.session.add(self.author)
+        self.issue = Issue(volume=1, issue_number=1, title='Issue 1.1', description='First issue',
+                           status='published')
+        db.session.add(self.issue)
+        db.session.commit()
+        self.article = self.add_article('Cached article')
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        """Clean up after test case."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def add_article(self, title, publish=True):
+        """Add a submission with a publication, published unless told otherwise."""
+        submission = Submission(title=title, authors='A. Author', abstract='Abstract.', category='physics',
+                                file_path='paper.pdf', author_id=self.author.id)
+        db.session.add(submission)
+        db.session.flush()
+        publication = Publication(submission_id=submission.id, issue_id=self.issue.id)
+        if publish:
+            publication.publish()
+        db.session.add(publication)
+        db.session.commit()
+        return submission
+
+    def get(self, url, **kwargs):
+        """GET a page and return (X-Page-Cache header, HTML)."""
+        response = self.client.get(url, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        return response.headers.get('X-Page-Cache'), response.get_data(as_text=True)
+
+    def test_anonymous_pages_are_cached(self):
+        """Test that a repeat anonymous visit is served from the cache without content queries."""
+        for url in ('/', '/browse', '/issues', '/about', '/contact', f'/articles/{self.article.id}'):
+            state, first = self.get(url)
+            self.assertEqual(state, 'miss', url)
+
+            statements = []
+            listener = lambda conn, cursor, statement, *args: statements.append(statement)
+            event.listen(db.engine, 'before_cursor_execute', listener)
+            try:
+                state, second = self.get(url)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', listener)
+            self.assertEqual(state, 'hit', url)
+            self.assertEqual(second, first)
+            self.assertFalse([s for s in statements if 'submissions' in s or 'issues' in s], url)
+
+        # The order of the query arguments does not matter
+        self.assertEqual(self.get('/browse?category=physics&sort=title_asc')[0], 'miss')
+        self.assertEqual(self.get('/browse?sort=title_asc&category=physics')[0], 'hit')
+
+    def test_publishing_and_issue_edits_invalidate(self):
+        """Test that publishing, unpublishing and editing an issue replace the cached pages."""
+        draft = self.add_article('Second article', publish=False)
+        self.get('/browse')
+        self.assertEqual(self.get('/browse')[0], 'hit')
+
+        draft.publication.publish()
+        db.session.commit()
+        state, html = self.get('/browse')
+        self.assertEqual(state, 'miss')
+        self.assertIn('Second article', html)
+
+        draft.publication.unpublish()
+        db.session.commit()
+        state, html = self.get('/browse')
+        self.assertEqual(state, 'miss')
+        self.assertNotIn('Second article', html)
+
+        self.get('/issues')
+        self.issue.title = 'Renamed issue'
+        db.session.commit()
+        state, html = self.get('/issues')
+        self.assertEqual(state, 'miss')
+        self.assertIn('Renamed issue', html)
+
+    def test_other_workers_see_commits(self):
+        """Test that a change committed in one worker makes another worker's pages stale."""
+        other_worker = PageCache(check_interval=0)
+        key = ('main.browse',)
+        other_worker.put(key, b'<html>', 'text/html', other_worker.generation)
+        self.assertIsNotNone(other_worker.get(key))
+        version = PageCacheVersion.current()
+
+        self.issue.title = 'Renamed issue'
+        self.issue.description = 'Renamed description'
+        db.session.commit()
+        self.assertEqual(PageCacheVersion.current(), version + 1)
+        self.assertIsNone(other_worker.get(key))
+
+        # Rolled back changes leave the version alone
+        self.issue.title = 'Discarded title'
+        db.session.flush()
+        db.session.rollback()
+        self.assertEqual(PageCacheVersion.current(), version + 1)
+
+        # Between checks a worker keeps its pages
+        slow_worker = PageCache(check_interval=3600)
+        slow_worker.put(key, b'<html>', 'text/html', slow_worker.generation)
+        db.session.execute(db.update(Issue).values(description='Bulk edit'))
+        db.session.commit()
+        self.assertEqual(PageCacheVersion.current(), version + 2)
+        self.assertIsNotNone(slow_worker.get(key))
+        self.assertIsNone(other_worker.get(key))
+
+    def test_settings_change_invalidates(self):
+        """Test that pages rendered with old settings are not served after a setting changes."""
+        self.get('/contact')
+        self.assertEqual(self.get('/contact')[0], 'hit')
+        SystemSetting.set_value('contact_email', 'office@example.org')
+        state, html = self.get('/contact')
+        self.assertEqual(state, 'miss')
+        self.assertIn('office@example.org', html)
+
+    def test_view_counts_do_not_invalidate(self):
+        """Test that the tracking writer's counter updates leave the cached pages alone."""
+        url = f'/articles/{self.article.id}'
+        self.get(url)
+        increment_view_counts(db.session, [{'submission_id': self.article.id}])
+        db.session.commit()
+        self.assertEqual(self.get(url)[0], 'hit')
+
+    def test_cached_article_pages_count_views(self):
+        """Test that a cached article page still records the visitor's view."""
+        url = f'/articles/{self.article.id}'
+        for address in ('192.0.2.1', '192.0.2.2', '192.0.2.3'):
+            self.get(url, environ_base={'REMOTE_ADDR': address})
+        self.assertEqual(self.page_cache.hits, 2)
+        self.assertEqual(ArticleView.query.filter_by(submission_id=self.article.id).count(), 3)
+
+    def test_logged_in_and_flashed_requests_bypass(self):
+        """Test that logged-in users and pending flashed messages are never served or stored."""
+        with self.client.session_transaction() as session:
+            session['_flashes'] = [('info', 'Welcome back')]
+        state, html = self.get('/')
+        self.assertIsNone(state)
+        self.assertIn('Welcome back', html)
+        self.assertEqual(len(self.page_cache), 0)
+
+        self.assertEqual(self.get('/')[0], 'miss')
+        with self.client.session_transaction() as session:
+            session['_user_id'] = str(self.author.id)
+            session['_fresh'] = True
+        g.pop('_login_user', None)
+        state, html = self.get('/')
+        self.assertIsNone(state)
+        self.assertIn('Cache Author', html)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,217 @@
+"""
+Tests for keyset pagination.
+
+This module checks that cursors survive the round trip and reject tampered
+tokens, that walking a listing forwards and backwards by cursor visits every
+row once in the same order as OFFSET paging (with ties in the sort key and
+mixed sort directions), that legacy page numbers still work, that cached
+totals are reused, and that /browse, /issues and the author dashboard link
+their pages with cursors.
+"""
+
+import re
+import unittest
+from datetime import datetime, timedelta
+
+from flask import g
+from sqlalchemy import event
+
+from app import create_app, db
+from models import User, Submission, Issue, Publication
+from services.pagination import encode_cursor, decode_cursor, keyset_page
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+class TestPagination(unittest.TestCase):
+    """Test cases for keyset_page and the listings using it."""
+
+    def setUp(self):
+        """Set up test case with a test app, database and 23 published articles."""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        # main.serve_css is only registered on the module-level app
+        self.app.add_url_rule('/css/<path:filename>', 'serve_css', lambda filename: '')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.author = User('Paging Author', 'paging-author@example.com', 'password', 'author')
+        db.session.add(self.author)
+        self.issue = Issue(volume=1, issue_number=1, title='Issue 1.1', description='First issue',
+                           status='published', publication_date=NOW)
+        db.session.add(self.issue)
+        db.session.commit()
+        for number in range(23):
+            submission = Submission(title=f'Article {number % 7}', authors='A. Author', abstract='Abstract.',
+                                    category='physics', file_path='paper.pdf', author_id=self.author.id,
+                                    submitted_at=NOW - timedelta(days=number // 3))
+            db.session.add(submission)
+            db.session.flush()
+            # Three articles share each publication time
+            db.session.add(Publication(submission_id=submission.id, issue_id=self.issue.id, status='published',
+                                       published_at=NOW - timedelta(days=number // 3)))
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up after test case."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    @staticmethod
+    def published():
+        return Submission.query.join(Publication).filter(Publication.status == 'published')
+
+    def walk(self, order_by, per_page=5):
+        """Follow the next cursors to the end, then the previous cursors back to the start."""
+        forward, page = [], keyset_page(self.published(), order_by, per_page=per_page)
+        numbers = [page.page]
+        while True:
+            forward.append([item.id for item in page])
+            if not page.has_next:
+                break
+            page = keyset_page(self.published(), order_by, after=page.next_cursor, per_page=per_page)
+            numbers.append(page.page)
+        self.assertEqual(numbers, list(range(1, len(numbers) + 1)))
+
+        backward = [[item.id for item in page]]
+        while page.has_prev:
+            page = keyset_page(self.published(), order_by, before=page.prev_cursor, per_page=per_page)
+            backward.append([item.id for item in page])
+        self.assertEqual(page.page, 1)
+        return forward, list(reversed(backward))
+
+    def test_cursor_round_trip(self):
+        """Test that cursors keep dates and numbers and that bad tokens are ignored."""
+        cursor = encode_cursor([NOW, 'Title', 2.5, 7], 3)
+        self.assertRegex(cursor, r'^[A-Za-z0-9_-]+$')
+        self.assertEqual(decode_cursor(cursor, 4), ([NOW, 'Title', 2.5, 7], 3))
+        self.assertIsNone(decode_cursor(cursor, 2))
+        for token in ('', 'not a cursor', cursor[:-3], encode_cursor([1], 0), 'eyJrIjoxfQ'):
+            self.assertIsNone(decode_cursor(token, 1))
+
+    def test_walk_matches_offset_order(self):
+        """Test that cursor pages cover every row once, in the OFFSET order, both ways."""
+        orderings = [
+            [Publication.published_at.desc(), Submission.id.desc()],
+            [Publication.published_at.asc(), Submission.id.asc()],
+            [Submission.title.asc(), Submission.id.asc()],
+            [Submission.title.desc(), Publication.published_at.asc(), Submission.id.desc()],
+        ]
+        for order_by in orderings:
+            expected = [submission.id for submission in self.published().order_by(*order_by)]
+            forward, backward = self.walk(order_by)
+            self.assertEqual(sum(forward, []), expected)
+            self.assertEqual(backward, forward)
+            self.assertEqual([len(ids) for ids in forward], [5, 5, 5, 5, 3])
+
+    def test_legacy_page_numbers(self):
+        """Test that ?page=N serves the same rows as before and links on with cursors."""
+        order_by = [Publication.published_at.desc(), Submission.id.desc()]
+        expected = [submission.id for submission in self.published().order_by(*order_by)]
+        page = keyset_page(self.published(), order_by, page=3, per_page=5, count='exact')
+        self.assertEqual([item.id for item in page], expected[10:15])
+        self.assertEqual((page.page, page.total, page.pages), (3, 23, 5))
+
+        following = keyset_page(self.published(), order_by, after=page.next_cursor, per_page=5)
+        self.assertEqual([item.id for item in following], expected[15:20])
+        previous = keyset_page(self.published(), order_by, before=page.prev_cursor, per_page=5)
+        self.assertEqual([item.id for item in previous], expected[5:10])
+        self.assertEqual(previous.page, 2)
+
+        beyond = keyset_page(self.published(), order_by, page=9, per_page=5)
+        self.assertEqual((len(beyond), beyond.has_next), (0, False))
+
+    def test_mistyped_cursor_starts_over(self):
+        """Test that a cursor whose values do not fit the sort key columns is treated as no cursor."""
+        order_by = [Publication.published_at.desc(), Submission.id.desc()]
+        first = keyset_page(self.published(), order_by, per_page=5)
+        for cursor in (encode_cursor(['x', 1], 2), encode_cursor([NOW, 'x'], 2), encode_cursor([True, 1], 2)):
+            for direction in ('after', 'before'):
+                page = keyset_page(self.published(), order_by, per_page=5, **{direction: cursor})
+                self.assertEqual([item.id for item in page], [item.id for item in first])
+                self.assertEqual(page.page, 1)
+
+        client = self.app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(self.author.id)
+            session['_fresh'] = True
+        g.pop('_login_user', None)
+        # A cursor made under sort=title_asc, replayed with the default (date) sort
+        stale = encode_cursor(['Article 1', 1], 2)
+        response = client.get(f'/submissions/dashboard?after={stale}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(set(re.findall(r'submissions/(\d+)"', response.get_data(as_text=True)))), 10)
+
+    def test_cached_count_is_reused(self):
+        """Test that the cached total is counted once per filter within the TTL."""
+        counts = []
+        listener = lambda conn, cursor, statement, *args: counts.append(statement) if 'count(' in statement else None
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            order_by = [Submission.id]
+            for _ in range(3):
+                self.assertEqual(keyset_page(self.published(), order_by, count='cached').total, 23)
+            physics = self.published().filter(Submission.title == 'Article 1')
+            self.assertEqual(keyset_page(physics, order_by, count='cached').total, 4)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        self.assertEqual(len(counts), 2)
+
+    def test_browse_links_pages_with_cursors(self):
+        """Test that following /browse's next links lists every article once without OFFSET."""
+        statements = []
+        listener = lambda conn, cursor, statement, parameters, *args: statements.append((statement, parameters))
+        client = self.app.test_client()
+        url, seen = '/browse?sort=title_asc', []
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            while url:
+                html = client.get(url).get_data(as_text=True)
+                seen += re.findall(r'/articles/(\d+)"', html)
+                links = re.findall(r'href="([^"]*after=[^"]*)" aria-label="Next"', html)
+                url = links[0].replace('&amp;', '&') if links else None
+                if url:
+                    self.assertIn('sort=title_asc', url)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        self.assertEqual(len(seen), 23)
+        self.assertEqual(len(set(seen)), 23)
+        # SQLite always renders an OFFSET; every page of the listing passes 0
+        offsets = [parameters[-1] for statement, parameters in statements if 'keyset_0' in statement]
+        self.assertEqual(offsets, [0] * 3)
+
+        html = client.get('/browse?page=2').get_data(as_text=True)
+        self.assertIn('Page 2 of 3', html)
+
+    def test_issues_and_dashboard_paginate(self):
+        """Test that /issues and the author dashboard show every row across their pages."""
+        for volume in range(2, 14):
+            db.session.add(Issue(volume=volume, issue_number=1, title=f'Volume {volume}', description='Issue',
+                                 status='published', publication_date=NOW + timedelta(days=volume)))
+        db.session.add(Issue(volume=99, issue_number=1, title='Forthcoming', description='Issue',
+                             status='published'))
+        db.session.commit()
+        client = self.app.test_client()
+        html = client.get('/issues').get_data(as_text=True)
+        self.assertIn('Page 1 of 2', html)
+        next_url = re.search(r'href="([^"]*after=[^"]*)"', html).group(1).replace('&amp;', '&')
+        html = client.get(next_url).get_data(as_text=True)
+        self.assertEqual(len(re.findall(r'/issues/\d+"', html)), 4)
+
+        with client.session_transaction() as session:
+            session['_user_id'] = str(self.author.id)
+            session['_fresh'] = True
+        g.pop('_login_user', None)
+        html = client.get('/submissions/dashboard?sort=title_desc').get_data(as_text=True)
+        self.assertEqual(len(set(re.findall(r'submissions/(\d+)"', html))), 10)
+        next_url = re.search(r'href="([^"]*after=[^"]*)"', html).group(1).replace('&amp;', '&')
+        self.assertIn('sort=title_desc', next_url)
+        html = client.get(next_url).get_data(as_text=True)
+        self.assertEqual(len(set(re.findall(r'submissions/(\d+)"', html))), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+"""
+Tests for the popular articles leaderboards.
+
+This module checks that the boards load from submissions.view_count and
+article_view_daily, follow the article views the tracking writer commits,
+keep old days out of the 7 and 30-day windows, hide unpublished articles,
+agree with a count of the raw views, and that /browse and the home page list
+them without counting views per request.
+"""
+
+import random
+import unittest
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app import create_app, db
+from models import User, Submission, Issue, Publication, ArticleView, ArticleViewDaily
+from services.popular_articles import PopularArticles
+
+
+class TestPopularArticles(unittest.TestCase):
+    """Test cases for PopularArticles and the pages listing it."""
+
+    def setUp(self):
+        """Set up test case with a test app, database and a few published articles."""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        # main.serve_css is only registered on the module-level app
+        self.app.add_url_rule('/css/<path:filename>', 'serve_css', lambda filename: '')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.author = User('Popular Author', 'popular-author@example.com', 'password', 'author')
+        db.session.add(self.author)
+        self.issue = Issue(volume=1, issue_number=1, title='Issue 1.1', description='First issue')
+        db.session.add(self.issue)
+        db.session.commit()
+        self.articles = [self.add_article(f'Article {number}') for number in range(8)]
+        self.today = datetime.utcnow().date()
+
+    def tearDown(self):
+        """Clean up after test case."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def add_article(self, title, publish=True):
+        """Add a submission with a publication, published unless told otherwise."""
+        submission = Submission(title=title, authors='A. Author', abstract='Abstract.', category='physics',
+                                file_path='paper.pdf', author_id=self.author.id)
+        db.session.add(submission)
+        db.session.flush()
+        publication = Publication(submission_id=submission.id, issue_id=self.issue.id)
+        if publish:
+            publication.publish()
+        db.session.add(publication)
+        db.session.commit()
+        return submission
+
+    def add_daily(self, submission, days_ago, views):
+        """Store a daily counter row and the matching all-time count, as the writer does."""
+        db.session.add(ArticleViewDaily(submission_id=submission.id, day=self.today - timedelta(days=days_ago),
+                                        views=views, anonymous_views=views))
+        submission.view_count = (submission.view_count or 0) + views
+        db.session.commit()
+
+    @staticmethod
+    def views(submission, count, days_ago=0):
+        """Build article_views rows as the tracking writer passes them to add()."""
+        timestamp = datetime.utcnow() - timedelta(days=days_ago)
+        return [{'submission_id': submission.id, 'timestamp': timestamp} for _ in range(count)]
+
+    def test_refresh_loads_boards_from_counters(self):
+        """Test that the boards are loaded from view_count and the daily counters."""
+        first, second, third = self.articles[:3]
+        self.add_daily(first, days_ago=0, views=3)
+        self.add_daily(second, days_ago=10, views=9)
+        self.add_daily(third, days_ago=40, views=20)
+
+        popular = PopularArticles(size=2)
+        self.assertEqual(popular.leaders('week'), [(first.id, 3)])
+        self.assertEqual(popular.leaders('month'), [(second.id, 9), (first.id, 3)])
+        self.assertEqual(popular.leaders('all'), [(third.id, 20), (second.id, 9), (first.id, 3)])
+
+        boards = popular.articles()
+        self.assertEqual(boards['all'], [third, second])
+        self.assertEqual(boards['week'], [first])
+
+    def test_add_updates_boards_incrementally(self):
+        """Test that committed views move articles up the boards, replacing the lowest candidate."""
+        popular = PopularArticles(size=1)
+        popular.capacity = 2
+        popular.add(self.views(self.articles[0], 5))
+        self.assertEqual(popular.leaders('week'), [], 'views before the first load come from the database')
+
+        first, second, third = self.articles[:3]
+        popular.add(self.views(first, 3))
+        popular.add(self.views(second, 2))
+        popular.add(self.views(third, 1))
+        self.assertEqual(popular.leaders('week'), [(first.id, 3), (second.id, 2)])
+
+        popular.add(self.views(third, 3))
+        self.assertEqual(popular.leaders('week'), [(third.id, 4), (first.id, 3)])
+        self.assertEqual(popular.leaders('month'), [(third.id, 4), (first.id, 3)])
+
+        # Views dated outside a window only count towards the longer ones
+        popular.add(self.views(second, 5, days_ago=12))
+        self.assertEqual(popular.leaders('week'), [(third.id, 4), (first.id, 3)])
+        self.assertEqual(popular.leaders('month')[0], (second.id, 7))
+
+    def test_windows_drop_old_days(self):
+        """Test that the window totals are recomputed when the date changes."""
+        first, second = self.articles[:2]
+        self.add_daily(first, days_ago=7, views=10)
+        self.add_daily(second, days_ago=0, views=4)
+        popular = PopularArticles(size=5)
+        popular.refresh(today=self.today - timedelta(days=1))
+        with popular._lock:
+            self.assertEqual(popular._top['week'], {first.id: 10})
+
+        # leaders() notices the new day: the first article's views leave the 7-day window
+        self.assertEqual(popular.leaders('week'), [])
+        self.assertEqual(popular.leaders('month'), [(first.id, 10)])
+        popular.refresh()
+        self.assertEqual(popular.leaders('week'), [(second.id, 4)])
+        self.assertEqual(popular.leaders('month'), [(first.id, 10), (second.id, 4)])
+
+    def test_unpublished_articles_are_hidden(self):
+        """Test that an article unpublished after the boards were loaded is not listed."""
+        first, second = self.articles[:2]
+        self.add_daily(first, days_ago=0, views=10)
+        self.add_daily(second, days_ago=0, views=5)
+        draft = self.add_article('Draft', publish=False)
+        self.add_daily(draft, days_ago=0, views=50)
+
+        popular = PopularArticles(size=5)
+        self.assertEqual(popular.articles('all')['all'], [first, second])
+        self.assertEqual(popular.articles('week')['week'], [first, second])
+
+        first.publication.unpublish()
+        db.session.commit()
+        self.assertEqual(popular.articles('week', 'all'), {'week': [second], 'all': [second]})
+
+    def test_boards_match_counting_the_views(self):
+        """Test that the boards fed by the tracking writer agree with a count of article_views."""
+        popular = self.app.extensions['popular_articles']
+        popular.refresh()
+        rng = random.Random(17)
+        for _ in range(300):
+            self.app.extensions['tracking_buffer'].record_article_view(
+                rng.choice(self.articles[:6]).id, user_id=None, ip_address='192.0.2.1')
+
+        counts = Counter(dict(db.session.execute(
+            db.select(ArticleView.submission_id, db.func.count()).group_by(ArticleView.submission_id)).all()))
+        self.assertEqual(sum(counts.values()), 300)
+        expected = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        self.assertEqual(popular.leaders('week'), expected)
+        self.assertEqual(popular.leaders('month'), expected)
+
+        popular.refresh()
+        self.assertEqual(popular.leaders('week'), expected)
+        self.assertEqual(popular.leaders('all'), expected)
+
+    def test_pages_read_the_boards(self):
+        """Test that /browse and the home page list the leaders without aggregating views."""
+        first, second = self.articles[:2]
+        self.add_daily(first, days_ago=20, views=10)
+        self.add_daily(second, days_ago=1, views=5)
+        self.app.extensions['popular_articles'].refresh()
+
+        statements = []
+        engine = db.engine
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, 'before_cursor_execute', listener)
+        try:
+            html = self.app.test_client().get('/browse').get_data(as_text=True)
+        finally:
+            event.remove(engine, 'before_cursor_execute', listener)
+        self.assertFalse([s for s in statements if 'article_view' in s or 'view_count' in s.split('FROM')[-1]])
+        self.assertIn('id="popular-week"', html)
+        card = html[html.index('id="popular-week"'):html.index('id="popular-month"')]
+        self.assertIn('Article 1', card)
+        self.assertNotIn('Article 0', card)
+
+        html = self.app.test_client().get('/').get_data(as_text=True)
+        self.assertIn('Popular This Week', html)
+
+
+if __name__ == '__main__':
+    unittest.main()
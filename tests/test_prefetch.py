@@ -0,0 +1,166 @@
+"""
+Tests for batched relationship loading on the review dashboards.
+
+This module checks that the prefetch helpers fill in relationships without
+marking anything as changed, and that the editor, reviewer and publishing
+dashboards run the same number of SQL statements with a thousand rows per
+list as with a handful.
+"""
+
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app import create_app, db
+from models import User, Submission, Review, EditorDecision, Publication, Issue
+from services.prefetch import prefetch_submissions, prefetch_publications
+
+DASHBOARDS = ['/review/editor/dashboard', '/review/reviewer/dashboard', '/review/publishing']
+STATUSES = ['submitted', 'under_review', 'reviewed', 'revision_submitted', 'accepted']
+
+
+class TestPrefetch(unittest.TestCase):
+    """Test cases for the prefetch helpers and dashboard query counts."""
+
+    def setUp(self):
+        """Set up test case with a test app and database."""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        # The page layout links stylesheets through the route main.py adds to the global app
+        self.app.add_url_rule('/css/<path:filename>', 'serve_css', lambda filename: '')
+        self.client = self.app.test_client()
+
+        self.editor = User('Prefetch Editor', 'prefetch-editor@example.com', 'password', 'editor')
+        db.session.add(self.editor)
+        db.session.flush()
+        self.issues = [Issue(volume=1, issue_number=number, title=f'Issue {number}') for number in range(1, 4)]
+        db.session.add_all(self.issues)
+        db.session.commit()
+        self.created = 0
+
+        self.statements = []
+        event.listen(db.engine, 'before_cursor_execute', self.count_statement)
+
+    def tearDown(self):
+        """Clean up after test case."""
+        event.remove(db.engine, 'before_cursor_execute', self.count_statement)
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def count_statement(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def populate(self, count):
+        """Add count submissions in each dashboard state, each by its own author."""
+        # Inserted directly: hashing a password per author would dominate the test
+        emails = [f'prefetch-author-{self.created + i}@example.com' for i in range(count * len(STATUSES))]
+        db.session.execute(User.__table__.insert(), [
+            {'name': f'Author {email}', 'email': email, 'password_hash': self.editor.password_hash, 'role': 'author'}
+            for email in emails
+        ])
+        authors = User.query.filter(User.email.in_(emails)).order_by(User.id).all()
+        submissions = [
+            Submission(title=f'Paper {self.created + i}', authors='A. Author', abstract='Abstract',
+                       category='Science', file_path='paper.pdf', author_id=author.id,
+                       status=STATUSES[i % len(STATUSES)])
+            for i, author in enumerate(authors)
+        ]
+        db.session.add_all(submissions)
+        db.session.flush()
+
+        due = datetime.utcnow() + timedelta(days=14)
+        for i, submission in enumerate(submissions):
+            if submission.status == 'under_review':
+                db.session.add(Review(submission_id=submission.id, reviewer_id=self.editor.id,
+                                      editor_id=self.editor.id, due_date=due))
+            elif submission.status == 'reviewed':
+                db.session.add(Review(submission_id=submission.id, reviewer_id=self.editor.id,
+                                      editor_id=self.editor.id, due_date=due, status='completed',
+                                      decision='accept', completed_at=datetime.utcnow()))
+            elif submission.status == 'revision_submitted':
+                for decision in ['reject', 'revisions']:
+                    db.session.add(EditorDecision(submission_id=submission.id, editor_id=self.editor.id,
+                                                  decision=decision))
+            elif submission.status == 'accepted' and i % 2:
+                publication = Publication(submission_id=submission.id, issue_id=self.issues[i % 3].id,
+                                          status=['scheduled', 'published', 'unpublished'][i % 3])
+                if publication.status != 'scheduled':
+                    publication.published_at = datetime.utcnow()
+                db.session.add(publication)
+        db.session.commit()
+        self.created += len(authors)
+
+    def dashboard_statements(self):
+        """Number of statements each dashboard runs for the logged-in editor."""
+        counts = {}
+        for path in DASHBOARDS:
+            # Start every request from the same state: nothing loaded in the session
+            db.session.expire_all()
+            self.statements.clear()
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200, path)
+            counts[path] = len(self.statements)
+        return counts
+
+    def test_prefetch_fills_relationships(self):
+        """Test that prefetched relationships need no queries and leave the session clean."""
+        self.populate(3)
+        db.session.expunge_all()
+        submissions = Submission.query.filter_by(status='revision_submitted').all()
+        publications = Publication.query.all()
+        prefetch_submissions(submissions, decisions=True)
+        prefetch_publications(publications)
+
+        self.statements.clear()
+        names = [submission.author.name for submission in submissions]
+        titles = [(publication.submission.author.name, publication.issue.title) for publication in publications]
+        decisions = [submission.latest_decision for submission in submissions]
+        self.assertEqual(self.statements, [])
+        self.assertEqual(len(names), 3)
+        self.assertEqual(len(titles), len(publications))
+        self.assertTrue(all(decision.submission_id == submission.id and decision.decision == 'revisions'
+                            for decision, submission in zip(decisions, submissions)))
+        self.assertFalse(db.session.dirty)
+
+    def test_latest_decisions_run_constant_statements(self):
+        """Test that loading the latest decisions takes as many statements for 1,000 submissions as for 5."""
+        counts = []
+        for count in (5, 995):
+            self.populate(count)
+            db.session.expire_all()
+            submissions = Submission.query.filter_by(status='revision_submitted').all()
+            self.statements.clear()
+            prefetch_submissions(submissions, decisions=True)
+            counts.append(len(self.statements))
+            self.assertTrue(all(submission.latest_decision.decision == 'revisions' for submission in submissions))
+        self.assertEqual(len(submissions), 1000)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_dashboards_run_constant_statements(self):
+        """Test that the dashboards run as many statements for 1,000 rows per list as for 5."""
+        with self.client.session_transaction() as session:
+            session['_user_id'] = str(self.editor.id)
+            session['_fresh'] = True
+        # Check the settings version on every request rather than once a second
+        self.app.extensions['settings_cache'].check_interval = 0
+        self.populate(5)
+        # The first requests load the settings and record the visit
+        self.dashboard_statements()
+        small = self.dashboard_statements()
+
+        self.populate(995)
+        large = self.dashboard_statements()
+        self.assertEqual(large, small)
+        page = self.client.get('/review/editor/dashboard').data
+        self.assertIn(b'Paper 4998', page)
+        self.assertIn(b'Author prefetch-author-4998@example.com', page)
+
+
+if __name__ == '__main__':
+    unittest.main()
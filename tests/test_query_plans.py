@@ -0,0 +1,171 @@
+"""
+Tests for the database indexes.
+
+This module fills the database with a few thousand rows, requests the hot
+pages and asks SQLite for the query plan of every SELECT they issue: none of
+them may scan one of the large tables without an index. It also checks that
+the index migration finds nothing missing on a fresh schema and recreates a
+dropped index exactly once.
+"""
+
+import random
+import unittest
+from datetime import datetime, timedelta
+
+from flask import g
+from sqlalchemy import event
+
+from app import create_app, db
+from models import (User, Submission, Review, EditorDecision, Issue, Publication,
+                    VisitorLog, ArticleView, UserActivity)
+from services.indexes import missing_indexes, create_missing_indexes
+
+# Tables that grow with the journal's history; a full scan of one is a regression
+LARGE_TABLES = ('submissions', 'reviews', 'editor_decisions', 'publications',
+                'visitor_logs', 'article_views', 'user_activities')
+
+
+class TestQueryPlans(unittest.TestCase):
+    """Test cases for the indexes and the index migration."""
+
+    def setUp(self):
+        """Set up test case with a test app and database."""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        # main.serve_css is only registered on the module-level app
+        self.app.add_url_rule('/css/<path:filename>', 'serve_css', lambda filename: '')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.app.extensions['settings_cache'].check_interval = 0
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        """Clean up after test case."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def populate(self, submissions=2000):
+        """Insert users, submissions, reviews, issues and log rows, then ANALYZE."""
+        rng = random.Random(15)
+        now = datetime.utcnow()
+        editor = User('Plan Editor', 'plan-editor@example.com', 'password', 'editor')
+        db.session.add(editor)
+        db.session.flush()
+        # Hashing a password per user is slow; the rows only need to exist
+        roles = ['author', 'reviewer', 'editor', 'author']
+        db.session.execute(User.__table__.insert(), [
+            {'name': f'User {i}', 'email': f'plan-user-{i}@example.com', 'password_hash': editor.password_hash,
+             'role': roles[i % 4]} for i in range(200)])
+        user_ids = [row.id for row in db.session.execute(db.select(User.id))]
+
+        statuses = ['submitted', 'under_review', 'reviewed', 'revision_submitted', 'accepted', 'rejected']
+        db.session.execute(Submission.__table__.insert(), [
+            {'title': f'Paper {i}', 'authors': 'A. Author', 'abstract': 'Abstract', 'category': 'Science',
+             'file_path': 'paper.pdf', 'status': rng.choice(statuses), 'author_id': rng.choice(user_ids),
+             'submitted_at': now - timedelta(hours=i), 'updated_at': now - timedelta(hours=i)}
+            for i in range(submissions)])
+        db.session.execute(Review.__table__.insert(), [
+            {'submission_id': rng.randint(1, submissions), 'reviewer_id': rng.choice(user_ids),
+             'editor_id': editor.id, 'status': rng.choice(['assigned', 'completed']),
+             'due_date': now + timedelta(days=rng.randint(-10, 30)), 'completed_at': now}
+            for i in range(submissions)])
+        db.session.execute(EditorDecision.__table__.insert(), [
+            {'submission_id': rng.randint(1, submissions), 'editor_id': editor.id, 'decision': 'revisions'}
+            for i in range(submissions)])
+        db.session.execute(Issue.__table__.insert(), [
+            {'volume': volume, 'issue_number': number, 'title': f'Issue {volume}.{number}',
+             'description': 'Description', 'status': rng.choice(['planned', 'published']),
+             'publication_date': now - timedelta(days=volume * 30 + number)}
+            for volume in range(1, 11) for number in range(1, 5)])
+        db.session.execute(Publication.__table__.insert(), [
+            {'submission_id': i, 'issue_id': rng.randint(1, 40),
+             'status': rng.choice(['scheduled', 'published', 'unpublished']), 'published_at': now - timedelta(hours=i)}
+            for i in range(1, submissions, 20)])
+        db.session.execute(VisitorLog.__table__.insert(), [
+            {'ip_address': f'10.0.0.{i % 250}', 'path': rng.choice(['/', '/browse', '/issues']),
+             'timestamp': now - timedelta(minutes=i)} for i in range(5000)])
+        db.session.execute(ArticleView.__table__.insert(), [
+            {'submission_id': rng.randint(1, submissions), 'ip_address': '10.0.0.1',
+             'timestamp': now - timedelta(minutes=i)} for i in range(5000)])
+        db.session.execute(UserActivity.__table__.insert(), [
+            {'user_id': rng.choice(user_ids), 'activity_type': rng.choice(['login', 'submission', 'review']),
+             'timestamp': now - timedelta(minutes=i)} for i in range(5000)])
+        db.session.commit()
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
+        return editor, user_ids
+
+    def login(self, user_id):
+        """Log the test client in as a user."""
+        with self.client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+        # Requests share the test's app context, so forget the user the last one loaded
+        g.pop('_login_user', None)
+
+    def unindexed_scans(self, path):
+        """Request a page and return the plans that scan a large table without an index."""
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if not executemany and statement.lstrip().upper().startswith('SELECT'):
+                statements.append((statement, parameters))
+
+        event.listen(db.engine, 'before_cursor_execute', capture)
+        try:
+            response = self.client.get(path)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capture)
+        self.assertEqual(response.status_code, 200, path)
+
+        scans = []
+        connection = db.session.connection()
+        for statement, parameters in statements:
+            for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters):
+                detail = row[-1]
+                if any(detail == f'SCAN {table}' for table in LARGE_TABLES):
+                    scans.append(f'{path}: {detail} in {" ".join(statement.split())[:200]}')
+        return scans
+
+    def test_hot_pages_use_indexes(self):
+        """Test that dashboards, listings and analytics never scan a large table."""
+        editor, user_ids = self.populate()
+        admin = User('Plan Admin', 'plan-admin@example.com', 'password', 'admin')
+        db.session.add(admin)
+        db.session.commit()
+        reviewer_id = db.session.execute(db.select(User.id).where(User.role == 'reviewer')).scalar()
+        author_id = db.session.execute(db.select(User.id).where(User.role == 'author')).scalar()
+
+        scans = []
+        for path in ('/browse', '/browse?sort=date_asc', '/browse?search=paper', '/issues'):
+            scans += self.unindexed_scans(path)
+        self.login(editor.id)
+        for path in ('/issues/3', '/review/editor/dashboard', '/review/publishing', '/editor/issues/'):
+            scans += self.unindexed_scans(path)
+        self.login(reviewer_id)
+        scans += self.unindexed_scans('/review/reviewer/dashboard')
+        self.login(author_id)
+        scans += self.unindexed_scans('/submissions/dashboard')
+        self.login(admin.id)
+        for path in ('/admin/dashboard', '/admin/issues', '/admin/analytics/week'):
+            scans += self.unindexed_scans(path)
+        self.assertEqual(scans, [])
+
+    def test_migration_is_idempotent(self):
+        """Test that a dropped index is found missing, recreated once, and then left alone."""
+        self.assertEqual(missing_indexes(), [])
+        self.assertEqual(create_missing_indexes(), [])
+
+        db.session.execute(db.text('DROP INDEX ix_reviews_reviewer_status_due_date'))
+        db.session.commit()
+        self.assertEqual([index.name for index in missing_indexes()], ['ix_reviews_reviewer_status_due_date'])
+        self.assertEqual(create_missing_indexes(), ['ix_reviews_reviewer_status_due_date'])
+        self.assertEqual(create_missing_indexes(), [])
+        self.assertEqual(missing_indexes(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Tests for the render-once settings content.
+
+This module checks that set_value stores the nl2br and Markdown renderings of
+a setting, that the about, contact and privacy pages emit them without
+rendering anything per request, that settings stored without renderings are
+filled in, and that other Markdown is rendered once per distinct text.
+"""
+
+import unittest
+from unittest import mock
+
+from flask import render_template_string
+
+from app import create_app, db
+from models import SystemSetting
+from services import rendered_content, settings_cache
+from services.rendered_content import RenderCache, prerender_settings
+
+
+class TestRenderedContent(unittest.TestCase):
+    """Test cases for the stored setting renderings and the render cache."""
+
+    def setUp(self):
+        """Set up test case with a test app and database."""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        # serve_css is only registered on the module-level app
+        self.app.add_url_rule('/css/<path:filename>', 'serve_css', lambda filename: '')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        """Clean up after test case."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_set_value_stores_renderings(self):
+        """Test that saving a setting stores its escaped nl2br HTML, and Markdown HTML for the policy."""
+        SystemSetting.set_value('about_content', 'First line\nSecond <b>line</b>')
+        SystemSetting.set_value('gdpr_privacy_policy', '# Policy\n\nWe keep *little*.')
+
+        about = SystemSetting.query.filter_by(setting_key='about_content').first()
+        self.assertEqual(about.nl2br_html, 'First line<br>Second &lt;b&gt;line&lt;/b&gt;')
+        self.assertIsNone(about.markdown_html)
+        policy = SystemSetting.query.filter_by(setting_key='gdpr_privacy_policy').first()
+        self.assertEqual(policy.markdown_html, '<h1>Policy</h1>\n<p>We keep <em>little</em>.</p>')
+
+        SystemSetting.set_value('about_content', 'Changed')
+        self.assertEqual(SystemSetting.query.filter_by(setting_key='about_content').first().nl2br_html, 'Changed')
+
+    def test_pages_emit_stored_renderings(self):
+        """Test that the about, contact and privacy pages show the stored HTML without rendering it."""
+        SystemSetting.set_value('about_content', 'Our mission\nis <science>')
+        SystemSetting.set_value('contact_address', '1 Journal Street\nScience City')
+        SystemSetting.set_value('gdpr_privacy_policy', '## Stored policy')
+
+        renderers = [mock.patch.object(module, name, wraps=getattr(module, name))
+                     for module in (rendered_content, settings_cache) for name in ('render_nl2br', 'render_markdown')]
+        mocks = [renderer.start() for renderer in renderers]
+        try:
+            about = self.client.get('/about').get_data(as_text=True)
+            contact = self.client.get('/contact').get_data(as_text=True)
+            privacy = self.client.get('/privacy').get_data(as_text=True)
+        finally:
+            for renderer in renderers:
+                renderer.stop()
+        self.assertFalse(any(renderer.called for renderer in mocks))
+
+        self.assertIn('Our mission<br>is &lt;science&gt;', about)
+        self.assertIn('1 Journal Street<br>Science City', contact)
+        self.assertIn('<h2>Stored policy</h2>', privacy)
+
+    def test_default_privacy_policy(self):
+        """Test that the default policy is rendered once and then served from the render cache."""
+        render_cache = self.app.extensions['render_cache']
+        for _ in range(3):
+            html = self.client.get('/privacy').get_data(as_text=True)
+            self.assertIn('<h1>Privacy Policy</h1>', html)
+        self.assertEqual((render_cache.misses, render_cache.hits), (1, 2))
+
+    def test_prerender_stored_settings(self):
+        """Test that settings stored without renderings are filled in, and rendered on read until then."""
+        db.session.add_all([SystemSetting(setting_key='review_policy', setting_value='Double\nblind'),
+                            SystemSetting(setting_key='gdpr_privacy_policy', setting_value='*Short*')])
+        db.session.commit()
+        SystemSetting.set_value('theme', 'dark')
+        self.assertIn('Double<br>blind', self.client.get('/about').get_data(as_text=True))
+
+        self.assertEqual(prerender_settings(), 2)
+        self.assertEqual(prerender_settings(), 0)
+        policy = SystemSetting.query.filter_by(setting_key='gdpr_privacy_policy').first()
+        self.assertEqual((policy.nl2br_html, policy.markdown_html), ('*Short*', '<p><em>Short</em></p>'))
+
+    def test_render_cache(self):
+        """Test that Markdown is rendered once per distinct text and the least recently used is dropped."""
+        render_cache = RenderCache(max_entries=2)
+        self.assertEqual(render_cache.markdown('**a**'), '<p><strong>a</strong></p>')
+        render_cache.markdown('**a**')
+        render_cache.markdown('b')
+        render_cache.markdown('c')
+        self.assertEqual(len(render_cache), 2)
+        self.assertEqual((render_cache.hits, render_cache.misses), (1, 3))
+        render_cache.markdown('**a**')
+        self.assertEqual(render_cache.misses, 4)
+
+        with self.app.test_request_context():
+            html = render_template_string('{{ text|markdown }}{{ text|markdown }}', text='*filtered*')
+        self.assertEqual(html, '<p><em>filtered</em></p>' * 2)
+        self.assertEqual(self.app.extensions['render_cache'].hits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
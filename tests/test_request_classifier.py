@@ -0,0 +1,54 @@
+"""
+Tests for the before_request classifier.
+
+This module checks that each kind of route gets the right set of pipeline stages.
+"""
+
+import unittest
+
+from app import create_app
+from services.request_classifier import (
+    RequestClassifier, STAGE_SETTINGS, STAGE_GDPR, STAGE_TRACKING, ALL_STAGES
+)
+
+
+class TestRequestClassifier(unittest.TestCase):
+    """Test cases for RequestClassifier."""
+
+    def test_static_and_uploads_skip_pipeline(self):
+        """Test that static files and uploads have no stages."""
+        for path in ['/static/app.js', '/css/custom.css', '/favicon.ico', '/uploads/paper.pdf']:
+            self.assertEqual(RequestClassifier.stages_for(path), 0, path)
+
+    def test_route_class_stages(self):
+        """Test the stage mask for admin, auth and health routes."""
+        self.assertEqual(RequestClassifier.stages_for('/admin/dashboard'), STAGE_SETTINGS | STAGE_GDPR)
+        self.assertEqual(RequestClassifier.stages_for('/auth/login'), STAGE_SETTINGS | STAGE_TRACKING)
+        self.assertFalse(RequestClassifier.stages_for('/health') & STAGE_TRACKING)
+        self.assertEqual(RequestClassifier.stages_for('/healthy-eating'), ALL_STAGES)
+        self.assertEqual(RequestClassifier.stages_for('/browse'), ALL_STAGES)
+
+    def test_gdpr_exempt_endpoints(self):
+        """Test that the home page does not require GDPR consent."""
+        self.assertEqual(RequestClassifier.stages_for('/', 'main.index'), STAGE_SETTINGS | STAGE_TRACKING)
+
+    def test_classify_request(self):
+        """Test classification of real requests against the app's URL map."""
+        app = create_app()
+        classifier = app.extensions['request_classifier']
+
+        with app.test_request_context('/articles/1'):
+            from flask import request
+            self.assertEqual(classifier.classify(request), ALL_STAGES)
+
+        with app.test_request_context('/admin/users'):
+            from flask import request
+            self.assertEqual(classifier.classify(request), STAGE_SETTINGS | STAGE_GDPR)
+
+        with app.test_request_context('/no/such/page'):
+            from flask import request
+            self.assertEqual(classifier.classify(request), ALL_STAGES)
+
+
+if __name__ == '__main__':
+    unittest.main()
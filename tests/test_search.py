@@ -0,0 +1,129 @@
+"""
+Tests for the full-text search index.
+
+This module checks that articles enter and leave the index as they are
+published, unpublished and edited, that searches match word prefixes and rank
+title matches first, that snippets highlight the matches and escape the
+abstract, and that /browse serves ranked results.
+"""
+
+import unittest
+
+from app import create_app, db
+from models import User, Submission, Issue, Publication
+
+
+class TestSearch(unittest.TestCase):
+    """Test cases for SearchIndex and the /browse search."""
+
+    def setUp(self):
+        """Set up test case with a test app and database."""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        # main.serve_css is only registered on the module-level app
+        self.app.add_url_rule('/css/<path:filename>', 'serve_css', lambda filename: '')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.search_index = self.app.extensions['search_index']
+        self.assertTrue(self.search_index.available)
+
+        self.author = User('Search Author', 'search-author@example.com', 'password', 'author')
+        db.session.add(self.author)
+        self.issue = Issue(volume=1, issue_number=1, title='Issue 1.1', description='First issue')
+        db.session.add(self.issue)
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up after test case."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def add_article(self, title, abstract, keywords='', publish=True):
+        """Add a submission with a publication, published unless told otherwise."""
+        submission = Submission(title=title, authors='A. Author', abstract=abstract, keywords=keywords,
+                                category='physics', file_path='paper.pdf', author_id=self.author.id)
+        db.session.add(submission)
+        db.session.flush()
+        publication = Publication(submission_id=submission.id, issue_id=self.issue.id)
+        if publish:
+            publication.publish()
+        db.session.add(publication)
+        db.session.commit()
+        return submission, publication
+
+    def found(self, text):
+        """Return the IDs of the articles matching a search, best match first."""
+        matches = self.search_index.matches(text)
+        return [row.submission_id for row in db.session.execute(
+            db.select(matches.c.submission_id).order_by(matches.c.rank))]
+
+    def test_index_follows_publication_and_edits(self):
+        """Test that publishing, editing and unpublishing update the index in the same commit."""
+        submission, publication = self.add_article('Quantum tunnelling', 'Electrons crossing barriers.',
+                                                   publish=False)
+        self.assertEqual(self.found('quantum'), [])
+
+        publication.publish()
+        db.session.commit()
+        self.assertEqual(self.found('quantum'), [submission.id])
+
+        submission.title = 'Photon statistics'
+        db.session.commit()
+        self.assertEqual(self.found('quantum'), [])
+        self.assertEqual(self.found('photon'), [submission.id])
+
+        publication.unpublish()
+        db.session.commit()
+        self.assertEqual(self.found('photon'), [])
+        self.assertFalse(self.search_index.needs_rebuild())
+
+    def test_prefix_matching_and_ranking(self):
+        """Test that words match as prefixes, all words must match, and title matches rank first."""
+        in_abstract, _ = self.add_article('Lattice models', 'A survey of quantum spin chains.')
+        in_title, _ = self.add_article('Quantum spin liquids', 'Frustrated magnets.')
+        self.add_article('Protein folding', 'Molecular dynamics of spin labels.')
+
+        self.assertEqual(self.found('quant'), [in_title.id, in_abstract.id])
+        self.assertEqual(self.found('quantum spin'), [in_title.id, in_abstract.id])
+        self.assertEqual(self.found('SPIN'), self.found('spin'))
+        self.assertEqual(len(self.found('spin')), 3)
+        self.assertEqual(self.found('quantum protein'), [])
+        self.assertIsNone(self.search_index.matches('"*:()'))
+
+    def test_snippets_highlight_and_escape(self):
+        """Test that snippets mark the matching words and escape the abstract."""
+        submission, _ = self.add_article('Superconductors', 'Cuprate <b>superconductors</b> & phonons.')
+        snippet = self.search_index.snippets('supercond', [submission.id])[submission.id]
+        self.assertIn('<mark>superconductors</mark>', snippet)
+        self.assertIn('&lt;b&gt;', snippet)
+        self.assertIn('&amp;', snippet)
+
+    def test_rebuild_indexes_rows_written_without_listeners(self):
+        """Test that rows written by bulk statements are indexed by rebuild()."""
+        submission, publication = self.add_article('Graphene', 'Two-dimensional carbon.', publish=False)
+        db.session.execute(db.update(Publication).where(Publication.id == publication.id).values(status='published'))
+        db.session.commit()
+        self.assertTrue(self.search_index.needs_rebuild())
+        self.assertEqual(self.search_index.rebuild(), 1)
+        self.assertEqual(self.found('graphene'), [submission.id])
+        self.assertFalse(self.search_index.needs_rebuild())
+
+    def test_browse_ranks_and_highlights(self):
+        """Test that /browse lists the best match first with a highlighted snippet."""
+        self.add_article('Neutrino masses', 'We bound the sum of neutrino masses.')
+        self.add_article('Dark matter', 'Sterile neutrino candidates.')
+        response = self.app.test_client().get('/browse?search=neutrino')
+        self.assertEqual(response.status_code, 200)
+        html = response.get_data(as_text=True)
+        self.assertLess(html.index('Neutrino masses'), html.index('Dark matter'))
+        self.assertIn('<mark>neutrino</mark>', html)
+
+        html = self.app.test_client().get('/browse?search=neutrino&sort=title_asc').get_data(as_text=True)
+        self.assertLess(html.index('Dark matter'), html.index('Neutrino masses'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Tests for the system settings cache.
+
+This module checks that settings changes made through one worker's cache are
+picked up by other workers through the shared settings version.
+"""
+
+import unittest
+
+from app import create_app, db
+from models import SystemSetting, SettingsVersion
+from services.settings_cache import SettingsCache
+from services.site_context import SiteContext
+
+
+class TestSettingsCache(unittest.TestCase):
+    """Test cases for the version-stamped settings cache."""
+
+    def setUp(self):
+        """Set up test case with a test app and database."""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        """Clean up after test case."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_set_value_bumps_version(self):
+        """Test that every setting write increments the shared version."""
+        before = SettingsVersion.current()
+        SystemSetting.set_value('site_name', 'Journal A')
+        SystemSetting.set_value('site_name', 'Journal B')
+        self.assertEqual(SettingsVersion.current(), before + 2)
+
+    def test_other_worker_sees_change(self):
+        """Test that a second cache reloads after a change made elsewhere."""
+        worker_a = SettingsCache(check_interval=0)
+        worker_b = SettingsCache(check_interval=0)
+
+        SystemSetting.set_value('site_name', 'Original')
+        self.assertEqual(worker_a.refresh_if_stale().get('site_name'), 'Original')
+        self.assertEqual(worker_b.refresh_if_stale().get('site_name'), 'Original')
+
+        SystemSetting.set_value('site_name', 'Updated')
+        self.assertEqual(worker_b.refresh_if_stale().get('site_name'), 'Updated')
+        self.assertEqual(worker_b.version, SettingsVersion.current())
+
+    def test_no_reload_within_interval(self):
+        """Test that the version is not re-checked inside the check interval."""
+        cache = SettingsCache(check_interval=3600)
+        SystemSetting.set_value('site_name', 'Original')
+        cache.refresh_if_stale()
+
+        SystemSetting.set_value('site_name', 'Updated')
+        self.assertEqual(cache.refresh_if_stale().get('site_name'), 'Original')
+
+        cache.invalidate()
+        self.assertEqual(cache.refresh_if_stale().get('site_name'), 'Updated')
+
+    def test_site_context_rebuilt_on_reload(self):
+        """Test that a reload produces a SiteContext with derived values."""
+        cache = SettingsCache(check_interval=0)
+        SystemSetting.set_value('banner_url', 'uploads/branding/banner.png')
+        SystemSetting.set_value('use_logo_text', 'true')
+
+        site = cache.current_site()
+        self.assertEqual(site.version, SettingsVersion.current())
+        self.assertEqual(site.banner_url, '/uploads/branding/banner.png')
+        self.assertIs(site.use_logo_text, True)
+        self.assertEqual(site.site_name, 'EasyJournal')
+
+    def test_site_context_is_immutable(self):
+        """Test that a SiteContext cannot be modified after it is built."""
+        site = SiteContext({'gdpr_consent_text': 'Line one\nLine two'})
+        self.assertEqual(str(site.consent_text), 'Line one<br>Line two')
+        with self.assertRaises(AttributeError):
+            site.site_name = 'Other'
+        with self.assertRaises(AttributeError):
+            site.extra = True
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+"""
+Tests for the settings repository.
+
+This module checks the get, get_many and typed getters, that
+SystemSetting.get_value and the about, contact and admin settings pages read
+settings from the settings cache without querying system_settings, that a
+change is seen right after set_value, and the database fallback without a
+settings cache.
+"""
+
+import unittest
+
+from flask import g
+from sqlalchemy import event
+
+from app import create_app, db
+from models import User, SystemSetting
+from services import settings_repository
+
+
+class TestSettingsRepository(unittest.TestCase):
+    """Test cases for the cache-backed settings accessors."""
+
+    def setUp(self):
+        """Set up test case with a test app, database and a few settings."""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        # serve_css and serve_uploads are only registered on the module-level app
+        self.app.add_url_rule('/css/<path:filename>', 'serve_css', lambda filename: '')
+        self.app.add_url_rule('/uploads/<path:filename>', 'serve_uploads', lambda filename: '')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.app.extensions['page_cache'].max_entries = 0
+
+        SystemSetting.set_value('site_name', 'Repository Journal')
+        SystemSetting.set_value('use_logo_text', 'true')
+        SystemSetting.set_value('journal_established', '1999')
+        SystemSetting.set_value('twitter_url', 'https://twitter.example/journal')
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        """Clean up after test case."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def settings_queries(self, action):
+        """Run an action and return the statements it sent that read system_settings."""
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            action()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        return [statement for statement in statements if 'system_settings' in statement]
+
+    def test_getters(self):
+        """Test get, get_many with and without defaults, and the typed getters."""
+        self.assertEqual(settings_repository.get('site_name'), 'Repository Journal')
+        self.assertEqual(settings_repository.get('missing', 'fallback'), 'fallback')
+        self.assertEqual(settings_repository.get_many(['site_name', 'missing']),
+                         {'site_name': 'Repository Journal', 'missing': None})
+        self.assertEqual(settings_repository.get_many({'journal_established': '2023', 'missing': 'x'}),
+                         {'journal_established': '1999', 'missing': 'x'})
+
+        self.assertTrue(settings_repository.get_bool('use_logo_text'))
+        self.assertTrue(settings_repository.get_bool('missing', True))
+        self.assertFalse(settings_repository.get_bool('site_name'))
+        self.assertEqual(settings_repository.get_int('journal_established'), 1999)
+        self.assertEqual(settings_repository.get_int('site_name', 7), 7)
+        self.assertEqual(settings_repository.get_int('missing'), 0)
+
+    def test_reads_come_from_the_cache(self):
+        """Test that get_value does not query once the cache is warm, and sees set_value at once."""
+        self.assertEqual(SystemSetting.get_value('site_name'), 'Repository Journal')
+        queries = self.settings_queries(lambda: [SystemSetting.get_value('site_name') for _ in range(10)])
+        self.assertEqual(queries, [])
+
+        SystemSetting.set_value('site_name', 'Renamed Journal')
+        self.assertEqual(SystemSetting.get_value('site_name'), 'Renamed Journal')
+
+    def test_database_fallback(self):
+        """Test that the settings are read from the database without a settings cache."""
+        settings_cache = self.app.extensions.pop('settings_cache')
+        try:
+            self.assertEqual(settings_repository.get('site_name'), 'Repository Journal')
+            self.assertEqual(settings_repository.get_many({'twitter_url': None, 'missing': 'x'}),
+                             {'twitter_url': 'https://twitter.example/journal', 'missing': 'x'})
+        finally:
+            self.app.extensions['settings_cache'] = settings_cache
+
+    def test_pages_do_not_query_settings(self):
+        """Test that the about, contact and admin settings pages run no settings queries on a warm cache."""
+        admin = User('Settings Admin', 'settings-admin@example.com', 'password', 'admin')
+        db.session.add(admin)
+        db.session.commit()
+
+        about = self.client.get('/about')
+        self.assertIn('1999', about.get_data(as_text=True))
+        self.assertEqual(self.settings_queries(lambda: self.client.get('/about')), [])
+        contact = self.client.get('/contact')
+        self.assertIn('https://twitter.example/journal', contact.get_data(as_text=True))
+        self.assertEqual(self.settings_queries(lambda: self.client.get('/contact')), [])
+
+        with self.client.session_transaction() as session:
+            session['_user_id'] = str(admin.id)
+            session['_fresh'] = True
+        g.pop('_login_user', None)
+        for url in ('/admin/branding', '/admin/content', '/admin/gdpr'):
+            responses = []
+            queries = self.settings_queries(lambda: responses.append(self.client.get(url)))
+            self.assertEqual(responses[0].status_code, 200, url)
+            self.assertEqual(queries, [], url)
+        self.assertIn('Repository Journal', self.client.get('/admin/branding').get_data(as_text=True))
+        self.assertIn('1999', self.client.get('/admin/content').get_data(as_text=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+"""
+Tests for the bulk settings upsert.
+
+This module checks that SystemSetting.set_many inserts and updates settings
+with their renderings in one statement, one commit and one settings version
+bump, that unchanged values write nothing, and that the content management
+form saves through it.
+"""
+
+import unittest
+
+from flask import g
+from sqlalchemy import event
+
+from app import create_app, db
+from models import User, SystemSetting, SettingsVersion
+from routes.admin import CONTENT_SETTING_DEFAULTS
+
+
+class TestSettingsSetMany(unittest.TestCase):
+    """Test cases for SystemSetting.set_many."""
+
+    def setUp(self):
+        """Set up test case with a test app, database and one stored setting."""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        # serve_css is only registered on the module-level app
+        self.app.add_url_rule('/css/<path:filename>', 'serve_css', lambda filename: '')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        SystemSetting.set_value('site_name', 'Old Journal')
+
+    def tearDown(self):
+        """Clean up after test case."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def record(self, action):
+        """Run an action and return (its result, statements sent, commits made)."""
+        statements, commits = [], []
+        statement_listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        commit_listener = lambda session: commits.append(session)
+        session_class = db.session.session_factory.class_
+        event.listen(db.engine, 'before_cursor_execute', statement_listener)
+        event.listen(session_class, 'after_commit', commit_listener)
+        try:
+            result = action()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', statement_listener)
+            event.remove(session_class, 'after_commit', commit_listener)
+        return result, statements, commits
+
+    def test_upsert_in_one_transaction(self):
+        """Test that new and changed settings are written by one upsert, one commit and one version bump."""
+        version = SettingsVersion.current()
+        changed, statements, commits = self.record(lambda: SystemSetting.set_many({
+            'site_name': 'New Journal',
+            'about_content': 'About\nus',
+            'gdpr_privacy_policy': '*Policy*',
+        }))
+        self.assertEqual(changed, 3)
+        self.assertEqual(len(commits), 1)
+        writes = [s for s in statements if not s.startswith('SELECT')]
+        self.assertEqual(len([s for s in writes if 'system_settings' in s]), 1)
+        self.assertIn('ON CONFLICT', writes[0])
+        self.assertEqual(SettingsVersion.current(), version + 1)
+
+        settings = {setting.setting_key: setting for setting in SystemSetting.query}
+        self.assertEqual(settings['site_name'].setting_value, 'New Journal')
+        self.assertEqual(settings['about_content'].nl2br_html, 'About<br>us')
+        self.assertEqual(settings['gdpr_privacy_policy'].markdown_html, '<p><em>Policy</em></p>')
+        self.assertEqual(SystemSetting.get_value('site_name'), 'New Journal')
+
+    def test_unchanged_values_write_nothing(self):
+        """Test that saving the stored values again neither writes nor bumps the version."""
+        version = SettingsVersion.current()
+        changed, statements, commits = self.record(lambda: SystemSetting.set_many({'site_name': 'Old Journal'}))
+        self.assertEqual(changed, 0)
+        self.assertEqual(commits, [])
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(SettingsVersion.current(), version)
+
+        self.assertEqual(SystemSetting.set_many({'site_name': 'Old Journal', 'site_description': 'New'}), 1)
+
+    def test_content_form_saves_in_one_commit(self):
+        """Test that saving the content management form commits every setting once."""
+        admin = User('Bulk Admin', 'bulk-admin@example.com', 'password', 'admin')
+        db.session.add(admin)
+        db.session.commit()
+        client = self.app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(admin.id)
+            session['_fresh'] = True
+        g.pop('_login_user', None)
+
+        data = {key: default or '' for key, default in CONTENT_SETTING_DEFAULTS.items()}
+        data['about_content'] = 'Saved in bulk'
+        version = SettingsVersion.current()
+        response, _, commits = self.record(lambda: client.post('/admin/content', data=data))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(SettingsVersion.current(), version + 1)
+        self.assertEqual(SystemSetting.get_value('about_content'), 'Saved in bulk')
+        self.assertEqual(SystemSetting.query.filter(SystemSetting.setting_key.in_(list(data))).count(), len(data))
+        self.assertEqual(len(commits), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Tests for the denormalized submission counters.
+
+This module checks that the review counters follow reviews being assigned,
+completed, moved and deleted, that article views written by the tracking
+buffer or through the ORM increment view_count, and that reconciliation
+repairs counters changed behind the listeners' back.
+"""
+
+import unittest
+from datetime import datetime, timedelta
+
+from app import create_app, db
+from models import User, Submission, Review, ArticleView
+from services.submission_counters import reconcile_counters
+
+
+class TestSubmissionCounters(unittest.TestCase):
+    """Test cases for the submission review and view counters."""
+
+    def setUp(self):
+        """Set up test case with a test app and database."""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.editor = User('Counter Editor', 'counter-editor@example.com', 'password', 'editor')
+        self.author = User('Counter Author', 'counter-author@example.com', 'password', 'author')
+        self.reviewer = User('Counter Reviewer', 'counter-reviewer@example.com', 'password', 'reviewer')
+        db.session.add_all([self.editor, self.author, self.reviewer])
+        db.session.flush()
+        self.submissions = [
+            Submission(title=f'Counted Paper {i}', authors='A. Author', abstract='Abstract', category='Science',
+                       file_path='paper.pdf', author_id=self.author.id)
+            for i in range(2)
+        ]
+        db.session.add_all(self.submissions)
+        db.session.commit()
+        self.now = datetime.utcnow()
+
+    def tearDown(self):
+        """Clean up after test case."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def assign(self, submission, days):
+        review = Review(submission_id=submission.id, reviewer_id=self.reviewer.id, editor_id=self.editor.id,
+                        due_date=self.now + timedelta(days=days))
+        db.session.add(review)
+        return review
+
+    def counters(self, submission):
+        return (submission.total_reviews, submission.completed_reviews, submission.pending_reviews,
+                submission.oldest_pending_due)
+
+    def test_review_counters_follow_reviews(self):
+        """Test that assigning, completing, moving and deleting reviews update the counters."""
+        first, second = self.submissions
+        self.assertEqual(self.counters(first), (0, 0, 0, None))
+
+        early = self.assign(first, 7)
+        late = self.assign(first, 14)
+        db.session.commit()
+        self.assertEqual(self.counters(first), (2, 0, 2, self.now + timedelta(days=7)))
+
+        early.status = 'completed'
+        early.completed_at = self.now
+        db.session.flush()
+        # Loaded submissions are refreshed after the flush, before any commit
+        self.assertEqual(self.counters(first), (2, 1, 1, self.now + timedelta(days=14)))
+        db.session.commit()
+
+        late.submission_id = second.id
+        db.session.commit()
+        self.assertEqual(self.counters(first), (1, 1, 0, None))
+        self.assertEqual(self.counters(second), (1, 0, 1, self.now + timedelta(days=14)))
+
+        db.session.delete(early)
+        db.session.commit()
+        self.assertEqual(self.counters(first), (0, 0, 0, None))
+
+    def test_counters_do_not_touch_updated_at(self):
+        """Test that counter updates are not treated as edits of the submission."""
+        first = self.submissions[0]
+        updated_at = first.updated_at
+        self.assign(first, 7)
+        db.session.commit()
+        self.app.extensions['tracking_buffer'].record_article_view(first.id, None, '10.0.0.1')
+        self.assertEqual(first.view_count, 1)
+        self.assertEqual(first.updated_at, updated_at)
+
+    def test_view_counts(self):
+        """Test that views from the tracking buffer and the ORM increment view_count."""
+        first, second = self.submissions
+        tracking_buffer = self.app.extensions['tracking_buffer']
+        for ip_address in ['10.0.0.1', '10.0.0.2', '10.0.0.3']:
+            tracking_buffer.record_article_view(first.id, None, ip_address)
+        db.session.add(ArticleView(submission_id=second.id, timestamp=self.now))
+        db.session.commit()
+
+        self.assertEqual((first.view_count, second.view_count), (3, 1))
+        # Both paths also feed the daily counters that reconciliation reads
+        self.assertEqual(reconcile_counters(), 0)
+
+    def test_reconcile_repairs_drift(self):
+        """Test that reconciliation recomputes counters after bulk changes."""
+        first, second = self.submissions
+        self.assign(first, 7)
+        self.assign(first, 3)
+        self.assign(second, 5)
+        db.session.commit()
+
+        # Bulk statements bypass the listeners
+        db.session.execute(db.update(Review).where(Review.submission_id == first.id).values(status='completed'))
+        db.session.execute(db.update(Submission).values(view_count=99))
+        db.session.commit()
+        self.assertEqual(first.pending_reviews, 2)
+
+        self.assertEqual(reconcile_counters(), 2)
+        self.assertEqual(self.counters(first), (2, 2, 0, None))
+        self.assertEqual(self.counters(second), (1, 0, 1, self.now + timedelta(days=5)))
+        self.assertEqual((first.view_count, second.view_count), (0, 0))
+        self.assertEqual(reconcile_counters(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Tests for the visitor tracking writer.
+
+This module checks the synchronous fallback, batching, backpressure and the
+flush performed on shutdown.
+"""
+
+import unittest
+from unittest import mock
+
+from app import create_app, db
+from models import User, Submission, VisitorLog, ArticleView
+from services.tracking import TrackingBuffer
+
+
+class TestTrackingBuffer(unittest.TestCase):
+    """Test cases for TrackingBuffer."""
+
+    def setUp(self):
+        """Set up test case with a test app and database."""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        author = User(name='Test Author', email='tracking-author@example.com', password='password', role='author')
+        db.session.add(author)
+        db.session.commit()
+        submission = Submission(title='Tracked', authors='Test Author', abstract='Abstract',
+                                category='physics', file_path='tracked.pdf', author_id=author.id)
+        db.session.add(submission)
+        db.session.commit()
+        self.submission_id = submission.id
+
+    def tearDown(self):
+        """Clean up after test case."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_synchronous_mode_writes_inline(self):
+        """Test that events are written immediately in testing mode."""
+        buffer = self.app.extensions['tracking_buffer']
+        self.assertTrue(buffer.synchronous)
+
+        buffer.record_visit(None, '127.0.0.1', f'/articles/{self.submission_id}')
+        buffer.record_article_view(self.submission_id, None, '127.0.0.1')
+        self.assertEqual(VisitorLog.query.count(), 1)
+        self.assertEqual(ArticleView.query.count(), 1)
+        self.assertEqual(buffer.stats()['written'], 2)
+
+    def test_backpressure_and_flush(self):
+        """Test that a full queue drops events and flush writes the rest in one batch."""
+        self.app.testing = False
+        buffer = TrackingBuffer(self.app, max_queue_size=2)
+        self.assertFalse(buffer.synchronous)
+
+        with mock.patch.object(buffer, '_ensure_writer'):
+            self.assertTrue(buffer.record_visit(None, '10.0.0.1', '/browse'))
+            self.assertTrue(buffer.record_article_view(self.submission_id, None, '10.0.0.2'))
+            self.assertFalse(buffer.record_visit(None, '10.0.0.3', '/issues'))
+
+        self.assertEqual(VisitorLog.query.count(), 0)
+        self.assertEqual(buffer.flush(), 2)
+
+        stats = buffer.stats()
+        self.assertEqual(stats['dropped'], 1)
+        self.assertEqual(stats['written'], 2)
+        self.assertEqual(stats['batches'], 1)
+        self.assertEqual(VisitorLog.query.count(), 1)
+        self.assertEqual(ArticleView.query.count(), 1)
+
+    def test_writer_thread_and_shutdown(self):
+        """Test that the background writer persists events and shutdown flushes the queue."""
+        self.app.testing = False
+        buffer = TrackingBuffer(self.app, batch_size=3, flush_interval=0.05)
+
+        for i in range(7):
+            buffer.record_visit(None, f'10.0.0.{i}', '/browse')
+        buffer.shutdown()
+
+        self.assertEqual(buffer.stats()['written'], 7)
+        self.assertEqual(buffer.stats()['queued'], 0)
+        self.assertEqual(VisitorLog.query.count(), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+"""
+Tests for the content-addressed upload store.
+
+This module checks that uploads are streamed in chunks into sharded paths
+named by their SHA-256 digest, with their size and digest recorded, that the
+same content is stored once (hard-linked for another extension) with
+reference counts, that verify() catches damaged files and sweep() removes
+unreferenced ones, and that new submissions are saved through the store.
+"""
+
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from flask import g
+
+from app import create_app, db
+from models import User, Submission, StoredFile
+from services.upload_store import UploadStore, object_path
+
+
+class ChunkRecorder(io.BytesIO):
+    """In-memory upload stream that records the size of every read."""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.reads = []
+
+    def read(self, size=-1):
+        self.reads.append(size)
+        return super().read(size)
+
+
+class Upload:
+    """Minimal stand-in for an uploaded FileStorage: a file name and a stream."""
+
+    def __init__(self, filename, data):
+        self.filename = filename
+        self.stream = ChunkRecorder(data)
+
+
+class TestUploadStore(unittest.TestCase):
+    """Test cases for UploadStore."""
+
+    def setUp(self):
+        """Set up test case with a test app, database and a scratch upload folder."""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        self.upload_folder = tempfile.mkdtemp()
+        self.app.config['UPLOAD_FOLDER'] = self.upload_folder
+        # serve_css is only registered on the module-level app
+        self.app.add_url_rule('/css/<path:filename>', 'serve_css', lambda filename: '')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.store = UploadStore(chunk_size=1024)
+
+    def tearDown(self):
+        """Clean up after test case."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        shutil.rmtree(self.upload_folder)
+
+    def test_streams_into_sharded_paths(self):
+        """Test that an upload is copied in chunks to its digest's shard and recorded."""
+        data = os.urandom(10 * 1024 + 7)
+        upload = Upload('My Paper.PDF', data)
+        stored = self.store.save(upload)
+        db.session.commit()
+
+        sha256 = hashlib.sha256(data).hexdigest()
+        self.assertEqual(stored.path, f'objects/{sha256[:2]}/{sha256[2:4]}/{sha256}.pdf')
+        self.assertEqual(stored.path, object_path(sha256, 'pdf'))
+        self.assertEqual((stored.sha256, stored.size, stored.deduplicated), (sha256, len(data), False))
+        self.assertEqual(set(upload.stream.reads), {1024})
+        self.assertEqual(len(upload.stream.reads), 12)
+        with open(self.store.absolute_path(stored.path), 'rb') as f:
+            self.assertEqual(f.read(), data)
+        self.assertEqual(os.listdir(self.store.absolute_path('objects/tmp')), [])
+
+        stored_file = StoredFile.query.filter_by(path=stored.path).one()
+        self.assertEqual((stored_file.sha256, stored_file.size, stored_file.ref_count), (sha256, len(data), 1))
+
+    def test_same_content_is_stored_once(self):
+        """Test that repeated content reuses the stored file, or hard-links it for another extension."""
+        data = b'identical manuscript\n' * 100
+        first = self.store.save(Upload('a.docx', data))
+        second = self.store.save(Upload('b.docx', data))
+        other = self.store.save(Upload('c.txt', data))
+        db.session.commit()
+
+        self.assertEqual(first.path, second.path)
+        self.assertTrue(second.deduplicated)
+        self.assertEqual(StoredFile.query.filter_by(path=first.path).one().ref_count, 2)
+
+        self.assertTrue(other.deduplicated)
+        self.assertTrue(other.path.endswith('.txt'))
+        self.assertTrue(os.path.samefile(self.store.absolute_path(first.path), self.store.absolute_path(other.path)))
+        self.assertEqual(StoredFile.query.count(), 2)
+
+    def test_verify_release_and_sweep(self):
+        """Test that damaged files fail verification and unreferenced files are swept."""
+        intact = self.store.save(Upload('intact.pdf', b'intact'))
+        damaged = self.store.save(Upload('damaged.pdf', b'damaged'))
+        db.session.commit()
+        with open(self.store.absolute_path(damaged.path), 'wb') as f:
+            f.write(b'DAMAGED')
+        self.assertEqual(self.store.verify_all(), [damaged.path])
+
+        self.assertTrue(self.store.release(intact.path))
+        self.assertFalse(self.store.release('20250101000000_1_legacy.pdf'))
+        db.session.commit()
+        self.assertEqual(self.store.sweep(), 1)
+        self.assertFalse(os.path.exists(self.store.absolute_path(intact.path)))
+        self.assertIsNone(StoredFile.query.filter_by(path=intact.path).first())
+
+    def test_new_submission_uses_the_store(self):
+        """Test that a submitted manuscript is saved under its digest and referenced by the submission."""
+        author = User('Upload Author', 'upload-author@example.com', 'password', 'author')
+        db.session.add(author)
+        db.session.commit()
+        client = self.app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(author.id)
+            session['_fresh'] = True
+        g.pop('_login_user', None)
+
+        for title in ('First manuscript', 'Second manuscript'):
+            response = client.post('/submissions/new', data={
+                'title': title, 'authors': 'U. Author', 'abstract': 'An abstract. ' * 10, 'category': 'physics',
+                'file': (io.BytesIO(b'%PDF-1.4 manuscript'), 'paper.pdf'),
+            }, content_type='multipart/form-data')
+            self.assertEqual(response.status_code, 302)
+
+        paths = {submission.file_path for submission in Submission.query}
+        self.assertEqual(paths, {object_path(hashlib.sha256(b'%PDF-1.4 manuscript').hexdigest(), 'pdf')})
+        self.assertEqual(StoredFile.query.one().ref_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Tests for server-side visit deduplication.
+
+This module checks the rotating Bloom filter window, sharing through a mapped
+file, and that tracking no longer stores per-path keys in the session cookie.
+"""
+
+import os
+import tempfile
+import unittest
+
+from app import create_app, db
+from models import VisitorLog
+from services.visit_dedup import VisitDeduplicator
+
+
+class TestVisitDeduplicator(unittest.TestCase):
+    """Test cases for VisitDeduplicator."""
+
+    def test_repeat_within_window(self):
+        """Test that a repeat is suppressed for at least one window and expires after two."""
+        dedup = VisitDeduplicator(window=600, memory_kb=16, capacity=1000)
+        self.assertFalse(dedup.seen('user:1|/browse', now=1200))
+        self.assertTrue(dedup.seen('user:1|/browse', now=1500))
+        self.assertTrue(dedup.seen('user:1|/browse', now=1799))
+        self.assertFalse(dedup.seen('user:2|/browse', now=1500))
+        self.assertFalse(dedup.seen('user:1|/issues', now=1500))
+
+        # Next generation still consults the previous one
+        self.assertTrue(dedup.seen('user:1|/browse', now=1900))
+        # Two generations later the visit has been rotated out
+        self.assertFalse(dedup.seen('user:1|/browse', now=2400))
+
+        stats = dedup.stats()
+        self.assertEqual(stats['hits'], 3)
+        self.assertEqual(stats['misses'], 4)
+        self.assertAlmostEqual(stats['hit_rate'], 3 / 7)
+        self.assertEqual(stats['memory_bytes'], 16 + 16 * 1024)
+
+    def test_shared_file(self):
+        """Test that two deduplicators mapping the same file see each other's visits."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'dedup.bin')
+            worker_a = VisitDeduplicator(memory_kb=16, path=path)
+            worker_b = VisitDeduplicator(memory_kb=16, path=path)
+
+            self.assertFalse(worker_a.seen('ip:10.0.0.1|/articles/1', now=1000))
+            self.assertTrue(worker_b.seen('ip:10.0.0.1|/articles/1', now=1000))
+            self.assertTrue(worker_b.stats()['shared'])
+
+    def test_tracking_keeps_session_small(self):
+        """Test that repeated page views are tracked once and leave no per-path session keys."""
+        app = create_app()
+        app.config['TESTING'] = True
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        dedup = app.extensions['visit_dedup']
+        app.add_url_rule('/tracked-page', 'tracked_page', lambda: 'ok')
+        app.add_url_rule('/other-page', 'other_page', lambda: 'ok')
+
+        with app.app_context():
+            db.create_all()
+            try:
+                client = app.test_client()
+                with client.session_transaction() as session:
+                    session['last_tracked_time'] = {'/tracked-page': 0}
+                    session['tracked_/tracked-page'] = True
+
+                for _ in range(3):
+                    client.get('/tracked-page')
+                client.get('/other-page')
+
+                with client.session_transaction() as session:
+                    self.assertFalse(any(key.startswith('tracked_') for key in session))
+                    self.assertNotIn('last_tracked_time', session)
+                self.assertEqual(VisitorLog.query.filter_by(path='/tracked-page').count(), 1)
+                self.assertEqual(dedup.stats()['hits'], 2)
+            finally:
+                db.session.remove()
+                db.drop_all()
+
+
+if __name__ == '__main__':
+    unittest.main()
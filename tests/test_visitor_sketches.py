@@ -0,0 +1,119 @@
+"""
+Tests for the HyperLogLog unique visitor sketches.
+
+This module checks the sketch itself (accuracy, merging, serialization), that
+the tracking writer keeps the hourly sketches up to date, and that estimates
+merged from hourly, daily and monthly sketches stay within the error bound of
+an exact DISTINCT over the same range.
+"""
+
+import random
+import unittest
+from datetime import datetime, timedelta
+
+from app import create_app, db
+from models import VisitorLog, VisitorSketch
+from services.analytics_rollups import run_rollups
+from services.hyperloglog import HyperLogLog, STANDARD_ERROR
+from services.visitor_sketches import rebuild_sketches, unique_visitors, _plan
+
+NOW = datetime(2026, 3, 10, 15, 30)
+
+
+class TestHyperLogLog(unittest.TestCase):
+    """Test cases for the HyperLogLog sketch."""
+
+    def test_estimates_within_error_bound(self):
+        """Test that estimates stay within four standard errors across cardinalities."""
+        for count in [10, 1000, 50000]:
+            sketch = HyperLogLog().update(f'visitor-{count}-{i}' for i in range(count))
+            self.assertLessEqual(abs(sketch.count() - count), max(1, 4 * STANDARD_ERROR * count), count)
+
+    def test_merge_is_union(self):
+        """Test that a merged sketch equals the sketch of the union, sparse or dense."""
+        for size in [100, 20000]:
+            first = HyperLogLog().update(str(i) for i in range(size))
+            second = HyperLogLog().update(str(i) for i in range(size // 2, size * 2))
+            union = HyperLogLog().update(str(i) for i in range(size * 2))
+            self.assertEqual(first.merge(second).to_bytes(), union.to_bytes())
+
+    def test_serialization_round_trip(self):
+        """Test that sparse and dense sketches survive serialization."""
+        sparse = HyperLogLog().update(str(i) for i in range(50))
+        dense = HyperLogLog().update(str(i) for i in range(50000))
+        self.assertLess(len(sparse.to_bytes()), 200)
+        self.assertEqual(len(dense.to_bytes()), sparse.size + 2)
+        for sketch in [sparse, dense, HyperLogLog()]:
+            self.assertEqual(HyperLogLog.from_bytes(sketch.to_bytes()).count(), sketch.count())
+
+
+class TestVisitorSketches(unittest.TestCase):
+    """Test cases for the stored visitor sketches."""
+
+    def setUp(self):
+        """Set up test case with a test app and database."""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        """Clean up after test case."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_tracking_writer_updates_sketches(self):
+        """Test that visits written by the tracking buffer are merged into hourly sketches."""
+        tracking_buffer = self.app.extensions['tracking_buffer']
+        for i in range(30):
+            tracking_buffer.record_visit(None, f'10.0.0.{i % 12}', '/browse' if i % 3 else '/')
+        tracking_buffer.record_article_view(7, None, '10.0.0.1')
+        tracking_buffer.record_article_view(7, None, '10.0.0.2')
+
+        self.assertEqual(unique_visitors('site'), {'': 12})
+        self.assertEqual(unique_visitors('path'), {'/': 4, '/browse': 8})
+        self.assertEqual(unique_visitors('article', keys=[7]), {'7': 2})
+        self.assertEqual(VisitorSketch.query.filter_by(dimension='site').count(), 1)
+
+    def test_ranges_match_exact_distinct(self):
+        """Test estimates merged across months, days and hours against exact DISTINCT counts."""
+        rng = random.Random(3)
+        start = datetime(2025, 12, 20)
+        span = (NOW - start).total_seconds()
+        db.session.execute(VisitorLog.__table__.insert(), [
+            {'ip_address': f'10.1.{n // 256}.{n % 256}', 'path': rng.choice(['/', '/browse']),
+             'timestamp': start + timedelta(seconds=rng.uniform(0, span))}
+            for n in (int(3000 * rng.random() ** 2) for _ in range(6000))
+        ])
+        db.session.commit()
+        rebuild_sketches()
+        run_rollups(now=NOW, lag=0)
+        self.assertTrue(VisitorSketch.query.filter_by(granularity='month').count() > 0)
+
+        end = datetime(2026, 3, 10, 16)
+        for range_start in [None, datetime(2026, 1, 1), datetime(2025, 12, 28, 5), datetime(2026, 3, 10),
+                            datetime(2026, 2, 3, 12)]:
+            query = db.session.query(db.func.count(db.distinct(VisitorLog.ip_address)))
+            if range_start is not None:
+                query = query.filter(VisitorLog.timestamp >= range_start)
+            exact = query.scalar()
+            estimate = unique_visitors('site', range_start, end)['']
+            self.assertLessEqual(abs(estimate - exact), max(2, 4 * STANDARD_ERROR * exact), range_start)
+
+    def test_plan_uses_fewest_sketches(self):
+        """Test that a range is covered by months, then rolled-up days, then hours."""
+        runs = _plan(datetime(2025, 12, 30, 22), datetime(2026, 3, 10, 16), datetime(2026, 3, 9))
+        self.assertEqual(runs, [
+            ['hour', datetime(2025, 12, 30, 22), datetime(2025, 12, 31)],
+            ['day', datetime(2025, 12, 31), datetime(2026, 1, 1)],
+            ['month', datetime(2026, 1, 1), datetime(2026, 3, 1)],
+            ['day', datetime(2026, 3, 1), datetime(2026, 3, 9)],
+            ['hour', datetime(2026, 3, 9), datetime(2026, 3, 10, 16)],
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()